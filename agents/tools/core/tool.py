@@ -1,9 +1,16 @@
+import asyncio
 from typing import Dict, Any
 from abc import ABC, abstractmethod
 from agents.tools.core.tool_definition import ToolDefinition
 from agents.tools.core.tool_response import ToolResponse
 
 class Tool(ABC):
+    # True for tools whose execute() does synchronous I/O (Google API clients, spotipy,
+    # pactl). They run in a worker thread so they neither block the event loop nor
+    # serialize concurrent tool calls.
+    blocking = False
+    """Runs in a fresh event loop per call: don't keep loop-bound async clients (aiohttp, async Google) across calls."""
+
     def __init__(self):
         self.definition = self.get_definition()
 
@@ -15,4 +22,10 @@ class Tool(ABC):
     @abstractmethod
     async def execute(self, parameters: Dict[str, Any]) -> ToolResponse:
         """Execute the tool's functionality with the given parameters"""
-        pass
\ No newline at end of file
+        pass
+
+    async def run(self, parameters: Dict[str, Any]) -> ToolResponse:
+        """Execute the tool without blocking the event loop"""
+        if self.blocking:
+            return await asyncio.to_thread(asyncio.run, self.execute(parameters))
+        return await self.execute(parameters)
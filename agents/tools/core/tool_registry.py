@@ -4,6 +4,7 @@ from agents.tools.core.tool import Tool
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        self._definitions: Optional[List[dict]] = None
         
     def register_tools_from_module(self, module):
         for cls in module.__dict__.values():
@@ -13,12 +14,19 @@ class ToolRegistry:
     def register_tool(self, tool: Tool):
         """Register a new tool"""
         self._tools[tool.definition.name] = tool
+        self._definitions = None
 
     def get_tool(self, name: str) -> Optional[Tool]:
         """Get a tool by name"""
         return self._tools.get(name)
 
     def get_all_definitions(self) -> List[dict]:
-        """Get all tool definitions in OpenAI format"""
-        return [tool.definition.to_openai_schema() for tool in self._tools.values()]
+        """Get all tool definitions in OpenAI format.
+
+        Built once and reused, so every request carries a byte-identical tool
+        list (required for OpenAI prompt caching). Do not mutate the result.
+        """
+        if self._definitions is None:
+            self._definitions = [tool.definition.to_openai_schema() for tool in self._tools.values()]
+        return self._definitions
     
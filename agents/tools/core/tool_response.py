@@ -3,6 +3,6 @@ from dataclasses import dataclass
 @dataclass
 class ToolResponse:
     content: str
-    behavior_instructions: str = "",
+    behavior_instructions: str = ""
     standard_response_audio_sub_path: str = ""
     audio_response_handled: bool = False
\ No newline at end of file
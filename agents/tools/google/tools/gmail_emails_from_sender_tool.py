@@ -7,6 +7,8 @@ from agents.tools.google.clients.gmail_reader import GmailReader
 class GmailEmailsFromSenderTool(Tool):
     """Tool zum Abrufen von E-Mails eines bestimmten Absenders"""
 
+    blocking = True
+
     def __init__(self):
         self.gmail_reader = GmailReader()
         super().__init__()
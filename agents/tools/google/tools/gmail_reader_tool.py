@@ -7,6 +7,8 @@ from agents.tools.core.tool_response import ToolResponse
 from agents.tools.google.clients.gmail_reader import GmailReader
 
 class GmailReaderTool(Tool):
+    blocking = True
+
     def __init__(self):
         self.gmail_reader = GmailReader()
         super().__init__()
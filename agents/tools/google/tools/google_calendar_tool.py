@@ -8,6 +8,8 @@ from agents.tools.google.clients.google_calendar_client import GoogleCalendarCli
 class GoogleCalendarTool(Tool):
     """Tool zur Abfrage und Erstellung von Google Calendar Terminen."""
 
+    blocking = True
+
     def __init__(self):
         self.calendar_client = GoogleCalendarClient()
         super().__init__()
@@ -8,6 +8,8 @@ from agents.tools.google.clients.youtube_video_summarizer import YoutubeVideoSum
 from agents.tools.google.clients.youtube_client import YouTubeClient
 
 class YoutubeTool(Tool):
+    blocking = True
+
     def __init__(self):
         self.youtube_client = YouTubeClient()
         self.youtube_video_summarizer = YoutubeVideoSummarizer()
@@ -9,8 +9,12 @@ class NotionClipboardManager(AbstractNotionClient):
         super().__init__()
         self.clipboard_page_id = NotionPages.get_page_id("JARVIS_CLIPBOARD")
     
-    async def append_to_clipboard(self, text):
-        """Appends formatted text to the clipboard page with a divider."""
+    async def append_to_clipboard(self, text, with_divider=True):
+        """Appends formatted text to the clipboard page, by default after a divider.
+
+        Pass with_divider=False to continue the previous entry (e.g. dictation batches).
+        Raises RuntimeError if Notion rejects the request, so callers can retry.
+        """
         divider_block = {
             "type": "divider",
             "divider": {}
@@ -19,7 +23,7 @@ class NotionClipboardManager(AbstractNotionClient):
         content_blocks = NotionMarkdownParser.parse_markdown(text)
         
         data = {
-            "children": [divider_block] + content_blocks
+            "children": ([divider_block] if with_divider else []) + content_blocks
         }
         
         response = await self._make_request(
@@ -28,9 +32,11 @@ class NotionClipboardManager(AbstractNotionClient):
             data
         )
         
-        if response.status_code == 200:
-            self.logger.info("Text successfully added to clipboard page.")
-            return "Text successfully added to clipboard page."
-        else:
-            self.logger.error(f"Error adding text: {response.text}")
-            return f"Error adding text: {response.text}"
\ No newline at end of file
+        # _make_request returns an error dict instead of a response on HTTP errors
+        if isinstance(response, dict) or response.status_code != 200:
+            error = response.get("error") if isinstance(response, dict) else response.text
+            self.logger.error(f"Error adding text: {error}")
+            raise RuntimeError(f"Error adding text: {error}")
+
+        self.logger.info("Text successfully added to clipboard page.")
+        return "Text successfully added to clipboard page."
\ No newline at end of file
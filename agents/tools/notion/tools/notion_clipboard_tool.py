@@ -29,7 +29,7 @@ class NotionClipboardTool(Tool):
         try:
             content = parameters.get("content")
             if not content:
-                return "Error: 'content' is required."
+                return ToolResponse("Error: 'content' is required.")
 
             result = await self.clipboard_manager.append_to_clipboard(content)
             
@@ -41,4 +41,4 @@ class NotionClipboardTool(Tool):
                 audio_response_handled=True
             )
         except Exception as e:
-            return f"Error executing NotionClipboardTool: {str(e)}"
+            return ToolResponse(f"Error executing NotionClipboardTool: {str(e)}")
@@ -7,6 +7,8 @@ from agents.tools.core.tool_response import ToolResponse
 from agents.tools.spotify.spotify_player import SpotifyPlayer
 
 class SpotifyTool(Tool):
+    blocking = True
+
     def __init__(self):
         self.spotify_player = SpotifyPlayer()
         super().__init__()
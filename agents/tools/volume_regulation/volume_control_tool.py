@@ -7,6 +7,8 @@ from agents.tools.volume_regulation.volume_control import VolumeControl
 from audio.standard_phrase_player import StandardPhrasePlayer
 
 class VolumeControlTool(Tool):
+    blocking = True
+
     def __init__(self):
         super().__init__()
 
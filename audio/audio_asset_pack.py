@@ -0,0 +1,141 @@
+"""Vorab dekodierte Sound-Effekte und Standardphrasen als ein memory-mapped PCM-Paket.
+
+Build-Schritt (nach dem Erzeugen neuer Phrasen mit dem StandardPhraseGenerator):
+
+    python -m audio.audio_asset_pack
+
+Dekodiert alle MP3/WAV-Dateien unter ``audio/`` (inkl. ``audio/tts_output/``) einmalig
+in 16-Bit-PCM im Mixer-Format und schreibt sie hintereinander in ``asset_pack.pcm``
+mit einem JSON-Index (Offset und Länge je Datei).
+"""
+import json
+import logging
+import mmap
+import os
+import threading
+import pygame
+
+AUDIO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PACK_PATH = os.path.join(AUDIO_DIR, "asset_pack")
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+
+class AudioAssetPack:
+    """Liest das PCM-Paket per mmap und liefert pygame-Sounds ohne Dekodierung.
+
+    Schlüssel sind Pfade relativ zu ``audio/``, z. B. ``tts_output/volume/tts_volume_50.mp3``.
+    Sounds werden aus einem Slice des Mappings erzeugt und pro Datei gecacht;
+    pygame.mixer.Sound(buffer=...) kopiert die Samples dabei einmal in den Mixer.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, pack_path=DEFAULT_PACK_PATH):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = None
+        self.channels = None
+        self.assets = {}
+
+        self._mmap = None
+        self._view = None
+        self._sounds = {}
+        self._lock = threading.Lock()
+
+        index_path, data_path = f"{pack_path}.json", f"{pack_path}.pcm"
+        if not (os.path.exists(index_path) and os.path.exists(data_path)):
+            self.logger.info("ℹ️ Kein Asset-Pack gefunden, Sounds werden einzeln dekodiert "
+                             "(erstellen mit: python -m audio.audio_asset_pack)")
+            return
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        self.sample_rate = index["sample_rate"]
+        self.channels = index["channels"]
+        self.assets = index["assets"]
+
+        with open(data_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self.logger.info("📦 Asset-Pack geladen: %d Sounds", len(self.assets))
+
+    @classmethod
+    def default(cls):
+        """Gemeinsame Instanz für den Prozess; wird beim ersten Zugriff gemappt."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @staticmethod
+    def asset_key(path):
+        """Normalisiert einen Dateipfad zum Schlüssel relativ zu ``audio/``."""
+        return os.path.relpath(os.path.abspath(path), AUDIO_DIR).replace(os.sep, "/")
+
+    def pcm(self, path):
+        """Slice der PCM-Daten auf dem Mapping (ohne Kopie) oder None, wenn die Datei nicht im Paket ist.
+
+        Wer daraus einen pygame-Sound oder ein AudioSegment baut, erhält eine Kopie.
+        """
+        asset = self.assets.get(self.asset_key(path))
+        if asset is None:
+            return None
+        return self._view[asset["offset"]:asset["offset"] + asset["length"]]
+
+    def get_sound(self, path):
+        """pygame-Sound für die Datei oder None (nicht im Paket oder Mixer-Format passt nicht)."""
+        key = self.asset_key(path)
+        with self._lock:
+            sound = self._sounds.get(key)
+            if sound is not None:
+                return sound
+
+            mixer_format = pygame.mixer.get_init()
+            if mixer_format is None or (mixer_format[0], mixer_format[2]) != (self.sample_rate, self.channels):
+                return None
+
+            pcm = self.pcm(path)
+            if pcm is None:
+                return None
+
+            sound = pygame.mixer.Sound(buffer=pcm)
+            self._sounds[key] = sound
+            return sound
+
+
+def build_asset_pack(source_dir=AUDIO_DIR, pack_path=DEFAULT_PACK_PATH, sample_rate=44100, channels=2):
+    """Dekodiert alle Audiodateien unter ``source_dir`` in ein PCM-Paket mit Index."""
+    from pydub import AudioSegment
+
+    frame_bytes = 2 * channels
+    assets = {}
+    offset = 0
+
+    with open(f"{pack_path}.pcm", "wb") as data_file:
+        for root, _, files in os.walk(source_dir):
+            for name in sorted(files):
+                if not name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+
+                path = os.path.join(root, name)
+                segment = (AudioSegment.from_file(path)
+                           .set_frame_rate(sample_rate)
+                           .set_channels(channels)
+                           .set_sample_width(2))
+                pcm = segment.raw_data[:len(segment.raw_data) - len(segment.raw_data) % frame_bytes]
+
+                data_file.write(pcm)
+                assets[AudioAssetPack.asset_key(path)] = {"offset": offset, "length": len(pcm)}
+                offset += len(pcm)
+                print(f"✅ {AudioAssetPack.asset_key(path)} ({len(pcm) / frame_bytes / sample_rate:.2f} s)")
+
+    with open(f"{pack_path}.json", "w", encoding="utf-8") as index_file:
+        json.dump({"sample_rate": sample_rate, "channels": channels, "sample_width": 2, "assets": assets},
+                  index_file, indent=2)
+
+    print(f"📦 {len(assets)} Sounds, {offset / 1024 / 1024:.1f} MB → {pack_path}.pcm")
+
+
+if __name__ == "__main__":
+    build_asset_pack()
@@ -0,0 +1,395 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import numpy as np
+import pygame
+from audio.capture.microphone_bus import SharedMicrophoneBus
+from audio.capture.shared_ring_buffer import SharedAudioRingBuffer
+
+# Samples pro Slot im Wiedergabe-Ringpuffer (interleaved, d. h. 1024 Stereo-Frames)
+PLAYBACK_FRAME_SAMPLES = 2048
+
+
+class AudioIOProcess:
+    """Mikrofon, Wake-Word-Erkennung und Wiedergabe in einem eigenen Prozess.
+
+    PortAudio-Callbacks, Porcupine und pygame konkurrieren so nicht mehr mit
+    Tool-Code (BeautifulSoup, JSON, OpenAI-Stream) um den GIL des Hauptprozesses.
+    PCM geht in beide Richtungen über Ringpuffer in Shared Memory; über die
+    Queues laufen nur kleine Steuer- und Ereignisnachrichten.
+
+    Zeitstempel der Erkennungen stammen aus ``time.perf_counter()`` des
+    Audio-Prozesses; unter Linux ist das CLOCK_MONOTONIC und damit zwischen den
+    Prozessen vergleichbar.
+    """
+
+    def __init__(self, wakeword="jarvis", sensitivity=0.8, sample_rate=16000, frame_length=512,
+                 buffer_seconds=10, playback_rate=44100, playback_channels=2, playback_seconds=30):
+        """
+        :param frame_length: Samples pro Aufnahme-Frame; muss zu Porcupine passen
+        :param buffer_seconds: Audio-Historie des Aufnahme-Ringpuffers
+        :param playback_rate: Abtastrate der Wiedergabe im Audio-Prozess
+        :param playback_channels: Kanalanzahl der Wiedergabe
+        :param playback_seconds: Größe des Wiedergabe-Ringpuffers in Sekunden
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.wakeword = wakeword
+        self.sensitivity = sensitivity
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.buffer_seconds = buffer_seconds
+        self.playback_rate = playback_rate
+        self.playback_channels = playback_channels
+        self.playback_seconds = playback_seconds
+
+        self.capture_buffer = None
+        self.playback_buffer = None
+        self.microphone_bus = None
+        self.wakeword_listener = None
+        self.audio_output = None
+
+        self._process = None
+        self._commands = None
+        self._events = None
+        self._stats = queue.Queue()
+        self._dispatcher = None
+
+    def start(self, timeout=15):
+        """Legt die Ringpuffer an, startet den Audio-Prozess und wartet, bis er bereit ist."""
+        context = multiprocessing.get_context("spawn")
+        self._commands = context.Queue()
+        self._events = context.Queue()
+
+        self.capture_buffer = SharedAudioRingBuffer.create(
+            self.frame_length, int(self.buffer_seconds * self.sample_rate / self.frame_length)
+        )
+        self.playback_buffer = SharedAudioRingBuffer.create(
+            PLAYBACK_FRAME_SAMPLES,
+            int(self.playback_seconds * self.playback_rate * self.playback_channels / PLAYBACK_FRAME_SAMPLES)
+        )
+
+        config = {
+            "wakeword": self.wakeword,
+            "sensitivity": self.sensitivity,
+            "sample_rate": self.sample_rate,
+            "playback_rate": self.playback_rate,
+            "playback_channels": self.playback_channels,
+            "capture": self.capture_buffer.describe(),
+            "playback": self.playback_buffer.describe(),
+        }
+        self._process = context.Process(
+            target=run_audio_process, args=(config, self._commands, self._events), name="audio-io", daemon=True
+        )
+        self._process.start()
+
+        try:
+            event, *args = self._events.get(timeout=timeout)
+        except queue.Empty:
+            event, args = "error", ["Zeitüberschreitung beim Start"]
+        if event != "ready":
+            self.close()
+            raise RuntimeError(f"Audio-Prozess konnte nicht starten: {args[0] if args else event}")
+
+        self.microphone_bus = SharedMicrophoneBus(self.capture_buffer, sample_rate=self.sample_rate)
+        self.wakeword_listener = RemoteWakeWordListener(self)
+        self.audio_output = RemoteAudioOutput(self)
+
+        self._dispatcher = threading.Thread(target=self._dispatch_events, name="audio-io-events", daemon=True)
+        self._dispatcher.start()
+        self.logger.info("🎛 Audio-Prozess gestartet (PID %d)", self._process.pid)
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def send(self, command, *args):
+        """Schickt eine Steuernachricht an den Audio-Prozess."""
+        if self.is_alive():
+            self._commands.put((command, *args))
+
+    def request_stats(self, timeout=1.0):
+        """Fragt die Zähler des Wake-Word-Listeners im Audio-Prozess ab."""
+        self.send("stats")
+        try:
+            return self._stats.get(timeout=timeout)
+        except queue.Empty:
+            return {}
+
+    def _dispatch_events(self):
+        """Verteilt Ereignisse des Audio-Prozesses an die Stellvertreter."""
+        while True:
+            try:
+                event, *args = self._events.get(timeout=0.5)
+            except queue.Empty:
+                if not self.is_alive():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            if event == "wakeword":
+                self.wakeword_listener.on_detection(*args)
+            elif event in ("playback_started", "playback_finished"):
+                self.audio_output.on_event(event, *args)
+            elif event == "stats":
+                self._stats.put(args[0])
+            elif event == "error":
+                self.logger.error("❌ Fehler im Audio-Prozess: %s", args[0])
+            elif event == "stopped":
+                return
+
+    def close(self):
+        """Beendet den Audio-Prozess und gibt den Shared Memory frei."""
+        if self.microphone_bus is not None:
+            self.microphone_bus.close()
+
+        if self._process is not None:
+            self.send("shutdown")
+            self._process.join(timeout=3)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+        for ring_buffer in (self.capture_buffer, self.playback_buffer):
+            if ring_buffer is not None:
+                ring_buffer.close()
+        self.capture_buffer = self.playback_buffer = None
+
+
+class RemoteWakeWordListener:
+    """Stellvertreter für den WakeWordListener im Audio-Prozess, mit derselben Schnittstelle."""
+
+    def __init__(self, audio_process):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.audio_process = audio_process
+        self.microphone_bus = audio_process.microphone_bus
+
+        self.should_stop = False
+        self.last_detection_started = None
+        self.last_detection_frame = None
+        self._detections = queue.Queue()
+
+    def on_detection(self, frame_started, frame_index):
+        """Nimmt eine Erkennung des Audio-Prozesses entgegen (aus dessen Ereignis-Thread)."""
+        self._detections.put((frame_started, frame_index))
+
+    def listen_for_wakeword(self):
+        """Wartet auf die nächste Erkennung des Audio-Prozesses."""
+        self.logger.info("🎤 Warte auf Wake-Word...")
+
+        while not self.should_stop:
+            try:
+                frame_started, frame_index = self._detections.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            self.last_detection_started = frame_started
+            self.last_detection_frame = frame_index
+            return True
+
+        return False
+
+    def pause_listening(self):
+        self.audio_process.send("pause")
+
+    def resume_listening(self):
+        self.audio_process.send("resume")
+
+    def get_stats(self):
+        return self.audio_process.request_stats()
+
+    def cleanup(self):
+        self.should_stop = True
+        self.logger.info("📊 Wake-Word-Statistik: %s", self.get_stats())
+
+
+class RemoteAudioOutput:
+    """Spielt int16-PCM im Audio-Prozess ab; die Samples gehen über den Wiedergabe-Ringpuffer.
+
+    Es gibt genau einen Schreiber (den Wiedergabe-Thread des VoiceGenerators),
+    und jede Wiedergabe belegt höchstens den halben Puffer, sodass noch nicht
+    abgespielte Samples nie überschrieben werden.
+    """
+
+    def __init__(self, audio_process):
+        self.audio_process = audio_process
+        self.sample_rate = audio_process.playback_rate
+        self.channels = audio_process.playback_channels
+        self._ring_buffer = audio_process.playback_buffer
+        self._events = queue.Queue()
+        self._playback_id = 0
+
+    def on_event(self, event, playback_id):
+        """Nimmt Wiedergabe-Ereignisse des Audio-Prozesses entgegen (aus dessen Ereignis-Thread)."""
+        self._events.put((event, playback_id))
+
+    def play(self, pcm, on_started=None, is_current=lambda: True):
+        """Spielt interleaved int16-PCM ab und blockiert bis zum Ende oder Abbruch.
+
+        :param on_started: Callback beim tatsächlichen Wiedergabestart
+        :param is_current: Wird regelmäßig geprüft; False bricht die Wiedergabe ab
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        frame_length = self._ring_buffer.frame_length
+        max_samples = self._ring_buffer.capacity_frames // 2 * frame_length
+
+        for offset in range(0, len(samples), max_samples):
+            chunk = samples[offset:offset + max_samples]
+            padded = np.zeros(-(-len(chunk) // frame_length) * frame_length, dtype=np.int16)
+            padded[:len(chunk)] = chunk
+
+            start = self._ring_buffer.write_index
+            for frame in padded.reshape(-1, frame_length):
+                self._ring_buffer.write(frame)
+
+            self._playback_id += 1
+            self.audio_process.send("play", self._playback_id, start, self._ring_buffer.write_index, len(chunk))
+            if not self._wait_for_playback(self._playback_id, on_started if offset == 0 else None, is_current):
+                return
+
+    def _wait_for_playback(self, playback_id, on_started, is_current):
+        while self.audio_process.is_alive():
+            if not is_current():
+                self.stop()
+                return False
+
+            try:
+                event, event_id = self._events.get(timeout=0.02)
+            except queue.Empty:
+                continue
+
+            if event_id != playback_id:
+                continue
+            if event == "playback_started" and on_started:
+                on_started()
+            elif event == "playback_finished":
+                return True
+
+        return False
+
+    def stop(self):
+        self.audio_process.send("stop_playback")
+
+
+class _PlaybackWorker:
+    """Wiedergabe im Audio-Prozess auf einem reservierten pygame-Kanal.
+
+    Keine zero-copy-Wiedergabe: Die Samples werden aus dem Ringpuffer zusammengesetzt,
+    und pygame.mixer.Sound(buffer=...) kopiert sie noch einmal in den Mixer.
+    """
+
+    def __init__(self, ring_buffer, events, sample_rate, channels):
+        self.ring_buffer = ring_buffer
+        self.events = events
+
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=sample_rate, size=-16, channels=channels, buffer=2048)
+        pygame.mixer.set_reserved(1)
+        self._channel = pygame.mixer.Channel(0)
+
+        self._requests = queue.Queue()
+        # Wiedergaben bis einschließlich dieser ID wurden per stop() verworfen
+        self._latest_id = 0
+        self._cancelled_id = 0
+        self._worker = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._worker.start()
+
+    def play(self, playback_id, start, stop, samples):
+        self._latest_id = playback_id
+        self._requests.put((playback_id, start, stop, samples))
+
+    def stop(self):
+        self._cancelled_id = self._latest_id
+        self._channel.stop()
+
+    def close(self):
+        self._requests.put(None)
+        self._channel.stop()
+        self._worker.join(timeout=1)
+
+    def _run(self):
+        while (request := self._requests.get()) is not None:
+            playback_id, start, stop, samples = request
+            try:
+                if playback_id <= self._cancelled_id:
+                    continue
+
+                pcm = np.concatenate(self.ring_buffer.frames(start, stop))[:samples]
+                sound = pygame.mixer.Sound(buffer=pcm.tobytes())
+                self._channel.play(sound)
+                self.events.put(("playback_started", playback_id))
+
+                while self._channel.get_busy() and playback_id > self._cancelled_id:
+                    pygame.time.wait(10)
+            except Exception as e:
+                self.events.put(("error", f"Wiedergabefehler: {e}"))
+            finally:
+                self.events.put(("playback_finished", playback_id))
+
+
+def run_audio_process(config, commands, events):
+    """Einstiegspunkt des Audio-Prozesses."""
+    # Erst hier importieren, damit PyAudio und Porcupine nur im Audio-Prozess laden
+    from audio.capture.microphone_bus import MicrophoneBus
+    from wakeword_listener import WakeWordListener
+
+    logging.basicConfig(level=logging.INFO)
+    capture_buffer = SharedAudioRingBuffer.attach(**config["capture"])
+    playback_buffer = SharedAudioRingBuffer.attach(**config["playback"])
+
+    player = microphone_bus = None
+    try:
+        # Der Mixer muss vor dem Wake-Sound des Listeners initialisiert werden
+        player = _PlaybackWorker(playback_buffer, events, config["playback_rate"], config["playback_channels"])
+        microphone_bus = MicrophoneBus(
+            sample_rate=config["sample_rate"],
+            frame_length=capture_buffer.frame_length,
+            ring_buffer=capture_buffer
+        )
+        microphone_bus.start()
+        listener = WakeWordListener(
+            wakeword=config["wakeword"],
+            sensitivity=config["sensitivity"],
+            microphone_bus=microphone_bus
+        )
+    except Exception as e:
+        events.put(("error", str(e)))
+        # Erst den Stream schließen, dann den Speicher, in den er schreibt
+        if microphone_bus is not None:
+            microphone_bus.close()
+        if player is not None:
+            player.close()
+        capture_buffer.close()
+        playback_buffer.close()
+        return
+
+    def forward_detections():
+        while listener.listen_for_wakeword():
+            events.put(("wakeword", listener.last_detection_started, listener.last_detection_frame))
+
+    threading.Thread(target=forward_detections, name="wakeword-forward", daemon=True).start()
+    events.put(("ready",))
+
+    try:
+        while True:
+            command, *args = commands.get()
+
+            if command == "shutdown":
+                break
+            elif command == "pause":
+                listener.pause_listening()
+            elif command == "resume":
+                listener.resume_listening()
+            elif command == "play":
+                player.play(*args)
+            elif command == "stop_playback":
+                player.stop()
+            elif command == "stats":
+                events.put(("stats", listener.get_stats()))
+    finally:
+        listener.cleanup()
+        player.close()
+        microphone_bus.close()
+        capture_buffer.close()
+        playback_buffer.close()
+        events.put(("stopped",))
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Ringpuffer für int16-PCM mit fester Framegröße: ein Schreiber, beliebig viele Leser.
+
+    Der Schreiber kopiert jeden Frame in einen vorab allokierten Slot und erhöht
+    danach den monotonen Schreibzähler – ohne Lock. Leser führen ihren eigenen
+    Cursor (absoluter Frame-Index) und bekommen numpy-Views auf die Slots, also
+    keine Kopien. Ein Leser, der mehr als ``capacity_frames`` zurückliegt, verliert
+    die ältesten Frames.
+    """
+
+    def __init__(self, frame_length, capacity_frames, frames=None, counter=None):
+        """
+        :param frames: Optionaler vorhandener Speicher der Form (capacity_frames, frame_length)
+        :param counter: Optionales int64-Array mit einem Element für den Schreibzähler
+        """
+        self.frame_length = frame_length
+        self.capacity_frames = capacity_frames
+        self._frames = frames if frames is not None else np.zeros((capacity_frames, frame_length), dtype=np.int16)
+        # Als Array statt int, damit der Zähler auch in Shared Memory liegen kann
+        self._counter = counter if counter is not None else np.zeros(1, dtype=np.int64)
+
+    @property
+    def write_index(self):
+        """Anzahl der bisher geschriebenen Frames (= Index des nächsten Frames)."""
+        return int(self._counter[0])
+
+    @property
+    def oldest_index(self):
+        """Index des ältesten noch verfügbaren Frames."""
+        return max(0, self.write_index - self.capacity_frames)
+
+    def write(self, pcm):
+        """Schreibt genau einen Frame; der Zähler wird erst nach dem Kopieren erhöht."""
+        write_index = self.write_index
+        self._frames[write_index % self.capacity_frames] = pcm
+        self._counter[0] = write_index + 1
+
+    def views(self, start, stop):
+        """Gibt Views der Frames [start, stop) zurück (höchstens zwei Blöcke wegen Umbruch).
+
+        Ist ``start`` schon überschrieben, beginnen die Views beim ältesten Frame.
+
+        :return: (tatsächlicher Start, Liste von 2D-Arrays der Form (n, frame_length))
+        """
+        start = max(start, self.oldest_index)
+        stop = min(stop, self.write_index)
+        if start >= stop:
+            return start, []
+
+        first_slot = start % self.capacity_frames
+        count = stop - start
+
+        if first_slot + count <= self.capacity_frames:
+            return start, [self._frames[first_slot:first_slot + count]]
+
+        head = self.capacity_frames - first_slot
+        return start, [self._frames[first_slot:], self._frames[:count - head]]
+
+    def frames(self, start, stop):
+        """Gibt die Frames [start, stop) als Liste einzelner 1D-Views zurück."""
+        _, blocks = self.views(start, stop)
+        return [frame for block in blocks for frame in block]
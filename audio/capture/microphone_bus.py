@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+import numpy as np
+import pyaudio
+from audio.capture.audio_ring_buffer import AudioRingBuffer
+
+
+class MicrophoneBus:
+    """Ein einziger, dauerhaft offener Mikrofon-Stream für alle Audio-Verbraucher.
+
+    Der PortAudio-Callback kopiert jeden Frame nur in den Ringpuffer. Wake-Word,
+    VAD und STT abonnieren den Bus und lesen mit eigenem Cursor, sodass das Gerät
+    nie neu geöffnet werden muss und keine Silben beim Umschalten verloren gehen.
+    """
+
+    def __init__(self, sample_rate=16000, frame_length=512, buffer_seconds=10, audio_interface=None,
+                 ring_buffer=None):
+        """
+        :param sample_rate: Abtastrate in Hz (Porcupine und Google STT erwarten 16 kHz)
+        :param frame_length: Samples pro Frame; entspricht Porcupines frame_length
+        :param buffer_seconds: Wie viel Audio-Historie der Ringpuffer vorhält
+        :param audio_interface: Optionale PyAudio-kompatible Instanz (z. B. für Benchmarks)
+        :param ring_buffer: Optionaler vorhandener Ringpuffer (z. B. in Shared Memory)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+
+        capacity_frames = int(buffer_seconds * sample_rate / frame_length)
+        self.ring_buffer = ring_buffer or AudioRingBuffer(frame_length, capacity_frames)
+
+        self._audio_interface = audio_interface
+        self._owns_audio_interface = audio_interface is None
+        self._stream = None
+        # Nur zum Aufwecken wartender Leser; die Audiodaten selbst sind lock-frei
+        self._frames_available = threading.Condition()
+        self._closed = False
+
+        self.overflow_count = 0
+
+    @property
+    def frame_duration(self):
+        """Dauer eines Frames in Sekunden."""
+        return self.frame_length / self.sample_rate
+
+    def start(self):
+        """Öffnet den Mikrofon-Stream (idempotent)."""
+        if self._stream is not None:
+            return
+
+        if self._audio_interface is None:
+            self._audio_interface = pyaudio.PyAudio()
+
+        self._stream = self._audio_interface.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.frame_length,
+            stream_callback=self._audio_callback
+        )
+        self.logger.info("🎙 Mikrofon-Bus gestartet (%d Hz, %d Samples/Frame)", self.sample_rate, self.frame_length)
+
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio-Callback: kopiert den Frame in den Ringpuffer, sonst nichts."""
+        if status & pyaudio.paInputOverflow:
+            self.overflow_count += 1
+
+        if frame_count == self.frame_length:
+            self.ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+
+            with self._frames_available:
+                self._frames_available.notify_all()
+
+        return (None, pyaudio.paContinue)
+
+    def subscribe(self, name, start_frame=None):
+        """Erstellt einen Leser, der ab ``start_frame`` (Standard: ab jetzt) liest."""
+        self.start()
+        if start_frame is None:
+            start_frame = self.ring_buffer.write_index
+        return AudioSubscription(self, name, start_frame)
+
+    def wait_for_frames(self, index, timeout=None):
+        """Blockiert, bis Frame ``index`` geschrieben wurde oder das Timeout abläuft."""
+        with self._frames_available:
+            return self._frames_available.wait_for(
+                lambda: self.ring_buffer.write_index > index or self._closed,
+                timeout=timeout
+            ) and not self._closed
+
+    def close(self):
+        """Schließt den Stream und weckt alle wartenden Leser auf."""
+        self._closed = True
+        with self._frames_available:
+            self._frames_available.notify_all()
+
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+        if self._owns_audio_interface and self._audio_interface is not None:
+            self._audio_interface.terminate()
+            self._audio_interface = None
+
+
+class SharedMicrophoneBus(MicrophoneBus):
+    """Leseseite eines MicrophoneBus, dessen Mikrofon-Stream in einem anderen Prozess läuft.
+
+    Der Ringpuffer liegt in Shared Memory; statt der Condition des Schreibers
+    (die es prozessübergreifend nicht gibt) wird kurz gepollt.
+    """
+
+    def __init__(self, ring_buffer, sample_rate=16000, poll_interval=0.005):
+        super().__init__(sample_rate=sample_rate, frame_length=ring_buffer.frame_length, ring_buffer=ring_buffer)
+        self.poll_interval = poll_interval
+
+    def start(self):
+        """Der Stream gehört dem Audio-Prozess; hier gibt es nichts zu öffnen."""
+
+    def wait_for_frames(self, index, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.ring_buffer.write_index <= index and not self._closed:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return not self._closed
+
+    def close(self):
+        self._closed = True
+
+
+class AudioSubscription:
+    """Leser auf dem MicrophoneBus mit eigenem Cursor."""
+
+    def __init__(self, bus, name, start_frame):
+        self.bus = bus
+        self.name = name
+        self.cursor = start_frame
+        self.dropped_frames = 0
+
+    @property
+    def pending_frames(self):
+        """Anzahl der geschriebenen, aber noch nicht gelesenen Frames."""
+        return self.bus.ring_buffer.write_index - self.cursor
+
+    def read(self, timeout=None, min_frames=1, max_frames=None):
+        """Liefert alle neuen Frames als Liste von 1D-Views (zero-copy).
+
+        Blockiert, bis mindestens ``min_frames`` Frames vorliegen; nach Ablauf des
+        Timeouts wird zurückgegeben, was bis dahin verfügbar ist (ggf. eine leere Liste).
+        """
+        ring_buffer = self.bus.ring_buffer
+        self.bus.wait_for_frames(self.cursor + min_frames - 1, timeout)
+
+        if self.cursor < ring_buffer.oldest_index:
+            self.dropped_frames += ring_buffer.oldest_index - self.cursor
+            self.cursor = ring_buffer.oldest_index
+
+        stop = ring_buffer.write_index
+        if max_frames is not None:
+            stop = min(stop, self.cursor + max_frames)
+
+        # Überholt der Schreiber den Leser genau jetzt, beginnen die Views später als der Cursor
+        start, blocks = ring_buffer.views(self.cursor, stop)
+        self.dropped_frames += start - self.cursor
+        frames = [frame for block in blocks for frame in block]
+        self.cursor = start + len(frames)
+        return frames
+
+    def read_pcm(self, timeout=None, min_frames=1, max_frames=None):
+        """Wie read(), gibt die Frames aber als zusammenhängendes int16-Array (Kopie) zurück."""
+        frames = self.read(timeout=timeout, min_frames=min_frames, max_frames=max_frames)
+        if not frames:
+            return np.empty(0, dtype=np.int16)
+        return np.concatenate(frames)
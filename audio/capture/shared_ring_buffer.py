@@ -0,0 +1,54 @@
+from multiprocessing import shared_memory
+import numpy as np
+from audio.capture.audio_ring_buffer import AudioRingBuffer
+
+
+class SharedAudioRingBuffer(AudioRingBuffer):
+    """AudioRingBuffer in ``multiprocessing.shared_memory`` für den Austausch zwischen Prozessen.
+
+    Layout: ein int64-Schreibzähler im Kopf (auf 64 Byte ausgerichtet), danach
+    die Frames. Es gilt weiterhin ein Schreiber, beliebig viele Leser; der
+    Zähler wird erst nach dem Kopieren des Frames erhöht, Leser sehen also nie
+    halb geschriebene Frames.
+    """
+
+    HEADER_BYTES = 64
+
+    def __init__(self, shm, frame_length, capacity_frames, owner=False):
+        self._shm = shm
+        self._owner = owner
+        counter = np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=0)
+        frames = np.ndarray(
+            (capacity_frames, frame_length), dtype=np.int16, buffer=shm.buf, offset=self.HEADER_BYTES
+        )
+        super().__init__(frame_length, capacity_frames, frames=frames, counter=counter)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @classmethod
+    def create(cls, frame_length, capacity_frames):
+        """Legt einen neuen Puffer an; der Erzeuger gibt ihn mit unlink() wieder frei."""
+        size = cls.HEADER_BYTES + capacity_frames * frame_length * np.dtype(np.int16).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        ring_buffer = cls(shm, frame_length, capacity_frames, owner=True)
+        ring_buffer._counter[0] = 0
+        return ring_buffer
+
+    @classmethod
+    def attach(cls, name, frame_length, capacity_frames):
+        """Öffnet einen von einem anderen Prozess angelegten Puffer."""
+        return cls(shared_memory.SharedMemory(name=name), frame_length, capacity_frames)
+
+    def describe(self):
+        """Parameter, mit denen ein anderer Prozess den Puffer per attach() öffnet."""
+        return {"name": self.name, "frame_length": self.frame_length, "capacity_frames": self.capacity_frames}
+
+    def close(self):
+        # Views auf den Speicher zuerst freigeben, sonst schlägt shm.close() fehl
+        self._frames = None
+        self._counter = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
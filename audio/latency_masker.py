@@ -0,0 +1,69 @@
+import asyncio
+import glob
+import logging
+import os
+import random
+from pydub import AudioSegment
+from audio.audio_asset_pack import AUDIO_DIR, AudioAssetPack
+from utils.latency_tracer import latency_tracer
+
+
+class LatencyMasker:
+    """Überbrückt Stille, wenn die erste Antwort auf sich warten lässt.
+
+    Liegt ``delay_ms`` nach dem Transkript noch kein Audio vor (z. B. bei einem
+    Tool-Aufruf mit anschließender zweiter Completion), wird eine kurze, vorab
+    gerenderte Phrase aus ``audio/tts_output/<category>`` abgespielt. Die Phrasen
+    werden beim Start geladen, bevorzugt aus dem Asset-Pack.
+    """
+
+    def __init__(self, voice_generator, delay_ms=800, category="thinking"):
+        """
+        :param voice_generator: VoiceGenerator, über dessen Queue die Phrase läuft
+        :param delay_ms: Wartezeit nach dem Transkript, bevor überbrückt wird
+        :param category: Unterordner von audio/tts_output mit den Phrasen
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.voice_generator = voice_generator
+        self.delay_ms = delay_ms
+        self.category = category
+        self.clips = self._load_clips()
+
+        if not self.clips:
+            self.logger.warning(
+                "⚠️ Keine Überbrückungsphrasen in tts_output/%s gefunden, Latenz wird nicht überbrückt. "
+                "Erzeugen mit: python -m audio.standard_phrase_generator %s", category, category
+            )
+
+    def _load_clips(self):
+        pack = AudioAssetPack.default()
+        clips = []
+
+        for path in sorted(glob.glob(os.path.join(AUDIO_DIR, "tts_output", self.category, "*.mp3"))):
+            pcm = pack.pcm(path)
+            try:
+                if pcm is not None:
+                    clips.append(AudioSegment(
+                        data=bytes(pcm), sample_width=2, frame_rate=pack.sample_rate, channels=pack.channels
+                    ))
+                else:
+                    clips.append(AudioSegment.from_file(path))
+            except Exception as e:
+                self.logger.error("❌ Phrase %s konnte nicht geladen werden: %s", path, e)
+
+        return clips
+
+    async def mask(self, still_waiting):
+        """Als Task neben der Antwort starten; wird abgebrochen, sobald die Antwort fertig ist.
+
+        :param still_waiting: Callable, das False liefert, sobald die Antwort hörbar ist
+        """
+        if not self.clips:
+            latency_tracer.annotate("filler", "no_phrases")
+            return
+
+        await asyncio.sleep(self.delay_ms / 1000)
+
+        if still_waiting() and self.voice_generator.play_filler(random.choice(self.clips)):
+            self.logger.info("⏳ Antwort dauert, spiele Überbrückungsphrase")
+            latency_tracer.annotate("filler", True)
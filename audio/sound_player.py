@@ -3,30 +3,76 @@ import pygame
 import os
 from pydub import AudioSegment
 from io import BytesIO
+from audio.audio_asset_pack import AudioAssetPack
 
 # Umstellen auf 
 
 class SoundPlayer:
     """Verwaltet das Abspielen des Wake-Word-Sounds in einem separaten Thread."""
     
+    # Gesetzt, wenn die Wiedergabe im Audio-Prozess läuft (siehe route_to)
+    voice_generator = None
+
+    @classmethod
+    def route_to(cls, voice_generator):
+        """Leitet alle Sounds dieses Prozesses über den VoiceGenerator um.
+
+        Für AUDIO_PROCESS=1: Die Ausgabe hat dort genau einen Schreiber, und der
+        Hauptprozess soll keinen eigenen pygame-Mixer öffnen.
+        """
+        cls.voice_generator = voice_generator
+
     def __init__(self, file_path):
         self.base_path = os.path.dirname(__file__)
-        self._setup_pygame()
         self._audio_lock = threading.Lock()
         
         full_path = os.path.join(self.base_path, file_path)
+
+        if SoundPlayer.voice_generator is not None:
+            self.pack_sound = None
+            self.segment = self._load_segment(full_path)
+            return
+
+        self.segment = None
+        self._setup_pygame()
+
+        # Bevorzugt aus dem vorab dekodierten Asset-Pack: keine Dekodierung, kein ffmpeg
+        self.pack_sound = AudioAssetPack.default().get_sound(full_path)
+        if self.pack_sound is not None:
+            return
+
         self.sound = AudioSegment.from_file(full_path)
 
+        # Einmalig nach WAV exportieren, statt bei jedem Abspielen neu zu kodieren
+        wav_io = BytesIO()
+        self.sound.export(wav_io, format="wav")
+        self._wav_bytes = wav_io.getvalue()
+
+    @staticmethod
+    def _load_segment(full_path):
+        # Auch hier bevorzugt aus dem Asset-Pack, nur ohne pygame-Sound
+        pack = AudioAssetPack.default()
+        pcm = pack.pcm(full_path)
+        if pcm is not None:
+            return AudioSegment(data=bytes(pcm), sample_width=2, frame_rate=pack.sample_rate, channels=pack.channels)
+        return AudioSegment.from_file(full_path)
+
     def _setup_pygame(self):
         pygame.mixer.init()
 
-    def _play_audio_thread(self):
+    def _play_pack_sound_thread(self):
         with self._audio_lock:
             try:
-                audio_io = BytesIO()
-                self.sound.export(audio_io, format="wav")
-                audio_io.seek(0)
+                channel = self.pack_sound.play()
+                while channel is not None and channel.get_busy():
+                    pygame.time.wait(20)
+            except Exception as e:
+                print(f"❌ Playback error: {e}")
 
+    def _play_audio_thread(self):
+        with self._audio_lock:
+            audio_io = BytesIO(self._wav_bytes)
+            try:
                 pygame.mixer.music.load(audio_io)
                 pygame.mixer.music.play()
 
@@ -40,7 +86,11 @@ class SoundPlayer:
                 audio_io.close()
 
     def play_audio(self):
+        if self.segment is not None:
+            SoundPlayer.voice_generator.play_clip(self.segment)
+            return
+
         threading.Thread(
-            target=self._play_audio_thread,
+            target=self._play_pack_sound_thread if self.pack_sound is not None else self._play_audio_thread,
             daemon=True
         ).start()
\ No newline at end of file
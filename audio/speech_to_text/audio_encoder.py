@@ -0,0 +1,102 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+# ffmpeg-Ausgabeoptionen je Kodierung; kurze Frames/Seiten, damit kaum Audio im Encoder liegt
+FFMPEG_OUTPUT_ARGS = {
+    "flac": ["-c:a", "flac", "-compression_level", "5", "-frame_size", "1600", "-f", "flac"],
+    "ogg_opus": ["-c:a", "libopus", "-b:a", "{bitrate}", "-application", "voip", "-frame_duration", "20",
+                 "-page_duration", "20000", "-f", "ogg"],
+}
+ENCODINGS = ("linear16", *FFMPEG_OUTPUT_ARGS)
+
+
+def resolve_encoding(encoding):
+    """Prüft die gewünschte Kodierung; ohne ffmpeg wird auf LINEAR16 zurückgefallen."""
+    encoding = (encoding or "linear16").lower()
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unbekannte STT-Kodierung: {encoding} (erlaubt: {', '.join(ENCODINGS)})")
+
+    if encoding != "linear16" and shutil.which("ffmpeg") is None:
+        logging.getLogger("StreamingAudioEncoder").warning(
+            "⚠️ ffmpeg nicht gefunden, STT sendet unkomprimiert (LINEAR16) statt %s", encoding
+        )
+        return "linear16"
+    return encoding
+
+
+class StreamingAudioEncoder:
+    """Kodiert einen laufenden int16-PCM-Strom für den Upload (FLAC oder Ogg/Opus).
+
+    Ein ffmpeg-Prozess liest PCM von stdin; ein Thread sammelt die kodierten
+    Bytes von stdout, sodass encode() nie blockiert und jeweils alles liefert,
+    was bis dahin fertig ist. Bei ``linear16`` werden die Bytes durchgereicht.
+    """
+
+    def __init__(self, encoding, sample_rate, bitrate="24k"):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.encoding = encoding
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flush_ms = 0.0
+
+        self._process = None
+        self._output = bytearray()
+        self._lock = threading.Lock()
+
+        if encoding == "linear16":
+            return
+
+        output_args = [arg.format(bitrate=bitrate) for arg in FFMPEG_OUTPUT_ARGS[encoding]]
+        self._process = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error",
+             "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+             *output_args, "-flush_packets", "1", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        fd = self._process.stdout.fileno()
+        while chunk := os.read(fd, 4096):
+            with self._lock:
+                self._output.extend(chunk)
+
+    def _take_output(self):
+        with self._lock:
+            data, self._output = bytes(self._output), bytearray()
+        self.bytes_out += len(data)
+        return data
+
+    def encode(self, pcm):
+        """Nimmt PCM an und gibt die bisher fertig kodierten Bytes zurück (ggf. leer)."""
+        data = pcm.tobytes()
+        self.bytes_in += len(data)
+
+        if self._process is None:
+            self.bytes_out += len(data)
+            return data
+
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+        return self._take_output()
+
+    def close(self):
+        """Schließt den Encoder und gibt den Rest zurück; die Dauer zählt als zusätzliche Latenz."""
+        if self._process is None or self._process.stdin.closed:
+            return b""
+
+        started = time.perf_counter()
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=2)
+            self._reader.join(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.logger.warning("⚠️ ffmpeg-Encoder reagiert nicht, wird beendet")
+            self._process.kill()
+        self.flush_ms = (time.perf_counter() - started) * 1000
+        return self._take_output()
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from utils.latency_tracer import latency_tracer
+
+# Listenpreise in USD pro Minute Audio (Google Speech-to-Text v1 Standard, OpenAI whisper-1)
+GOOGLE_USD_PER_MINUTE = 0.016
+WHISPER_USD_PER_MINUTE = 0.006
+
+
+@dataclass
+class HedgeStats:
+    """Bilanz des Hedgings über alle Anfragen."""
+    turns: int = 0
+    wins: dict = field(default_factory=lambda: {"google": 0, "whisper": 0})
+    no_result: int = 0
+    extra_audio_seconds: float = 0.0
+    extra_cost_usd: float = 0.0
+
+
+class HedgedSpeechRecognition:
+    """Schickt jede Äußerung gleichzeitig an Google Streaming und Whisper.
+
+    Das erste brauchbare finale Transkript gewinnt, das andere Backend wird
+    abgebrochen. Whisper nimmt dafür ab demselben Bus-Frame auf und nutzt die
+    VAD für das Sprachende. Die Zusatzkosten (Audio, das der Verlierer bereits
+    verarbeitet hat) werden in ``stats`` mitgezählt.
+
+    Nach außen verhält sich die Klasse wie SpeechRecognition und kann direkt an
+    die VoicePipeline übergeben werden.
+    """
+
+    def __init__(self, google_recognition, whisper_recognition, min_confidence=0.5,
+                 google_usd_per_minute=GOOGLE_USD_PER_MINUTE, whisper_usd_per_minute=WHISPER_USD_PER_MINUTE):
+        """
+        :param google_recognition: SpeechRecognition (Google Streaming)
+        :param whisper_recognition: WhuisperSpeechRecognition mit VAD auf demselben Bus
+        :param min_confidence: Mindestkonfidenz eines Google-Ergebnisses (0 = nicht angegeben, gilt als gut)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.google = google_recognition
+        self.whisper = whisper_recognition
+        self.min_confidence = min_confidence
+        self.prices = {"google": google_usd_per_minute, "whisper": whisper_usd_per_minute}
+
+        self.stats = HedgeStats()
+        # Reserve für Verlierer, deren Anfrage noch ausläuft, wenn schon die nächste beginnt
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hedged-stt")
+        self._lock = threading.Lock()
+
+    @property
+    def microphone_bus(self):
+        return self.google.microphone_bus
+
+    @property
+    def on_stable_interim(self):
+        return self.google.on_stable_interim
+
+    @on_stable_interim.setter
+    def on_stable_interim(self, callback):
+        # Zwischenergebnisse liefert nur Google
+        self.google.on_stable_interim = callback
+
+    def warm_up(self):
+        self.google.warm_up()
+
+    def arm(self, start_frame=None):
+        return self.google.arm(start_frame)
+
+    def cancel(self):
+        self.google.cancel()
+        self.whisper.cancel()
+
+    def _is_good(self, backend, transcript):
+        if not transcript:
+            return False
+        if backend == "google":
+            confidence = self.google.last_confidence
+            return not confidence or confidence >= self.min_confidence
+        return True
+
+    def record_user_prompt(self, start_frame=None):
+        """Lässt beide Backends ab ``start_frame`` laufen und gibt das erste gute Transkript zurück."""
+        started = time.perf_counter()
+        whisper_seconds_before = self.whisper.transcriber.audio_seconds_sent
+        futures = {
+            self._executor.submit(self.google.record_user_prompt, start_frame): "google",
+            self._executor.submit(
+                self.whisper.transcribe_utterance, min_duration=0.3, incremental=True, start_frame=start_frame
+            ): "whisper",
+        }
+
+        winner, transcript = None, ""
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error("❌ %s fehlgeschlagen: %s", backend, e)
+                    continue
+
+                if self._is_good(backend, result):
+                    winner, transcript = backend, result.strip()
+                    break
+
+        if pending:
+            # Der Verlierer hört auf aufzunehmen; bereits gesendete Anfragen laufen im Hintergrund aus
+            loser = "whisper" if winner == "google" else "google"
+            getattr(self, loser).cancel()
+
+        self._record_outcome(winner, started, pending, whisper_seconds_before)
+        return transcript
+
+    def _billed_seconds(self, backend, whisper_seconds_before):
+        """Audio, das ein Backend in dieser Anfrage tatsächlich verarbeitet hat."""
+        if backend == "google":
+            return self.google.last_audio_seconds
+        return self.whisper.transcriber.audio_seconds_sent - whisper_seconds_before
+
+    def _record_outcome(self, winner, started, pending, whisper_seconds_before):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.stats.turns += 1
+            if winner is None:
+                self.stats.no_result += 1
+                return
+
+            self.stats.wins[winner] += 1
+            loser = "whisper" if winner == "google" else "google"
+
+        latency_tracer.annotate("stt_winner", winner)
+
+        # Die Kosten des Verlierers stehen erst fest, wenn er beendet ist
+        def account(_future=None):
+            audio_seconds = self._billed_seconds(loser, whisper_seconds_before)
+            with self._lock:
+                self.stats.extra_audio_seconds += audio_seconds
+                self.stats.extra_cost_usd += audio_seconds / 60 * self.prices[loser]
+
+        if pending:
+            next(iter(pending)).add_done_callback(account)
+        else:
+            account()
+
+        self.logger.info("🏁 %s gewinnt nach %.0f ms (Bilanz: %s, Mehrkosten %.4f $)",
+                         winner, elapsed_ms, self.stats.wins, self.stats.extra_cost_usd)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "turns": self.stats.turns,
+                "wins": dict(self.stats.wins),
+                "no_result": self.stats.no_result,
+                "extra_audio_seconds": round(self.stats.extra_audio_seconds, 1),
+                "extra_cost_usd": round(self.stats.extra_cost_usd, 4),
+            }
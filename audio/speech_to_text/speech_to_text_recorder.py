@@ -1,31 +1,123 @@
+import logging
 import os
-import pyaudio
 import queue
-import time
 import threading
+import time
+import grpc
 from google.cloud import speech
+from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+from audio.capture.microphone_bus import MicrophoneBus
+from audio.speech_to_text.audio_encoder import StreamingAudioEncoder, resolve_encoding
+from audio.voice_activity_detector import VoiceActivityDetector
+from audio_transcriber import stitch_transcripts
+from utils.latency_tracer import latency_tracer
+
+# Google begrenzt den Audioinhalt eines StreamingRecognizeRequest auf 25 KB
+MAX_REQUEST_BYTES = 25 * 1024
+
+# Google beendet Streams nach ~305 s; mit Reserve darunter bleiben
+MAX_STREAM_SECONDS = 290
+
+# Im Diktat wird ab dieser Stream-Dauer am nächsten finalen Ergebnis auf einen neuen Stream gewechselt
+DICTATION_ROTATE_SECONDS = 240
+
+# Kodierung des Uploads -> RecognitionConfig; Opus im Ogg-Container ist bei Google OGG_OPUS
+RECOGNITION_ENCODINGS = {
+    "linear16": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+    "flac": speech.RecognitionConfig.AudioEncoding.FLAC,
+    "ogg_opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+}
+
+# Keepalive-Pings halten den Kanal (TCP + TLS) zwischen den Anfragen offen
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 60_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.client_idle_timeout_ms", 24 * 60 * 60 * 1000),
+]
+
+
+class StreamingSession:
+    """Ein laufender streaming_recognize-Aufruf, der schon beim Wake-Word geöffnet wird.
+
+    Der gRPC-Aufruf läuft in einem eigenen Thread (der Google-Client blockiert beim
+    Öffnen bis zur ersten Antwort); die Antworten werden über eine Queue gelesen.
+    """
+
+    def __init__(self, recognition, subscription, requests=None):
+        """
+        :param requests: Eigener Request-Generator; Standard ist der VAD-gesteuerte für eine Äußerung
+        """
+        self.subscription = subscription
+        self._responses = queue.Queue()
+        requests = requests or recognition._encoded_requests(recognition._generate_audio(subscription))
+        self._thread = threading.Thread(target=self._run, args=(recognition, requests), daemon=True)
+        self._thread.start()
+
+    def _run(self, recognition, requests):
+        try:
+            responses = recognition.client.streaming_recognize(recognition.streaming_config, requests)
+            for response in responses:
+                self._responses.put(response)
+        except Exception as e:
+            self._responses.put(e)
+        finally:
+            self._responses.put(None)
+
+    def __iter__(self):
+        while (response := self._responses.get()) is not None:
+            if isinstance(response, Exception):
+                raise response
+            yield response
+
 
 class SpeechRecognition:
-    def __init__(self, credentials_filename="credentials.json", language="de-DE", silence_timeout=2):
+    def __init__(self, credentials_filename="credentials.json", language="de-DE", silence_timeout=2,
+                 client=None, microphone_bus=None, chunk_seconds=0.1, preroll_seconds=1.5,
+                 voice_activity_detector=None, max_speech_seconds=30, interim_stable_ms=400,
+                 encoding="linear16", bitrate="24k", uplink_kbps=None):
         """
         Initialisiert die Spracherkennungsklasse.
 
         :param credentials_filename: Name der Google Cloud Credential JSON-Datei
         :param language: Sprache für die Spracherkennung (z. B. "de-DE")
         :param silence_timeout: Zeit in Sekunden ohne erkannte Sprache, bevor die Aufnahme stoppt.
+        :param client: Optionaler SpeechClient-kompatibler Client (z. B. für Benchmarks)
+        :param microphone_bus: Geteilter MicrophoneBus; ohne Angabe wird ein eigener geöffnet
+        :param chunk_seconds: Audiomenge pro Streaming-Request (Google empfiehlt ~100 ms)
+        :param preroll_seconds: Wie weit die Aufnahme maximal in die Bus-Historie zurückgreift,
+            damit direkt nach dem Wake-Word Gesprochenes nicht verloren geht
+        :param voice_activity_detector: Lokale VAD für Sprachbeginn und -ende (Endpointing)
+        :param max_speech_seconds: Obergrenze für eine Äußerung, falls die VAD kein Ende findet
+        :param interim_stable_ms: So lange muss ein Zwischenergebnis unverändert bleiben,
+            bevor on_stable_interim aufgerufen wird
+        :param encoding: Upload-Kodierung: "linear16" (roh, 256 kbit/s), "flac" (verlustfrei)
+            oder "ogg_opus" (``bitrate``); für schwache Uplinks. Ohne ffmpeg immer LINEAR16.
+        :param uplink_kbps: Bekannte Upload-Bandbreite; damit wird die eingesparte Upload-Zeit geschätzt
         """
+        self.logger = logging.getLogger(self.__class__.__name__)
         script_dir = os.path.dirname(os.path.abspath(__file__))
         credentials_path = os.path.join(script_dir, credentials_filename)
 
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
         self.language = language
-        self.client = speech.SpeechClient()
-        self.audio_queue = queue.Queue()
+        self.client = client or self._create_client()
+        self.microphone_bus = microphone_bus or MicrophoneBus()
+        self.frames_per_request = max(1, round(chunk_seconds / self.microphone_bus.frame_duration))
+        self.max_frames_per_request = max(1, MAX_REQUEST_BYTES // (self.microphone_bus.frame_length * 2))
+        self.preroll_frames = int(preroll_seconds / self.microphone_bus.frame_duration)
         self.silence_timeout = silence_timeout
+        self.voice_activity_detector = voice_activity_detector or VoiceActivityDetector()
+        self.max_speech_frames = int(min(max_speech_seconds, MAX_STREAM_SECONDS) / self.microphone_bus.frame_duration)
+        self.silence_timeout_frames = int(silence_timeout / self.microphone_bus.frame_duration)
+
+        self.encoding = resolve_encoding(encoding)
+        self.bitrate = bitrate
+        self.uplink_kbps = uplink_kbps
 
         self.config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
+            encoding=RECOGNITION_ENCODINGS[self.encoding],
+            sample_rate_hertz=self.microphone_bus.sample_rate,
             language_code=self.language,
         )
 
@@ -34,72 +126,299 @@ class SpeechRecognition:
         )
 
         self.stop_recording = False
+        self.last_confidence = None
+        self.last_audio_seconds = 0.0
+        self._armed_session = None
+        self._session_lock = threading.Lock()
 
-    def _callback(self, in_data, frame_count, time_info, status):
-        """Speichert eingehende Audiodaten in der Warteschlange."""
-        self.audio_queue.put(in_data)
-        return None, pyaudio.paContinue
+        # Optionaler Callback (z. B. für spekulative LLM-Anfragen); läuft in einem Timer-Thread
+        self.interim_stable_ms = interim_stable_ms
+        self.on_stable_interim = None
+        self._interim_timer = None
 
-    def _generate_audio(self):
-        """Sendet Audiodaten an Google Speech API."""
-        while not self.stop_recording:
-            # Versuche Daten aus der Queue zu holen mit Timeout
-            try:
-                data = self.audio_queue.get(timeout=0.5)
+    @staticmethod
+    def _create_client():
+        """SpeechClient auf einem Kanal mit Keepalive, der über alle Anfragen bestehen bleibt."""
+        channel = SpeechGrpcTransport.create_channel(options=CHANNEL_OPTIONS)
+        return speech.SpeechClient(transport=SpeechGrpcTransport(channel=channel))
+
+    def warm_up(self, timeout=5):
+        """Baut die Verbindung (DNS, TCP, TLS) vor dem ersten Wake-Word auf."""
+        transport = getattr(self.client, "transport", None)
+        channel = getattr(transport, "grpc_channel", None)
+        if channel is None:
+            return
+
+        started = time.perf_counter()
+        try:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            self.logger.info("🔌 Speech-Kanal bereit nach %.0f ms", (time.perf_counter() - started) * 1000)
+        except grpc.FutureTimeoutError:
+            self.logger.warning("⚠️ Speech-Kanal nach %s s nicht bereit", timeout)
+
+    def arm(self, start_frame=None):
+        """Öffnet den Streaming-Aufruf sofort, z. B. direkt beim Wake-Word.
+
+        record_user_prompt übernimmt den Stream anschließend ohne Aufbaukosten.
+        Ein nicht abgeholter Stream endet über das Anfangs-Timeout der VAD.
+        """
+        with self._session_lock:
+            self.stop_recording = False
+            self.last_audio_seconds = 0.0
+            start_frame = self._preroll_start_frame(start_frame)
+            subscription = self.microphone_bus.subscribe("stt", start_frame=start_frame)
+
+            preroll_ms = round(subscription.pending_frames * self.microphone_bus.frame_duration * 1000)
+            latency_tracer.annotate("stt_preroll_ms", preroll_ms)
+
+            self._armed_session = StreamingSession(self, subscription)
+            return self._armed_session
+
+    def _take_session(self, start_frame):
+        """Übernimmt den vorab geöffneten Stream oder öffnet einen neuen."""
+        with self._session_lock:
+            session, self._armed_session = self._armed_session, None
+
+        latency_tracer.annotate("stt_prearmed", session is not None)
+        if session is None:
+            session = self.arm(start_frame)
+            self._armed_session = None
+        return session
+
+    def _encoded_requests(self, chunks):
+        """Kodiert die PCM-Blöcke eines Generators und verpackt sie als Streaming-Requests.
+
+        Der Encoder puffert intern ein paar Millisekunden; sein Rest wird beim
+        Half-Close nachgeschoben und die dafür nötige Zeit als Span erfasst.
+        """
+        encoder = StreamingAudioEncoder(self.encoding, self.microphone_bus.sample_rate, self.bitrate)
+        try:
+            for pcm in chunks:
+                self.last_audio_seconds += pcm.size / self.microphone_bus.sample_rate
+                if data := encoder.encode(pcm):
+                    yield speech.StreamingRecognizeRequest(audio_content=data)
+
+            started = time.perf_counter()
+            if data := encoder.close():
                 yield speech.StreamingRecognizeRequest(audio_content=data)
-            except queue.Empty:
-                # Queue ist leer, prüfe ob Aufnahme beendet werden soll
+            if encoder.encoding != "linear16":
+                latency_tracer.record_span("stt_encoder_flush", started)
+        finally:
+            # Auch bei abgebrochenem Stream den ffmpeg-Prozess beenden
+            encoder.close()
+            self._record_upload(encoder)
+
+    def _record_upload(self, encoder):
+        """Hält die Datenmenge des Uploads (und ggf. die gesparte Upload-Zeit) in den Turn-Metriken fest."""
+        latency_tracer.annotate("stt_encoding", encoder.encoding)
+        latency_tracer.annotate("stt_bytes_raw", encoder.bytes_in)
+        latency_tracer.annotate("stt_bytes_sent", encoder.bytes_out)
+        if self.uplink_kbps:
+            saved_bits = (encoder.bytes_in - encoder.bytes_out) * 8
+            latency_tracer.annotate("stt_upload_saved_ms", round(saved_bits / self.uplink_kbps))
+
+    def _generate_audio(self, subscription):
+        """Liefert PCM-Blöcke vom Mikrofon-Bus für die Google Speech API.
+
+        Die lokale VAD beendet den Request-Stream (Half-Close), sobald die Sprache
+        endet; Google liefert dann sofort das finale Ergebnis, statt auf eigenes
+        Endpointing oder das Timeout zu warten.
+        """
+        endpointer = self.voice_activity_detector.endpointer(self.microphone_bus.frame_duration)
+
+        while not self.stop_recording:
+            # Mehrere Bus-Frames zu einem Request bündeln, mit Timeout für die Abbruchprüfung.
+            # Der Pre-Roll liegt bereits komplett vor und geht in maximal großen Requests raus.
+            pcm = subscription.read_pcm(
+                timeout=0.5,
+                min_frames=self.frames_per_request,
+                max_frames=self.max_frames_per_request
+            )
+            if not pcm.size:
                 continue
 
-    def _stop_recording(self):
+            yield pcm
+
+            if endpointer.process(pcm.reshape(-1, self.microphone_bus.frame_length)):
+                latency_tracer.mark("vad_end_of_speech")
+                print("🔇 Sprachende erkannt, Stream wird geschlossen.")
+                return
+
+            if not endpointer.speech_started and endpointer.frames_seen >= self.silence_timeout_frames:
+                print("⏳ Keine Sprache erkannt, Aufnahme wird gestoppt.")
+                return
+
+            if endpointer.frames_seen >= self.max_speech_frames:
+                print("⏳ Maximale Aufnahmedauer erreicht.")
+                return
+
+    def _generate_dictation_audio(self, subscription, rotate, max_silence_frames):
+        """PCM-Generator für das Diktat: ohne Endpointing, Pausen gehören dazu.
+
+        Endet bei Rotation, an der Stream-Obergrenze oder nach ``max_silence_frames``
+        Stille am Stück (dann ist das Diktat vorbei).
         """
-        Hilfsmethode, die vom Timer aufgerufen wird, um die Aufnahme zu stoppen
+        detector = self.voice_activity_detector
+        max_stream_frames = int(MAX_STREAM_SECONDS / self.microphone_bus.frame_duration)
+        frames_sent = 0
+        silent_frames = 0
+
+        while not self.stop_recording and not rotate.is_set():
+            pcm = subscription.read_pcm(
+                timeout=0.5,
+                min_frames=self.frames_per_request,
+                max_frames=self.max_frames_per_request
+            )
+            if not pcm.size:
+                continue
+
+            yield pcm
+
+            levels = detector.levels_dbfs(pcm.reshape(-1, self.microphone_bus.frame_length))
+            frames_sent += len(levels)
+            for level in levels:
+                silent_frames = silent_frames + 1 if level <= detector.end_threshold else 0
+            detector.update_noise_floor(levels[levels <= detector.start_threshold])
+
+            if silent_frames >= max_silence_frames:
+                print("⏳ Lange Stille, Diktat wird beendet.")
+                self.stop_recording = True
+                return
+
+            if frames_sent >= max_stream_frames:
+                return
+
+    def dictate(self, on_segment, start_frame=None, max_silence_seconds=20,
+                rotate_seconds=DICTATION_ROTATE_SECONDS, overlap_seconds=1.0):
+        """Langes Diktat über beliebig viele Streams; jedes finale Segment geht an ``on_segment``.
+
+        Nach ``rotate_seconds`` wird am nächsten finalen Ergebnis gewechselt: Der neue
+        Stream beginnt exakt am Ende dieses Ergebnisses (result_end_time) und wird
+        geöffnet, bevor der alte ausläuft. Erreicht ein Stream ohne finales Ergebnis die
+        Obergrenze, beginnt der nächste ``overlap_seconds`` früher und die doppelten
+        Wörter werden beim Zusammensetzen entfernt.
+
+        Endet mit cancel() oder nach ``max_silence_seconds`` Stille.
         """
-        print("⏳ Keine Sprache erkannt, Aufnahme wird gestoppt (initiales Timeout).")
+        self.stop_recording = False
+        frame_duration = self.microphone_bus.frame_duration
+        max_silence_frames = int(max_silence_seconds / frame_duration)
+        stream_start = self._preroll_start_frame(start_frame)
+        overlap_text = None
+        errors = 0
+
+        while not self.stop_recording:
+            rotate = threading.Event()
+            subscription = self.microphone_bus.subscribe("dictation", start_frame=stream_start)
+            session = StreamingSession(
+                self, subscription,
+                self._encoded_requests(self._generate_dictation_audio(subscription, rotate, max_silence_frames))
+            )
+            opened = time.monotonic()
+            next_start = None
+            last_text = ""
+
+            try:
+                for response in session:
+                    for result in response.results:
+                        if not result.is_final:
+                            continue
+
+                        text = result.alternatives[0].transcript.strip()
+                        if overlap_text is not None:
+                            # Wörter aus der Überlappung mit dem vorherigen Stream entfernen
+                            stitched = stitch_transcripts([overlap_text, text])
+                            text = " ".join(stitched.split()[len(overlap_text.split()):])
+                            overlap_text = None
+
+                        if text:
+                            last_text = text
+                            on_segment(text)
+
+                        end_time = getattr(result, "result_end_time", None)
+                        if time.monotonic() - opened >= rotate_seconds and end_time is not None:
+                            next_start = stream_start + int(end_time.total_seconds() / frame_duration)
+                            break
+
+                    if next_start is not None:
+                        # Der alte Stream läuft im Hintergrund aus, seine Ergebnisse werden verworfen
+                        rotate.set()
+                        print("🔁 Neuer Diktat-Stream ab Satzende")
+                        break
+                errors = 0
+            except Exception as e:
+                errors += 1
+                self.logger.error("❌ Fehler im Diktat-Stream (%d): %s", errors, e)
+                if errors >= 3:
+                    break
+
+            if next_start is None:
+                # Obergrenze oder Fehler: mit Überlappung ab dem zuletzt gesendeten Frame weiter
+                next_start = subscription.cursor - int(overlap_seconds / frame_duration)
+                overlap_text = last_text or None
+
+            stream_start = max(next_start, self.microphone_bus.ring_buffer.oldest_index)
+
+    def cancel(self):
+        """Beendet eine laufende Aufnahme, z. B. wenn ein lokaler Befehl erkannt wurde."""
         self.stop_recording = True
 
-    def record_user_prompt(self):
+    def _on_interim(self, transcript):
+        """Startet die Stabilitätsfrist für ein Zwischenergebnis neu."""
+        self._cancel_interim_timer()
+        if self.on_stable_interim is None or not transcript.strip():
+            return
+
+        self._interim_timer = threading.Timer(
+            self.interim_stable_ms / 1000, self.on_stable_interim, args=(transcript.strip(),)
+        )
+        self._interim_timer.daemon = True
+        self._interim_timer.start()
+
+    def _cancel_interim_timer(self):
+        if self._interim_timer is not None:
+            self._interim_timer.cancel()
+            self._interim_timer = None
+
+    def _preroll_start_frame(self, start_frame):
+        """Begrenzt den gewünschten Startframe auf das Pre-Roll-Fenster."""
+        current_frame = self.microphone_bus.ring_buffer.write_index
+        if start_frame is None:
+            return current_frame
+        return max(start_frame, current_frame - self.preroll_frames)
+
+    def record_user_prompt(self, start_frame=None):
         """
         Startet die Sprachaufnahme und gibt das endgültige Transkript zurück.
 
+        :param start_frame: Bus-Frame, ab dem gesendet wird (z. B. direkt nach dem Wake-Word).
+            Bereits gepufferte Frames werden als Pre-Roll zuerst übertragen. Wurde der Stream
+            mit arm() schon geöffnet, wird dieser übernommen.
         :return: String mit dem erkannten Text.
         """
-        self.stop_recording = False
-        p = pyaudio.PyAudio()
-        stream = p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            frames_per_buffer=int(16000 / 10),
-            stream_callback=self._callback,
-        )
+        session = self._take_session(start_frame)
+        self.last_confidence = None
 
         print("🎤 Starte Aufnahme... Sprich jetzt!")
 
-        # Starte einen Timer, der nach dem Timeout die Aufnahme abbricht
-        initial_timeout = threading.Timer(self.silence_timeout, self._stop_recording)
-        initial_timeout.start()
-
         final_transcript = ""
         
         try:
-            # Starte die Spracherkennung
-            responses = self.client.streaming_recognize(self.streaming_config, self._generate_audio())
-            
-            last_speech_time = time.time()
-
-            for response in responses:
-                # Wenn der Timer noch läuft, stoppe ihn, da wir jetzt in der Schleife sind
-                if initial_timeout.is_alive():
-                    initial_timeout.cancel()
-                
+            # Anfangs-Timeout, Sprachende und Maximaldauer erkennt die lokale VAD im Request-Generator
+            for response in session:
                 if not response.results:
                     continue
 
+                if not any(result.is_final for result in response.results):
+                    # Zwischenergebnisse ergeben aneinandergereiht die aktuelle Hypothese
+                    self._on_interim("".join(result.alternatives[0].transcript for result in response.results))
+                    continue
+
                 for result in response.results:
                     if result.is_final:
+                        latency_tracer.mark("stt_final")
                         transcript = result.alternatives[0].transcript
+                        self.last_confidence = result.alternatives[0].confidence
                         print(f"📝 Finale Transkription: {transcript}")
                         final_transcript += transcript + " "
                         self.stop_recording = True  # Stoppen, sobald finale Transkription erkannt wurde
@@ -107,22 +426,10 @@ class SpeechRecognition:
 
                 if self.stop_recording:
                     break  # Beende die äußere Schleife direkt
-
-                # Falls keine finale Transkription kommt, checke den Timeout
-                if time.time() - last_speech_time > self.silence_timeout:
-                    print("⏳ Keine Sprache erkannt, Aufnahme wird gestoppt.")
-                    self.stop_recording = True
-                    break
         except Exception as e:
             print(f"Fehler während der Spracherkennung: {e}")
         finally:
-            # Stelle sicher, dass der Timer gestoppt wird
-            if initial_timeout.is_alive():
-                initial_timeout.cancel()
-            
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
+            self._cancel_interim_timer()
 
         return final_transcript.strip()
 
@@ -1,9 +1,74 @@
+import argparse
 import os
 import random
 from openai import OpenAI
 
+# Verzeichnis, aus dem SoundPlayer/StandardPhrasePlayer die Phrasen laden
+TTS_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_output")
+
+# Vorab gerenderte Standardphrasen je Kategorie; Datei i heißt tts_<Kategorie>_<i>.mp3
+STANDARD_PHRASES = {
+    # Clipboard
+    "clipboard": [
+        "Selbstverständlich. Text in Zwischenablage kopiert.",
+        "Bestätigung: Inhalt zur Zwischenablage hinzugefügt.",
+        "Verstanden. Die Informationen wurden zum temporären Speicherort transferiert.",
+        "Anfrage bearbeitet: Die Zwischenablage wurde mit dem gewünschten Text aktualisiert.",
+        "Verstanden. Die Textdaten sind nun für weitere Operationen im Zwischenspeicher verfügbar.",
+    ],
+    # TODO: Elemente
+    "todo": [
+        "Zustimmung. Das angegebene TODO-Element ist nun in der Datenbank hinterlegt.",
+        "Operation erfolgreich: Das TODO wurde dem Verzeichnis der ausstehenden Aufgaben hinzugefügt.",
+        "Die Speicherung des TODO-Elements wurde abgeschlossen. Die Aufgabe ist nun in Ihrem persönlichen Aufgabenbereich verfügbar",
+        "Bestätigung: Das neue TODO-Element wurde erfolgreich in das System integriert.",
+    ],
+    # Second Brain
+    "second_brain": [
+        "Selbstverständlich. Die Informationen wurden in Ihrem Second Brain archiviert.",
+        "Bestätigung: Das Element wurde erfolgreich in Ihr Wissensmanagement-System integriert.",
+        "Operation erfolgreich: Der Eintrag wurde Ihrer persönlichen Wissensdatenbank hinzugefügt.",
+        "Anfrage bearbeitet: Das selektierte Material wurde in Ihr persönliches Wissensarchiv einsortiert.",
+    ],
+    # Ideen
+    "ideen": [
+        "Selbstverständlich. Ihre Idee wurde in der Datenbank für zukünftige Referenz gesichert.",
+        "Operation erfolgreich: Der Ideeneintrag wurde Ihrer Sammlung kreativer Konzepte hinzugefügt.",
+        "Eintragung bestätigt. Das Ideen-Element wurde Ihrem persönlichen Ideenarchiv hinzugefügt und zur Analyse vorbereitet.",
+        "Gemäß Ihrer Eingabe wurde der Ideenvorschlag in das System für Ideengenerierung und -management transferiert.",
+    ],
+    # Pomodoro (lokale Befehle)
+    "pomodoro_start": [
+        "Verstanden. Der Pomodoro-Timer läuft.",
+        "Fokuszeit beginnt jetzt.",
+        "Pomodoro gestartet. Viel Erfolg.",
+        "Timer aktiviert. Konzentrationsphase läuft.",
+    ],
+    "pomodoro_stop": [
+        "Pomodoro-Timer gestoppt.",
+        "Verstanden. Der Timer wurde beendet.",
+        "Fokusphase abgebrochen.",
+        "Timer deaktiviert.",
+    ],
+    # Diktatmodus (DictationMode)
+    "dictation_stop": [
+        "Diktat beendet und in Notion gespeichert.",
+        "Alles notiert.",
+        "Fertig, der Text liegt in deiner Zwischenablage.",
+        "Diktat gespeichert.",
+    ],
+    # Überbrückung, wenn die Antwort länger dauert (LatencyMasker)
+    "thinking": [
+        "Einen Moment.",
+        "Ich schaue kurz nach.",
+        "Mal sehen.",
+        "Sekunde, ich kümmere mich darum.",
+    ],
+}
+
+
 class StandardPhraseGenerator:
-    def __init__(self, voice="nova", output_dir="tts_output"):
+    def __init__(self, voice="nova", output_dir=TTS_OUTPUT_DIR):
         """Initialisiert den TTS-Dateigenerator mit OpenAI API und definiert das Ausgabe-Verzeichnis."""
         self.openai = OpenAI()
         self.voice = voice
@@ -11,8 +76,11 @@ class StandardPhraseGenerator:
         
         os.makedirs(self.output_dir, exist_ok=True)
     
-    def generate_speech_file(self, text, category="general", file_format="mp3"):
-        """Erstellt eine Sprachdatei aus dem gegebenen Text und speichert sie im entsprechenden Unterordner."""
+    def generate_speech_file(self, text, category="general", file_format="mp3", index=None):
+        """Erstellt eine Sprachdatei aus dem gegebenen Text und speichert sie im entsprechenden Unterordner.
+
+        :param index: Feste Dateinummer; ohne Angabe die nächste freie
+        """
         if not text.strip():
             raise ValueError("Der eingegebene Text ist leer.")
         
@@ -20,8 +88,9 @@ class StandardPhraseGenerator:
             category_dir = os.path.join(self.output_dir, category)
             os.makedirs(category_dir, exist_ok=True)
             
-            existing_files = [f for f in os.listdir(category_dir) if f.endswith(f".{file_format}")]
-            index = len(existing_files) + 1
+            if index is None:
+                existing_files = [f for f in os.listdir(category_dir) if f.endswith(f".{file_format}")]
+                index = len(existing_files) + 1
             file_name = f"tts_{category}_{index}.{file_format}"
             file_path = os.path.join(category_dir, file_name)
             
@@ -55,31 +124,41 @@ class StandardPhraseGenerator:
 
         return os.path.join(category_dir, random.choice(files))
 
+    def generate_missing(self, category):
+        """Rendert die Phrasen einer Kategorie aus STANDARD_PHRASES, deren Datei noch fehlt.
 
-if __name__ == "__main__":
-    tts = StandardPhraseGenerator()
+        Die Dateinummer entspricht der Position in der Liste; vorhandene Dateien
+        bleiben unverändert, ein erneuter Aufruf erzeugt also keine Duplikate.
+        """
+        created = []
+        for index, text in enumerate(STANDARD_PHRASES[category], start=1):
+            file_path = os.path.join(self.output_dir, category, f"tts_{category}_{index}.mp3")
+            if not os.path.exists(file_path) and self.generate_speech_file(text, category, index=index):
+                created.append(file_path)
+        return created
 
-    # Clipboard
-    tts.generate_speech_file("Selbstverständlich. Text in Zwischenablage kopiert.", category="clipboard")
-    tts.generate_speech_file("Bestätigung: Inhalt zur Zwischenablage hinzugefügt.", category="clipboard")
-    tts.generate_speech_file("Verstanden. Die Informationen wurden zum temporären Speicherort transferiert.", category="clipboard")
-    tts.generate_speech_file("Anfrage bearbeitet: Die Zwischenablage wurde mit dem gewünschten Text aktualisiert.", category="clipboard")
-    tts.generate_speech_file("Verstanden. Die Textdaten sind nun für weitere Operationen im Zwischenspeicher verfügbar.", category="clipboard")
 
-    # TODO: Elemente
-    tts.generate_speech_file("Zustimmung. Das angegebene TODO-Element ist nun in der Datenbank hinterlegt.", category="todo")
-    tts.generate_speech_file("Operation erfolgreich: Das TODO wurde dem Verzeichnis der ausstehenden Aufgaben hinzugefügt.", category="todo")
-    tts.generate_speech_file("Die Speicherung des TODO-Elements wurde abgeschlossen. Die Aufgabe ist nun in Ihrem persönlichen Aufgabenbereich verfügbar", category="todo")
-    tts.generate_speech_file("Bestätigung: Das neue TODO-Element wurde erfolgreich in das System integriert.", category="todo")
+def missing_categories(output_dir=TTS_OUTPUT_DIR):
+    """Kategorien aus STANDARD_PHRASES, für die noch keine einzige Datei existiert."""
+    return [
+        category for category in STANDARD_PHRASES
+        if not os.path.isdir(os.path.join(output_dir, category))
+        or not any(f.endswith(".mp3") for f in os.listdir(os.path.join(output_dir, category)))
+    ]
 
-    # Second Brain
-    tts.generate_speech_file("Selbstverständlich. Die Informationen wurden in Ihrem Second Brain archiviert.", category="second_brain")
-    tts.generate_speech_file("Bestätigung: Das Element wurde erfolgreich in Ihr Wissensmanagement-System integriert.", category="second_brain")
-    tts.generate_speech_file("Operation erfolgreich: Der Eintrag wurde Ihrer persönlichen Wissensdatenbank hinzugefügt.", category="second_brain")
-    tts.generate_speech_file("Anfrage bearbeitet: Das selektierte Material wurde in Ihr persönliches Wissensarchiv einsortiert.", category="second_brain")
 
-    # Ideen
-    tts.generate_speech_file("Selbstverständlich. Ihre Idee wurde in der Datenbank für zukünftige Referenz gesichert.", category="ideen")
-    tts.generate_speech_file("Operation erfolgreich: Der Ideeneintrag wurde Ihrer Sammlung kreativer Konzepte hinzugefügt.", category="ideen")
-    tts.generate_speech_file("Eintragung bestätigt. Das Ideen-Element wurde Ihrem persönlichen Ideenarchiv hinzugefügt und zur Analyse vorbereitet.", category="ideen")
-    tts.generate_speech_file("Gemäß Ihrer Eingabe wurde der Ideenvorschlag in das System für Ideengenerierung und -management transferiert.", category="ideen")
+if __name__ == "__main__":
+    # python -m audio.standard_phrase_generator            -> nur Kategorien ohne Dateien (z. B. neue)
+    # python -m audio.standard_phrase_generator thinking   -> fehlende Dateien dieser Kategorien
+    parser = argparse.ArgumentParser(description="Standardphrasen per OpenAI TTS vorab rendern.")
+    parser.add_argument("categories", nargs="*",
+                        help="Kategorien, deren fehlende Dateien erzeugt werden (Standard: alle ohne Dateien).")
+    args = parser.parse_args()
+
+    unknown = [category for category in args.categories if category not in STANDARD_PHRASES]
+    if unknown:
+        parser.error(f"Unbekannte Kategorien: {', '.join(unknown)} (verfügbar: {', '.join(STANDARD_PHRASES)})")
+
+    tts = StandardPhraseGenerator()
+    for category in args.categories or missing_categories(tts.output_dir):
+        print(f"🎙 {category}: {len(tts.generate_missing(category))} Dateien erzeugt")
@@ -1,5 +1,9 @@
+import glob
+import logging
+import os
 import random
 from audio.sound_player import SoundPlayer
+from audio.standard_phrase_generator import STANDARD_PHRASES, TTS_OUTPUT_DIR
 
 class StandardPhrasePlayer:
     @staticmethod
@@ -9,7 +13,24 @@ class StandardPhrasePlayer:
         audio_path = template.replace("x", str(random_index))
         sound_player = SoundPlayer(audio_path)
         sound_player.play_audio()
-        
+
+    @staticmethod
+    def play_phrase(category: str, voice_generator=None):
+        """Spielt eine vorab gerenderte Phrase der Kategorie ab.
+
+        Fehlen die Dateien (noch nicht mit standard_phrase_generator erzeugt), wird
+        ein Text aus STANDARD_PHRASES über den VoiceGenerator gesprochen.
+        """
+        files = glob.glob(os.path.join(TTS_OUTPUT_DIR, category, f"tts_{category}_*.mp3"))
+        if files:
+            SoundPlayer(random.choice(files)).play_audio()
+            return
+
+        if voice_generator is None:
+            logging.getLogger("StandardPhrasePlayer").warning("⚠️ Keine Phrasen für '%s' vorhanden", category)
+            return
+        voice_generator.speak(random.choice(STANDARD_PHRASES[category]))
+
     @staticmethod
     def play_volume_audio(volume: int):
         """
@@ -0,0 +1,136 @@
+import time
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Energiebasierte Sprachaktivitätserkennung auf Frames des MicrophoneBus.
+
+    Die Pegel werden für alle Frames eines Lesevorgangs auf einmal berechnet
+    (numpy, ein RMS pro Zeile). Die Schwellen folgen dem Rauschboden des Raums:
+    Sprache beginnt ``start_margin_db`` über dem Rauschboden und endet erst,
+    wenn der Pegel unter ``end_margin_db`` darüber fällt (Hysterese).
+    ``threshold_dbfs`` ist die absolute Untergrenze für sehr leise Räume.
+    """
+
+    def __init__(self, threshold_dbfs=-45.0, min_speech_ms=90, start_margin_db=10.0, end_margin_db=6.0,
+                 end_silence_ms=600, noise_floor_dbfs=-60.0, noise_adaptation=0.05):
+        """
+        :param threshold_dbfs: Absolute Mindestschwelle in dBFS für den Sprachbeginn
+        :param min_speech_ms: Mindestdauer zusammenhängender Sprache für einen Sprachbeginn
+        :param start_margin_db: Abstand zum Rauschboden, ab dem ein Frame Sprache ist
+        :param end_margin_db: Abstand zum Rauschboden, unter dem ein Frame wieder Stille ist
+        :param end_silence_ms: Stille nach Sprache, ab der die Äußerung als beendet gilt
+        :param noise_floor_dbfs: Startwert des Rauschbodens
+        :param noise_adaptation: Anpassungsrate des Rauschbodens nach oben (nach unten sofort)
+        """
+        self.threshold_dbfs = threshold_dbfs
+        self.min_speech_ms = min_speech_ms
+        self.start_margin_db = start_margin_db
+        self.end_margin_db = end_margin_db
+        self.end_silence_ms = end_silence_ms
+        self.noise_floor_dbfs = noise_floor_dbfs
+        self.noise_adaptation = noise_adaptation
+
+    @staticmethod
+    def levels_dbfs(frames):
+        """RMS-Pegel je Frame in dBFS für ein 2D-Array der Form (n, frame_length)."""
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, np.shape(frames)[-1])
+        rms = np.sqrt(np.mean(np.square(frames), axis=1)) / 32768
+        return 20 * np.log10(np.maximum(rms, 1e-10))
+
+    @classmethod
+    def frame_dbfs(cls, pcm):
+        """RMS-Pegel eines einzelnen int16-Frames in dBFS."""
+        return float(cls.levels_dbfs(pcm)[0])
+
+    @property
+    def start_threshold(self):
+        return max(self.threshold_dbfs, self.noise_floor_dbfs + self.start_margin_db)
+
+    @property
+    def end_threshold(self):
+        return self.start_threshold - (self.start_margin_db - self.end_margin_db)
+
+    def is_speech(self, pcm):
+        return self.frame_dbfs(pcm) > self.start_threshold
+
+    def update_noise_floor(self, levels):
+        """Führt den Rauschboden mit Pegeln von Frames ohne Sprache nach."""
+        if len(levels) == 0:
+            return
+        level = float(np.median(levels))
+        if level < self.noise_floor_dbfs:
+            self.noise_floor_dbfs = level
+        else:
+            # Anpassungsrate gilt pro Frame, unabhängig davon, wie viele Frames ein Aufruf bringt
+            rate = 1 - (1 - self.noise_adaptation) ** len(levels)
+            self.noise_floor_dbfs += rate * (level - self.noise_floor_dbfs)
+
+    def endpointer(self, frame_duration):
+        """Neuer Zustand für eine Äußerung (Sprachbeginn und -ende)."""
+        return SpeechEndpointer(self, frame_duration)
+
+    def wait_for_speech(self, subscription, timeout):
+        """Liest vom Bus, bis Sprache beginnt oder das Timeout abläuft.
+
+        :return: Absoluter Frame-Index des Sprachbeginns oder None
+        """
+        endpointer = self.endpointer(subscription.bus.frame_duration)
+        deadline = time.monotonic() + timeout
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            frames = subscription.read(timeout=min(remaining, 0.1))
+            if not frames:
+                continue
+
+            # Frames, die wegen Rückstands verworfen wurden, zählen nicht mit
+            first_index = subscription.cursor - len(frames) - endpointer.frames_seen
+            endpointer.process(np.stack(frames))
+            if endpointer.speech_started:
+                return first_index + endpointer.speech_start_frame
+
+        return None
+
+
+class SpeechEndpointer:
+    """Erkennt Sprachbeginn und Sprachende auf aufeinanderfolgenden Frames einer Äußerung."""
+
+    def __init__(self, detector, frame_duration):
+        self.detector = detector
+        self.min_speech_frames = max(1, round(detector.min_speech_ms / 1000 / frame_duration))
+        self.end_silence_frames = max(1, round(detector.end_silence_ms / 1000 / frame_duration))
+
+        self.frames_seen = 0
+        self.speech_started = False
+        self.speech_ended = False
+        self.speech_start_frame = None
+        self.speech_end_frame = None
+        self._onset_frames = 0
+        self._silence_frames = 0
+
+    def process(self, frames):
+        """Verarbeitet ein 2D-Array (n, frame_length) und gibt True zurück, sobald die Sprache endet."""
+        levels = self.detector.levels_dbfs(frames)
+        start_threshold = self.detector.start_threshold
+        end_threshold = self.detector.end_threshold
+
+        for level in levels:
+            self.frames_seen += 1
+            if self.speech_ended:
+                continue
+
+            if not self.speech_started:
+                self._onset_frames = self._onset_frames + 1 if level > start_threshold else 0
+                if self._onset_frames >= self.min_speech_frames:
+                    self.speech_started = True
+                    self.speech_start_frame = self.frames_seen - self._onset_frames
+                continue
+
+            self._silence_frames = 0 if level > end_threshold else self._silence_frames + 1
+            if self._silence_frames >= self.end_silence_frames:
+                self.speech_ended = True
+                self.speech_end_frame = self.frames_seen - self._silence_frames
+
+        # Nur Frames unterhalb der Sprachschwelle beschreiben den Raum
+        self.detector.update_noise_floor(levels[levels <= start_threshold])
+        return self.speech_ended
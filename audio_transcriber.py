@@ -1,23 +1,196 @@
+import io
+import logging
+import re
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
+from pydub import AudioSegment
+from audio.speech_to_text.audio_encoder import resolve_encoding
+
+# Upload-Kodierung (wie STT_ENCODING bei Google) -> (Containerformat, ffmpeg-Codec)
+UPLOAD_FORMATS = {
+    "linear16": ("wav", None),
+    "flac": ("flac", "flac"),
+    "ogg_opus": ("ogg", "libopus"),
+}
+
 
 class AudioTranscriber:
-    def __init__(self):
-        self.openai = OpenAI()
-        
+    def __init__(self, audio_format="ogg", codec="libopus", bitrate="24k", openai_client=None):
+        """
+        :param audio_format: Containerformat für den Upload (z. B. "ogg", "mp3", "flac")
+        :param codec: ffmpeg-Codec für das Format (None = Standard des Formats)
+        :param bitrate: Zielbitrate für verlustbehaftete Formate
+        :param openai_client: Optionaler OpenAI-kompatibler Client (z. B. für Benchmarks)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.openai = openai_client or OpenAI()
+        self.audio_format = audio_format
+        self.codec = codec
+        self.bitrate = bitrate
+        self.audio_seconds_sent = 0.0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+
+    @classmethod
+    def for_encoding(cls, encoding, **kwargs):
+        """Transcriber mit dem Upload-Format zu einer STT-Kodierung ("linear16", "flac", "ogg_opus").
+
+        Ohne ffmpeg wird wie bei Google mit Warnung auf WAV (LINEAR16) zurückgefallen.
+        """
+        audio_format, codec = UPLOAD_FORMATS[resolve_encoding(encoding)]
+        return cls(audio_format=audio_format, codec=codec, **kwargs)
+
     def transcribe_audio(self, filename):
         """Sendet die Audiodatei an OpenAI Whisper API und gibt den erkannten Text zurück"""
         print("📝 Sende Audiodatei an OpenAI...")
-        
+
         try:
             with open(filename, "rb") as audio_file:
                 transcription = self.openai.audio.transcriptions.create(
-                    model="whisper-1", 
+                    model="whisper-1",
                     file=audio_file,
                     response_format="text"
                 )
 
-            return transcription  
-            
+            return transcription
+
+        except Exception as e:
+            print(f"❌ Fehler bei der Transkription: {str(e)}")
+            return None
+
+    def encode_pcm(self, pcm, sample_rate):
+        """Kodiert Mono-int16-PCM im Speicher; ohne ffmpeg als WAV.
+
+        :return: (Dateiname, Bytes) für den Upload
+        """
+        if self.audio_format == "wav":
+            return "speech.wav", self._encode_wav(pcm, sample_rate)
+
+        try:
+            segment = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+            encoded = io.BytesIO()
+            segment.export(encoded, format=self.audio_format, codec=self.codec, bitrate=self.bitrate)
+            return f"speech.{self.audio_format}", encoded.getvalue()
+        except Exception as e:
+            self.logger.warning("⚠️ Kodierung als %s fehlgeschlagen, sende WAV: %s", self.audio_format, e)
+
+        return "speech.wav", self._encode_wav(pcm, sample_rate)
+
+    @staticmethod
+    def _encode_wav(pcm, sample_rate):
+        encoded = io.BytesIO()
+        with wave.open(encoded, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm.tobytes())
+        return encoded.getvalue()
+
+    def transcribe_pcm(self, pcm, sample_rate, prompt=None):
+        """Transkribiert PCM direkt aus dem Speicher, ohne Umweg über eine Datei.
+
+        :param pcm: Mono-int16-Array
+        :param prompt: Vorheriger Text als Kontext (z. B. bei Folgesegmenten)
+        """
+        filename, data = self.encode_pcm(pcm, sample_rate)
+        self.audio_seconds_sent += len(pcm) / sample_rate
+        self.bytes_raw += pcm.nbytes
+        self.bytes_sent += len(data)
+        self.logger.debug("📤 Sende %d Bytes (%s, %.1f s)", len(data), filename, len(pcm) / sample_rate)
+
+        try:
+            kwargs = {"prompt": prompt} if prompt else {}
+            return self.openai.audio.transcriptions.create(
+                model="whisper-1",
+                file=(filename, data),
+                response_format="text",
+                **kwargs
+            ).strip()
+
         except Exception as e:
             print(f"❌ Fehler bei der Transkription: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+
+class IncrementalTranscription:
+    """Transkribiert eine laufende Aufnahme in überlappenden Segmenten.
+
+    Sobald ``segment_seconds`` neues Audio vorliegen, wird das Segment (mit
+    ``overlap_seconds`` Vorlauf) im Hintergrund transkribiert. Nach dem Ende
+    der Aufnahme fehlt nur noch das letzte Teilstück; die Teiltexte werden an
+    der Überlappung zusammengesetzt.
+    """
+
+    def __init__(self, transcriber, audio_buffer, sample_rate, segment_seconds=10.0, overlap_seconds=1.5):
+        """
+        :param transcriber: AudioTranscriber mit transcribe_pcm
+        :param audio_buffer: Aufnahmepuffer (int16), in den die Aufnahme schreibt
+        :param segment_seconds: Länge eines Segments ohne Überlappung
+        :param overlap_seconds: Vorlauf aus dem vorherigen Segment gegen abgeschnittene Wörter
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.transcriber = transcriber
+        self.audio_buffer = audio_buffer
+        self.sample_rate = sample_rate
+        self.segment_samples = int(segment_seconds * sample_rate)
+        self.overlap_samples = int(overlap_seconds * sample_rate)
+
+        self.committed_samples = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = []
+
+    def update(self, length):
+        """Mit der aktuellen Aufnahmelänge aufrufen; startet fällige Segmente."""
+        while length - self.committed_samples >= self.segment_samples:
+            self._submit(self.committed_samples + self.segment_samples)
+
+    def _submit(self, stop):
+        start = max(0, self.committed_samples - self.overlap_samples)
+        # Kopie, da der Puffer für die nächste Aufnahme wiederverwendet wird
+        pcm = self.audio_buffer[start:stop].copy()
+        self._futures.append(self._executor.submit(self.transcriber.transcribe_pcm, pcm, self.sample_rate))
+        self.committed_samples = stop
+
+    def cancel(self):
+        """Verwirft noch nicht gestartete Segmente, z. B. wenn die Aufnahme abgebrochen wurde."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def finish(self, length):
+        """Transkribiert den Rest und liefert den zusammengesetzten Text (None bei Fehlern)."""
+        if length > self.committed_samples:
+            self._submit(length)
+
+        texts = [future.result() for future in self._futures]
+        self._executor.shutdown(wait=False)
+
+        if any(text is None for text in texts):
+            return None
+
+        self.logger.info("🧩 %d Segmente zusammengesetzt", len(texts))
+        return stitch_transcripts(texts)
+
+
+def _normalize_word(word):
+    return re.sub(r"\W", "", word.lower())
+
+
+def stitch_transcripts(texts, max_overlap_words=8):
+    """Setzt Teiltexte zusammen und entfernt Wörter, die durch die Überlappung doppelt sind."""
+    words = []
+
+    for text in texts:
+        new_words = text.split()
+        normalized_tail = [_normalize_word(word) for word in words[-max_overlap_words:]]
+        normalized_new = [_normalize_word(word) for word in new_words[:max_overlap_words]]
+
+        # Längstes Ende des bisherigen Texts, das den Anfang des neuen Segments bildet
+        overlap = 0
+        for size in range(min(len(normalized_tail), len(normalized_new)), 0, -1):
+            if normalized_tail[-size:] == normalized_new[:size]:
+                overlap = size
+                break
+
+        words.extend(new_words[overlap:])
+
+    return " ".join(words)
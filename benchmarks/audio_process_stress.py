@@ -0,0 +1,100 @@
+"""Belastungstest: Mikrofon-Überläufe während schwerer Tool-Arbeit im Hauptprozess.
+
+Parst währenddessen große HTML-Mails mit dem EmailContentParser (wie ein großer
+Gmail-Abruf) in mehreren Threads und vergleicht die Zähler des Wake-Word-Listeners
+mit und ohne separaten Audio-Prozess. Benötigt ein echtes Mikrofon.
+
+    python -m benchmarks.audio_process_stress --seconds 30
+    python -m benchmarks.audio_process_stress --seconds 30 --in-process
+"""
+import argparse
+import base64
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.tools.google.clients.email_content_parser import EmailContentParser
+
+
+def build_email(paragraphs=4000):
+    """Erzeugt eine Gmail-API-Nachricht mit großem HTML-Body."""
+    rows = "".join(
+        f"<tr><td><p style='color:#333'>Absatz {i} mit <a href='https://example.com/{i}'>Link</a></p></td></tr>"
+        for i in range(paragraphs)
+    )
+    html = f"<html><head><style>td {{padding: 2px}}</style></head><body><table>{rows}</table></body></html>"
+    data = base64.urlsafe_b64encode(html.encode("utf-8")).decode("ascii")
+    return {"payload": {"mimeType": "text/html", "body": {"data": data}}}
+
+
+def parse_emails(email, stop_event):
+    parsed = 0
+    while not stop_event.is_set():
+        EmailContentParser.parse_email_content(email)
+        parsed += 1
+    return parsed
+
+
+def run_stress(seconds, in_process, workers):
+    if in_process:
+        from audio.capture.microphone_bus import MicrophoneBus
+        from wakeword_listener import WakeWordListener
+
+        microphone_bus = MicrophoneBus()
+        listener = WakeWordListener(microphone_bus=microphone_bus)
+        close = microphone_bus.close
+    else:
+        from audio.audio_io_process import AudioIOProcess
+
+        audio_process = AudioIOProcess()
+        audio_process.start()
+        listener = audio_process.wakeword_listener
+        close = audio_process.close
+
+    # Porcupine läuft nur, solange jemand auf das Wake-Word wartet
+    threading.Thread(target=listener.listen_for_wakeword, daemon=True).start()
+    listener.resume_listening()
+    time.sleep(1)
+    before = listener.get_stats()
+
+    email = build_email()
+    stop_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_emails, email, stop_event) for _ in range(workers)]
+        time.sleep(seconds)
+        stop_event.set()
+        parsed = sum(future.result() for future in futures)
+
+    after = listener.get_stats()
+    listener.should_stop = True
+    listener.cleanup()
+    close()
+
+    return {
+        "mode": "in-process" if in_process else "audio-process",
+        "emails_parsed": parsed,
+        "input_overflows": after.get("input_overflows", 0) - before.get("input_overflows", 0),
+        "dropped_frames": after.get("dropped_frames", 0) - before.get("dropped_frames", 0),
+        "max_queue_depth": after.get("max_queue_depth"),
+        "p95_processing_ms": after.get("p95_processing_ms"),
+        "max_processing_ms": after.get("max_processing_ms"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mikrofon-Überläufe unter Tool-Last messen.")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--in-process", action="store_true",
+                        help="Audio im Hauptprozess betreiben (Verhalten ohne Audio-Prozess).")
+    args = parser.parse_args()
+
+    result = run_stress(args.seconds, args.in_process, args.workers)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+
+    sys.exit(0 if result["input_overflows"] == 0 and result["dropped_frames"] == 0 else 1)
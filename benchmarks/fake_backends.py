@@ -0,0 +1,197 @@
+import io
+import json
+import time
+import wave
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+
+@dataclass
+class NetworkProfile:
+    """Simulierte Latenzen der externen Dienste in Millisekunden.
+
+    Unbekannte Felder in Szenarien schlagen beim Erzeugen fehl (TypeError), statt
+    stillschweigend ignoriert zu werden.
+    """
+    stt_final_ms: float = 300
+    stt_endpointing_ms: float = 0
+    llm_first_token_ms: float = 400
+    llm_token_interval_ms: float = 25
+    tts_first_byte_ms: float = 350
+    tts_ms_per_char: float = 2
+    speech_ms_per_char: float = 65
+    upload_kbps: float = 2000
+    whisper_base_ms: float = 500
+    whisper_ms_per_audio_second: float = 40
+
+
+def _sleep_ms(milliseconds):
+    if milliseconds > 0:
+        time.sleep(milliseconds / 1000)
+
+
+class FakePorcupine:
+    """Porcupine-Ersatz, der an einer festen Stelle der Aufnahme auslöst."""
+
+    frame_length = 512
+    sample_rate = 16000
+
+    def __init__(self, replay, wake_at_seconds):
+        self.replay = replay
+        self.wake_at_seconds = wake_at_seconds
+        self._fired = False
+
+    def process(self, pcm):
+        if not self._fired and self.replay.position_seconds() >= self.wake_at_seconds:
+            self._fired = True
+            return 0
+        return -1
+
+    def delete(self):
+        pass
+
+
+class FakeSpeechClient:
+    """SpeechClient-Ersatz: liefert das Transkript nach Sprachende plus Netzwerklatenz.
+
+    Zum Sprachende kommt das vollständige Zwischenergebnis; das finale Ergebnis folgt
+    nach ``stt_endpointing_ms`` (Googles eigenes Endpointing) oder sobald der Client
+    den Stream schließt.
+    """
+
+    def __init__(self, replay, transcript, speech_end_seconds, network: NetworkProfile):
+        self.replay = replay
+        self.transcript = transcript
+        self.speech_end_seconds = speech_end_seconds
+        self.network = network
+        self.bytes_received = 0
+
+    def streaming_recognize(self, config, requests):
+        alternative = SimpleNamespace(transcript=self.transcript, confidence=0.95)
+        interim_sent = False
+
+        for request in requests:
+            self.bytes_received += len(request.audio_content)
+            position = self.replay.position_seconds()
+
+            if not interim_sent and position >= self.speech_end_seconds:
+                interim_sent = True
+                yield SimpleNamespace(results=[SimpleNamespace(is_final=False, alternatives=[alternative])])
+
+            if position >= self.speech_end_seconds + self.network.stt_endpointing_ms / 1000:
+                break
+
+        _sleep_ms(self.network.stt_final_ms)
+
+        result = SimpleNamespace(is_final=True, alternatives=[alternative])
+        yield SimpleNamespace(results=[result])
+
+
+class FakeChatStream:
+    """Iterierbarer Stream wie openai.Stream, der Wörter im Token-Takt liefert."""
+
+    def __init__(self, text, network: NetworkProfile, tool_calls=None):
+        """
+        :param tool_calls: Optionale Liste von {"name": ..., "arguments": {...}}; die Argumente
+            kommen wie bei OpenAI in Fragmenten über mehrere Deltas
+        """
+        self.deltas = [SimpleNamespace(content=word + " ", tool_calls=None) for word in text.split()]
+        for index, call in enumerate(tool_calls or []):
+            arguments = json.dumps(call["arguments"])
+            fragments = [arguments[i:i + 8] for i in range(0, len(arguments), 8)]
+            for position, fragment in enumerate(fragments):
+                function = SimpleNamespace(name=call["name"] if position == 0 else None, arguments=fragment)
+                tool_delta = SimpleNamespace(index=index, id=f"call_{index}" if position == 0 else None,
+                                             function=function)
+                self.deltas.append(SimpleNamespace(content=None, tool_calls=[tool_delta]))
+        self.network = network
+        self._closed = False
+
+    def __iter__(self):
+        _sleep_ms(self.network.llm_first_token_ms)
+        for index, delta in enumerate(self.deltas):
+            if self._closed:
+                return
+            if index:
+                _sleep_ms(self.network.llm_token_interval_ms)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)])
+
+    def close(self):
+        self._closed = True
+
+
+class FakeSpeechResponse:
+    """Kontextmanager wie with_streaming_response; der Inhalt kodiert die Sprechdauer."""
+
+    def __init__(self, text, network: NetworkProfile):
+        self.text = text
+        self.network = network
+
+    def __enter__(self):
+        _sleep_ms(self.network.tts_first_byte_ms + self.network.tts_ms_per_char * len(self.text))
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_bytes(self):
+        duration = len(self.text) * self.network.speech_ms_per_char / 1000
+        yield json.dumps({"duration_s": duration}).encode()
+
+
+class FakeOpenAI:
+    """Minimaler OpenAI-Client für Chat-Completions und TTS mit simulierter Latenz."""
+
+    def __init__(self, response_text, network: NetworkProfile, tool_calls=None):
+        """
+        :param tool_calls: Tool-Aufrufe, die die erste Antwort statt Text liefert (siehe FakeChatStream);
+            nach den Tool-Ergebnissen folgt ``response_text``
+        """
+        self.response_text = response_text
+        self.network = network
+        self.tool_calls = tool_calls
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.audio = SimpleNamespace(speech=SimpleNamespace(
+            with_streaming_response=SimpleNamespace(create=self._create_speech)
+        ))
+
+    def _create_completion(self, model, messages, tools=None, stream=False, tool_choice=None, **kwargs):
+        if stream:
+            answered = any(message.get("role") == "tool" for message in messages if isinstance(message, dict))
+            if tools and tool_choice != "none" and self.tool_calls and not answered:
+                return FakeChatStream("", self.network, self.tool_calls)
+            return FakeChatStream(self.response_text, self.network)
+
+        # Ohne Stream kommt die Antwort erst, wenn alle Tokens erzeugt sind
+        tokens = len(self.response_text.split())
+        _sleep_ms(self.network.llm_first_token_ms + self.network.llm_token_interval_ms * max(tokens - 1, 0))
+        message = SimpleNamespace(role="assistant", content=self.response_text, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    def _create_speech(self, model, voice, input, **kwargs):
+        return FakeSpeechResponse(input, self.network)
+
+
+class FakeWhisperClient:
+    """OpenAI-Ersatz für audio.transcriptions: Upload- und Verarbeitungszeit nach NetworkProfile.
+
+    Liefert immer ``transcript`` zurück; taugt daher nur für Latenz und Datenmenge.
+    """
+
+    def __init__(self, transcript, network: NetworkProfile):
+        self.transcript = transcript
+        self.network = network
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create_transcription))
+
+    def _create_transcription(self, model, file, response_format="text", **kwargs):
+        filename, data = file
+        _sleep_ms(len(data) * 8 / self.network.upload_kbps)
+
+        audio_seconds = 0.0
+        if filename.endswith(".wav"):
+            with wave.open(io.BytesIO(data), "rb") as wf:
+                audio_seconds = wf.getnframes() / wf.getframerate()
+
+        _sleep_ms(self.network.whisper_base_ms + self.network.whisper_ms_per_audio_second * audio_seconds)
+        return self.transcript
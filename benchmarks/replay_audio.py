@@ -0,0 +1,120 @@
+import threading
+import time
+import wave
+import numpy as np
+import pyaudio
+
+
+def load_wav_pcm16(path, target_rate=16000):
+    """Liest eine WAV-Datei als Mono-int16 mit der Zielabtastrate (Downmix + lineares Resampling)."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Nur 16-bit WAV wird unterstützt: {path}")
+        channels = wf.getnchannels()
+        source_rate = wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    mono = samples.reshape(-1, channels).mean(axis=1)
+
+    if source_rate != target_rate:
+        duration = len(mono) / source_rate
+        target_positions = np.arange(int(duration * target_rate)) / target_rate
+        source_positions = np.arange(len(mono)) / source_rate
+        mono = np.interp(target_positions, source_positions, mono)
+
+    return np.clip(mono, -32768, 32767).astype(np.int16)
+
+
+class ReplayAudioInterface:
+    """PyAudio-kompatibles Mikrofon, das eine Aufnahme in Echtzeit abspielt.
+
+    Alle geöffneten Streams teilen sich eine Zeitachse, die mit start() beginnt –
+    wie ein echtes Mikrofon, auf das mehrere Verbraucher zugreifen. Nach dem Ende
+    der Aufnahme wird Stille geliefert.
+    """
+
+    def __init__(self, pcm, rate=16000):
+        self.pcm = pcm
+        self.rate = rate
+        self.start_time = None
+        self._streams = []
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def position_seconds(self):
+        """Aktuelle Position auf der Zeitachse der Aufnahme in Sekunden."""
+        if self.start_time is None:
+            return 0.0
+        return time.perf_counter() - self.start_time
+
+    def read_samples(self, start, count):
+        chunk = np.zeros(count, dtype=np.int16)
+        available = self.pcm[start:start + count]
+        chunk[:len(available)] = available
+        return chunk
+
+    def open(self, format=pyaudio.paInt16, channels=1, rate=16000, input=True,
+             frames_per_buffer=1024, stream_callback=None, start=True):
+        if rate != self.rate or channels != 1:
+            raise ValueError("ReplayAudioInterface liefert nur Mono mit der Rate der Aufnahme")
+
+        stream = ReplayStream(self, frames_per_buffer, stream_callback)
+        self._streams.append(stream)
+        if start:
+            stream.start_stream()
+        return stream
+
+    def terminate(self):
+        for stream in self._streams:
+            stream.close()
+        self._streams = []
+
+
+class ReplayStream:
+    """Liefert Frames der Aufnahme im Takt der Echtzeit an den Stream-Callback."""
+
+    def __init__(self, interface, frames_per_buffer, callback):
+        self.interface = interface
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = callback
+        self._running = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def start_stream(self):
+        if self._running.is_set() or self._closed:
+            return
+        if self.interface.start_time is None:
+            self.interface.start()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        frame_duration = self.frames_per_buffer / self.interface.rate
+        # Wie bei einem echten Stream beginnt die Aufnahme bei der aktuellen Position
+        position = int(self.interface.position_seconds() * self.interface.rate)
+
+        while self._running.is_set():
+            due = self.interface.start_time + (position + self.frames_per_buffer) / self.interface.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(min(delay, frame_duration))
+                continue
+
+            chunk = self.interface.read_samples(position, self.frames_per_buffer)
+            position += self.frames_per_buffer
+            self.callback(chunk.tobytes(), self.frames_per_buffer, None, 0)
+
+    def stop_stream(self):
+        self._running.clear()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def close(self):
+        self.stop_stream()
+        self._closed = True
+
+    def is_active(self):
+        return self._running.is_set()
@@ -0,0 +1,181 @@
+"""Offline-Replay-Benchmark für die komplette Sprachpipeline.
+
+Spielt aufgenommene Äußerungen durch Wake-Word, STT, OpenAIChatAssistant und
+TextToSpeechStreamer/VoiceGenerator ab. Alle Netzwerkdienste sowie Mikrofon und
+Lautsprecher werden lokal simuliert, die Latenzen kommen aus dem NetworkProfile
+des Szenarios.
+
+    python -m benchmarks.replay_benchmark benchmarks/scenarios.json
+"""
+import os
+
+# Ohne Audiogerät: pygame (Wake-Sound) auf den Dummy-Treiber umleiten
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from audio.capture.microphone_bus import MicrophoneBus
+from audio.speech_to_text.speech_to_text_recorder import SpeechRecognition
+from benchmarks.fake_backends import FakeOpenAI, FakePorcupine, FakeSpeechClient, NetworkProfile
+from benchmarks.replay_audio import ReplayAudioInterface, load_wav_pcm16
+from chat_assistant import OpenAIChatAssistant
+from text_to_speech_streamer import TextToSpeechStreamer
+from utils.latency_report import load_turns
+from utils.latency_tracer import latency_tracer
+from voice_generator import VoiceGenerator
+from voice_pipeline import VoicePipeline
+from wakeword_listener import WakeWordListener
+
+
+class ReplayVoiceGenerator(VoiceGenerator):
+    """VoiceGenerator ohne Lautsprecher: Wiedergabe wird durch Warten simuliert."""
+
+    def _setup_ffmpeg(self):
+        pass
+
+    def _setup_pygame(self):
+        pass
+
+    def _decode_speech(self, mp3_bytes):
+        return json.loads(mp3_bytes)["duration_s"]
+
+    def _play_audio(self, audio_data, generation):
+        with self._audio_lock:
+            self._notify_playback_started()
+            deadline = time.perf_counter() + audio_data
+            while time.perf_counter() < deadline and generation == self._generation:
+                time.sleep(0.01)
+
+
+class ReplayPipeline(VoicePipeline):
+    """Pipeline, die nach dem ersten abgeschlossenen Durchlauf ein Event setzt."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.turn_finished = asyncio.Event()
+
+    def _finish_turn(self, status="completed"):
+        super()._finish_turn(status)
+        self.turn_finished.set()
+
+
+async def run_scenario(scenario, base_dir, timeout_seconds=60):
+    """Führt ein Szenario aus; der Latenz-Trace landet in latency_tracer.log_file."""
+    network = NetworkProfile(**scenario.get("network", {}))
+    replay = ReplayAudioInterface(load_wav_pcm16(os.path.join(base_dir, scenario["wav"])))
+
+    microphone_bus = MicrophoneBus(frame_length=FakePorcupine.frame_length, audio_interface=replay)
+    microphone_bus.start()
+
+    wakeword_listener = WakeWordListener(
+        porcupine_handle=FakePorcupine(replay, scenario["wake_at_s"]),
+        microphone_bus=microphone_bus
+    )
+    speech_recognition = SpeechRecognition(
+        client=FakeSpeechClient(replay, scenario["transcript"], scenario["speech_end_s"], network),
+        microphone_bus=microphone_bus
+    )
+
+    openai_client = FakeOpenAI(scenario["response_text"], network)
+    voice_generator = ReplayVoiceGenerator(openai_client=openai_client)
+    chat_assistant = OpenAIChatAssistant(openai_client=openai_client, voice_generator=voice_generator, tools=[])
+    if "chunk_sizes" in scenario:
+        chat_assistant.tts_streamer = TextToSpeechStreamer(voice_generator, **scenario["chunk_sizes"])
+
+    pipeline = ReplayPipeline(wakeword_listener, speech_recognition, chat_assistant, **scenario.get("pipeline", {}))
+    run_task = asyncio.create_task(pipeline.run())
+
+    try:
+        await asyncio.wait_for(pipeline.turn_finished.wait(), timeout_seconds)
+    finally:
+        run_task.cancel()
+        await asyncio.gather(run_task, return_exceptions=True)
+        microphone_bus.close()
+        voice_generator.active = False
+
+    return network
+
+
+def evaluate(scenario, turn, network):
+    """Berechnet die Kennzahlen eines Durchlaufs und prüft die Schwellwerte."""
+    spans = {span["name"]: span for span in turn["spans"]}
+    speech_after_wake_ms = (scenario["speech_end_s"] - scenario["wake_at_s"]) * 1000
+
+    first_audio_ms = spans["playback_start"]["end_ms"] if "playback_start" in spans else None
+    result = {
+        "scenario": scenario["name"],
+        "status": turn["status"],
+        "time_to_first_audio_ms": first_audio_ms,
+        "first_audio_after_speech_end_ms": (
+            round(first_audio_ms - speech_after_wake_ms, 1) if first_audio_ms is not None else None
+        ),
+        "total_turn_ms": turn["total_ms"],
+        "network": asdict(network),
+        "failures": [],
+    }
+
+    thresholds = scenario.get("thresholds", {})
+    for metric, limit in thresholds.items():
+        value = result.get(metric)
+        if value is None or value > limit:
+            result["failures"].append(f"{metric}={value} > {limit}")
+
+    return result
+
+
+async def run_benchmark(scenario_file, only=None):
+    with open(scenario_file, encoding="utf-8") as f:
+        scenarios = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(scenario_file))
+    results = []
+
+    for scenario in scenarios:
+        if only and scenario["name"] not in only:
+            continue
+
+        trace_file = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False).name
+        latency_tracer.log_file = trace_file
+        try:
+            network = await run_scenario(scenario, base_dir)
+            turns = load_turns(trace_file, status=None)
+        finally:
+            os.remove(trace_file)
+
+        result = evaluate(scenario, turns[-1], network)
+        results.append(result)
+
+        marker = "❌" if result["failures"] else "✅"
+        print(f"{marker} {result['scenario']:<28} "
+              f"TTFA {result['time_to_first_audio_ms']} ms "
+              f"(nach Sprachende {result['first_audio_after_speech_end_ms']} ms), "
+              f"Gesamt {result['total_turn_ms']} ms")
+        for failure in result["failures"]:
+            print(f"   ↳ Regression: {failure}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline-Replay-Benchmark der Sprachpipeline.")
+    parser.add_argument("scenario_file", nargs="?",
+                        default=os.path.join(os.path.dirname(__file__), "scenarios.json"))
+    parser.add_argument("--only", nargs="*", help="Nur diese Szenarien ausführen.")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben.")
+    args = parser.parse_args()
+
+    benchmark_results = asyncio.run(run_benchmark(args.scenario_file, args.only))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(benchmark_results, f, indent=2)
+
+    sys.exit(1 if any(result["failures"] for result in benchmark_results) else 0)
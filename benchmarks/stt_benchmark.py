@@ -0,0 +1,320 @@
+"""Vergleich der STT-Backends auf einem deutschen Korpus.
+
+Erwartet einen Ordner mit Paaren ``<name>.wav`` und ``<name>.txt`` (Referenztranskript).
+Jede Aufnahme wird in Echtzeit über einen MicrophoneBus abgespielt und durch jedes
+Backend geschickt. Gemessen werden Wortfehlerrate (WER), die Zeit vom Sprachende bis
+zum finalen Transkript und die hochgeladene Datenmenge.
+
+    python -m benchmarks.stt_benchmark corpus/
+    python -m benchmarks.stt_benchmark corpus/ --backends google whisper_incremental
+    python -m benchmarks.stt_benchmark corpus/ --stand-in
+
+Lokale Stand-in-Server statt der Cloud-Dienste:
+``--whisper-base-url http://localhost:8000/v1`` (OpenAI-kompatibler Whisper-Server) und
+``--google-endpoint localhost:50051`` (unverschlüsselter gRPC-Server mit der Speech-API).
+``--stand-in`` simuliert beide Dienste im Prozess (nur Latenz und Datenmenge, keine WER).
+``--encoding flac|ogg_opus`` vergleicht die komprimierte Übertragung mit LINEAR16.
+"""
+import os
+
+# Ohne Audiogerät: pygame auf den Dummy-Treiber umleiten
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import glob
+import json
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from audio.capture.microphone_bus import MicrophoneBus
+from audio.speech_to_text.speech_to_text_recorder import SpeechRecognition
+from audio.voice_activity_detector import VoiceActivityDetector
+from audio_transcriber import UPLOAD_FORMATS, AudioTranscriber
+from benchmarks.fake_backends import FakeSpeechClient, FakeWhisperClient, NetworkProfile
+from benchmarks.replay_audio import ReplayAudioInterface, load_wav_pcm16
+from utils.latency_report import percentile
+
+BACKENDS = ("google", "whisper", "whisper_incremental")
+SAMPLE_RATE = 16000
+LEAD_SILENCE_SECONDS = 0.5
+TAIL_SILENCE_SECONDS = 3.0
+# Upload-Containerformat -> STT-Kodierung, um die tatsächlich gesendete Kodierung zu erfassen
+UPLOAD_ENCODINGS = {audio_format: encoding for encoding, (audio_format, _) in UPLOAD_FORMATS.items()}
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s]", "", (text or "").lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Levenshtein-Distanz auf Wortebene (Ersetzungen + Löschungen + Einfügungen)."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+
+    return previous[-1], len(ref)
+
+
+def detect_speech_end(pcm, frame_length=512, block_frames=3):
+    """Sprachende wie im Live-Betrieb: SpeechEndpointer mit adaptivem Rauschboden.
+
+    Läuft wie die Recorder in ~100-ms-Blöcken über die ganze Aufnahme. Nach jedem
+    Sprachende beginnt ein neuer Endpointer (der Rauschboden bleibt), damit ein
+    Klick am Anfang nicht als Ende der Äußerung gilt; maßgeblich ist das letzte Ende.
+
+    :return: Sprachende in Sekunden oder None, wenn keine Sprache erkannt wurde
+    """
+    detector = VoiceActivityDetector()
+    frame_duration = frame_length / SAMPLE_RATE
+    frames = pcm[:len(pcm) - len(pcm) % frame_length].reshape(-1, frame_length)
+
+    endpointer = detector.endpointer(frame_duration)
+    offset = 0
+    speech_end_frame = None
+    for start in range(0, len(frames), block_frames):
+        if endpointer.process(frames[start:start + block_frames]):
+            speech_end_frame = offset + endpointer.speech_end_frame
+            offset += endpointer.frames_seen
+            endpointer = detector.endpointer(frame_duration)
+
+    return speech_end_frame * frame_duration if speech_end_frame is not None else None
+
+
+def load_corpus(corpus_dir):
+    """Liest alle WAV/TXT-Paare und bestimmt das Sprachende per VAD."""
+    corpus = []
+
+    for wav_path in sorted(glob.glob(os.path.join(corpus_dir, "*.wav"))):
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(txt_path):
+            print(f"⚠️ Kein Transkript für {wav_path}, übersprungen")
+            continue
+
+        with open(txt_path, encoding="utf-8") as f:
+            reference = f.read().strip()
+
+        lead = np.zeros(int(LEAD_SILENCE_SECONDS * SAMPLE_RATE), dtype=np.int16)
+        tail = np.zeros(int(TAIL_SILENCE_SECONDS * SAMPLE_RATE), dtype=np.int16)
+        speech = load_wav_pcm16(wav_path, SAMPLE_RATE)
+        pcm = np.concatenate([lead, speech, tail])
+
+        speech_end = detect_speech_end(pcm)
+        if speech_end is None:
+            print(f"⚠️ Keine Sprache in {wav_path} erkannt, übersprungen")
+            continue
+
+        corpus.append({
+            "name": os.path.basename(wav_path),
+            "pcm": pcm,
+            "reference": reference,
+            "speech_end_s": speech_end,
+        })
+
+    return corpus
+
+
+class CountingSpeechClient:
+    """Reicht Streaming-Requests an den eigentlichen Client durch und zählt die Bytes."""
+
+    def __init__(self, client):
+        self.client = client
+        self.bytes_uploaded = 0
+
+    def streaming_recognize(self, config, requests):
+        return self.client.streaming_recognize(config, self._count(requests))
+
+    def _count(self, requests):
+        for request in requests:
+            self.bytes_uploaded += len(request.audio_content)
+            yield request
+
+
+class CountingTranscriber(AudioTranscriber):
+    """AudioTranscriber, der Größe und Kodierung jedes Uploads mitzählt."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bytes_uploaded = 0
+        self.encodings_uploaded = set()
+
+    def encode_pcm(self, pcm, sample_rate):
+        # Kann trotz Vorgabe auf WAV zurückfallen (Export fehlgeschlagen); gezählt wird der Dateiname
+        filename, data = super().encode_pcm(pcm, sample_rate)
+        self.bytes_uploaded += len(data)
+        self.encodings_uploaded.add(UPLOAD_ENCODINGS[os.path.splitext(filename)[1][1:]])
+        return filename, data
+
+
+def create_google_client(endpoint):
+    from google.cloud import speech
+    from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+    import grpc
+
+    if endpoint:
+        return speech.SpeechClient(transport=SpeechGrpcTransport(channel=grpc.insecure_channel(endpoint)))
+    return SpeechRecognition._create_client()
+
+
+def run_google(utterance, microphone_bus, replay, options):
+    if options.stand_in:
+        client = FakeSpeechClient(replay, utterance["reference"], utterance["speech_end_s"], options.network)
+    else:
+        client = options.google_client
+
+    counting_client = CountingSpeechClient(client)
+    recognition = SpeechRecognition(client=counting_client, microphone_bus=microphone_bus, encoding=options.encoding)
+    transcript = recognition.record_user_prompt(start_frame=0)
+    return transcript, counting_client.bytes_uploaded, recognition.encoding, recognition.last_audio_seconds
+
+
+def run_whisper(utterance, microphone_bus, replay, options, incremental):
+    from openai import OpenAI
+    from whisper_speech_recognition import WhuisperSpeechRecognition
+
+    if options.stand_in:
+        openai_client = FakeWhisperClient(utterance["reference"], options.network)
+    else:
+        openai_client = OpenAI(base_url=options.whisper_base_url) if options.whisper_base_url else OpenAI()
+
+    transcriber = CountingTranscriber.for_encoding(options.encoding, openai_client=openai_client)
+    # Wie in main.py: Sprachende per VAD, nicht per fester Stille ab Aufnahmebeginn
+    recognition = WhuisperSpeechRecognition(
+        microphone_bus=microphone_bus, transcriber=transcriber, voice_activity_detector=VoiceActivityDetector()
+    )
+    # Ab Frame 0 wie bei Google, damit die Aufnahmelänge auf der Zeitachse der Datei liegt
+    transcript = recognition.transcribe_utterance(min_duration=0.5, incremental=incremental, start_frame=0)
+    encoding = "+".join(sorted(transcriber.encodings_uploaded)) or UPLOAD_ENCODINGS[transcriber.audio_format]
+    return transcript, transcriber.bytes_uploaded, encoding, recognition.last_audio_seconds
+
+
+def run_utterance(backend, utterance, options):
+    """Spielt eine Aufnahme in Echtzeit ab und misst ein Backend darauf."""
+    replay = ReplayAudioInterface(utterance["pcm"])
+    microphone_bus = MicrophoneBus(audio_interface=replay)
+    microphone_bus.start()
+
+    try:
+        if backend == "google":
+            transcript, bytes_uploaded, encoding, recorded_s = run_google(utterance, microphone_bus, replay, options)
+        else:
+            transcript, bytes_uploaded, encoding, recorded_s = run_whisper(
+                utterance, microphone_bus, replay, options, incremental=backend == "whisper_incremental"
+            )
+        finished = time.perf_counter()
+    finally:
+        microphone_bus.close()
+
+    errors, reference_words = word_errors(utterance["reference"], transcript)
+    return {
+        "backend": backend,
+        "utterance": utterance["name"],
+        "transcript": transcript,
+        "errors": errors,
+        "reference_words": reference_words,
+        "final_after_speech_end_ms": round((finished - replay.start_time - utterance["speech_end_s"]) * 1000, 1),
+        "recorded_s": round(recorded_s, 2),
+        # Die Live-VAD hat vor dem Sprachende geschnitten; Stand-ins verdecken das,
+        # weil sie immer die Referenz liefern
+        "truncated": recorded_s < utterance["speech_end_s"],
+        "bytes_uploaded": bytes_uploaded,
+        # Tatsächlich gesendet; ohne ffmpeg linear16 statt --encoding
+        "encoding": encoding,
+    }
+
+
+def summarize(results, stand_in):
+    """Fasst die Einzelergebnisse je Backend zusammen."""
+    summary = {}
+
+    for backend in dict.fromkeys(result["backend"] for result in results):
+        rows = [result for result in results if result["backend"] == backend]
+        # Abgeschnittene Aufnahmen und negative Latenzen sind Messfehler, keine schnellen Antworten
+        valid = [row for row in rows if not row["truncated"] and row["final_after_speech_end_ms"] >= 0]
+        latencies = [row["final_after_speech_end_ms"] for row in valid]
+        reference_words = sum(row["reference_words"] for row in rows)
+
+        summary[backend] = {
+            "utterances": len(rows),
+            # Stand-ins liefern immer die Referenz zurück; eine WER wäre bedeutungslos
+            "wer": None if stand_in or not reference_words else sum(row["errors"] for row in rows) / reference_words,
+            "p50_final_ms": percentile(latencies, 50),
+            "p95_final_ms": percentile(latencies, 95),
+            "truncated": sum(row["truncated"] for row in rows),
+            "rejected": len(rows) - len(valid),
+            "avg_bytes_uploaded": round(sum(row["bytes_uploaded"] for row in rows) / len(rows)),
+            "encoding": "+".join(dict.fromkeys(row["encoding"] for row in rows)),
+        }
+
+    return summary
+
+
+def print_summary(summary, requested_encoding):
+    print(f"\n{'Backend':<22}{'WER':>8}{'p50 ms':>10}{'p95 ms':>10}{'verworfen':>11}{'KB/Äußerung':>14}  Kodierung")
+    for backend, row in summary.items():
+        wer = f"{row['wer'] * 100:.1f}%" if row["wer"] is not None else "–"
+        p50, p95 = (f"{row[key]:.0f}" if row[key] is not None else "–" for key in ("p50_final_ms", "p95_final_ms"))
+        print(f"{backend:<22}{wer:>8}{p50:>10}{p95:>10}{row['rejected']:>11}"
+              f"{row['avg_bytes_uploaded'] / 1024:>14.1f}  {row['encoding']}")
+
+    truncated = [backend for backend, row in summary.items() if row["truncated"]]
+    if truncated:
+        print(f"✂️ {', '.join(truncated)}: Aufnahmen vor dem Sprachende abgeschnitten (nicht in p50/p95)")
+
+    fallbacks = [backend for backend, row in summary.items() if row["encoding"] != requested_encoding]
+    if fallbacks:
+        print(f"⚠️ {', '.join(fallbacks)}: nicht mit {requested_encoding} gesendet (ffmpeg fehlt?)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="STT-Backends nach WER, Latenz und Datenmenge vergleichen.")
+    parser.add_argument("corpus_dir", help="Ordner mit <name>.wav und <name>.txt")
+    parser.add_argument("--backends", nargs="*", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Dienste im Prozess simulieren (Latenzen aus --network).")
+    parser.add_argument("--network", default="{}", help="NetworkProfile-Felder als JSON für --stand-in.")
+    parser.add_argument("--whisper-base-url", help="OpenAI-kompatibler Whisper-Server, z. B. lokal.")
+    parser.add_argument("--google-endpoint", help="host:port eines lokalen Speech-gRPC-Servers.")
+    parser.add_argument("--encoding", default="linear16", choices=("linear16", "flac", "ogg_opus"),
+                        help="Upload-Kodierung für beide Backends.")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben.")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        # Der Whisper-Recorder verlangt einen Key, der Stand-in braucht keinen
+        os.environ.setdefault("OPENAI_API_KEY", "stand-in")
+
+    args.network = NetworkProfile(**json.loads(args.network))
+    args.google_client = None
+    if "google" in args.backends and not args.stand_in:
+        args.google_client = create_google_client(args.google_endpoint)
+
+    corpus = load_corpus(args.corpus_dir)
+    if not corpus:
+        sys.exit(f"❌ Keine WAV/TXT-Paare in {args.corpus_dir}")
+
+    results = []
+    for utterance in corpus:
+        for backend in args.backends:
+            result = run_utterance(backend, utterance, args)
+            results.append(result)
+            marker = "✂️" if result["truncated"] else "🎧"
+            print(f"{marker} {backend:<20} {utterance['name']:<28} "
+                  f"{result['final_after_speech_end_ms']:>7.0f} ms  {result['transcript']}")
+
+    summary = summarize(results, args.stand_in)
+    print_summary(summary, args.encoding)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"requested_encoding": args.encoding, "summary": summary, "results": results},
+                      f, indent=2, ensure_ascii=False)
@@ -0,0 +1,177 @@
+"""Genauigkeits- und Durchsatz-Benchmark für die Wake-Word-Erkennung.
+
+Führt pvporcupine über den Frame-Pfad des WakeWordListener auf einem Ordner mit
+gelabelten WAV-Dateien aus und vergleicht mehrere Empfindlichkeiten:
+
+    <dataset>/positives/*.wav   je Datei genau ein Wake-Word
+    <dataset>/negatives/*.wav   Sprache ohne Wake-Word
+    <dataset>/noise/*.wav       Hintergrundgeräusche
+    <dataset>/bleed/*.wav       Eigene TTS-Ausgabe, die ins Mikrofon zurückkommt
+
+    python -m benchmarks.wakeword_benchmark data/wakeword --sensitivities 0.5 0.7 0.8 0.9
+"""
+import os
+
+# Ohne Audiogerät: pygame (Wake-Sound) auf den Dummy-Treiber umleiten
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import glob
+import json
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from audio.capture.microphone_bus import MicrophoneBus
+from benchmarks.replay_audio import ReplayAudioInterface, load_wav_pcm16
+from wakeword_listener import WakeWordListener
+
+POSITIVE_CATEGORY = "positives"
+NEGATIVE_CATEGORIES = ("negatives", "noise", "bleed")
+
+# Stille zwischen zwei Dateien, damit Porcupines interner Zustand abklingt
+GAP_SECONDS = 1.0
+
+
+def load_dataset(dataset_dir, sample_rate):
+    """Lädt alle WAV-Dateien je Kategorie als int16-Arrays."""
+    dataset = {}
+    for category in (POSITIVE_CATEGORY, *NEGATIVE_CATEGORIES):
+        paths = sorted(glob.glob(os.path.join(dataset_dir, category, "*.wav")))
+        dataset[category] = [(path, load_wav_pcm16(path, sample_rate)) for path in paths]
+    return dataset
+
+
+def count_detections(listener, pcm, frame_length):
+    """Schickt ein Signal frameweise durch den Frame-Pfad und zählt die Erkennungen."""
+    gap = np.zeros(int(GAP_SECONDS * listener.microphone_bus.sample_rate), dtype=np.int16)
+    signal = np.concatenate([pcm, gap])
+    usable = len(signal) - len(signal) % frame_length
+
+    detections = 0
+    for frame in signal[:usable].reshape(-1, frame_length):
+        if listener._process_frame(frame):
+            detections += 1
+
+    return detections, usable // frame_length
+
+
+def evaluate_sensitivity(sensitivity, dataset, wakeword):
+    """Misst Fehlerraten, Durchsatz und CPU-Zeit pro Frame für eine Empfindlichkeit."""
+    # Der Listener braucht einen Bus; die Auswertung läuft aber offline über _process_frame
+    idle_bus = MicrophoneBus(audio_interface=ReplayAudioInterface(np.zeros(0, dtype=np.int16)))
+    listener = WakeWordListener(wakeword=wakeword, sensitivity=sensitivity, microphone_bus=idle_bus)
+    frame_length = listener.handle.frame_length
+    sample_rate = idle_bus.sample_rate
+
+    frames_total = 0
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    missed = 0
+    for _, pcm in dataset[POSITIVE_CATEGORY]:
+        detections, frames = count_detections(listener, pcm, frame_length)
+        frames_total += frames
+        if detections == 0:
+            missed += 1
+
+    false_accepts = {}
+    negative_hours = {}
+    for category in NEGATIVE_CATEGORIES:
+        false_accepts[category] = 0
+        negative_hours[category] = 0.0
+        for _, pcm in dataset[category]:
+            detections, frames = count_detections(listener, pcm, frame_length)
+            frames_total += frames
+            false_accepts[category] += detections
+            negative_hours[category] += len(pcm) / sample_rate / 3600
+
+    wall_seconds = time.perf_counter() - wall_started
+    cpu_seconds = time.process_time() - cpu_started
+
+    listener.cleanup()
+    idle_bus.close()
+
+    total_hours = sum(negative_hours.values())
+    positives = len(dataset[POSITIVE_CATEGORY])
+
+    return {
+        "sensitivity": sensitivity,
+        "false_reject_rate": missed / positives if positives else None,
+        "false_accepts_per_hour": sum(false_accepts.values()) / total_hours if total_hours else None,
+        "false_accepts_per_hour_by_category": {
+            category: false_accepts[category] / negative_hours[category] if negative_hours[category] else None
+            for category in NEGATIVE_CATEGORIES
+        },
+        "frames_per_second": frames_total / wall_seconds if wall_seconds else None,
+        "cpu_ms_per_frame": cpu_seconds * 1000 / frames_total if frames_total else None,
+        "realtime_factor": (frames_total * frame_length / sample_rate) / wall_seconds if wall_seconds else None,
+    }
+
+
+def _fmt(value, pattern):
+    return "–" if value is None else format(value, pattern)
+
+
+def print_results(results):
+    print(f"{'Empf.':>6}{'FRR':>8}{'FA/h':>8}{'FA/h Sprache':>14}{'FA/h Rauschen':>15}"
+          f"{'FA/h Bleed':>12}{'Frames/s':>11}{'CPU ms/Frame':>14}{'x Echtzeit':>12}")
+    for result in results:
+        by_category = result["false_accepts_per_hour_by_category"]
+        print(f"{result['sensitivity']:>6.2f}"
+              f"{_fmt(result['false_reject_rate'], '.1%'):>8}"
+              f"{_fmt(result['false_accepts_per_hour'], '.2f'):>8}"
+              f"{_fmt(by_category['negatives'], '.2f'):>14}"
+              f"{_fmt(by_category['noise'], '.2f'):>15}"
+              f"{_fmt(by_category['bleed'], '.2f'):>12}"
+              f"{_fmt(result['frames_per_second'], '.0f'):>11}"
+              f"{_fmt(result['cpu_ms_per_frame'], '.3f'):>14}"
+              f"{_fmt(result['realtime_factor'], '.0f'):>12}")
+
+
+def recommend(results, max_false_accepts_per_hour):
+    """Wählt die Empfindlichkeit mit der niedrigsten FRR innerhalb des FA-Budgets."""
+    candidates = [
+        result for result in results
+        if result["false_accepts_per_hour"] is not None
+        and result["false_reject_rate"] is not None
+        and result["false_accepts_per_hour"] <= max_false_accepts_per_hour
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda result: (result["false_reject_rate"], result["false_accepts_per_hour"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wake-Word-Benchmark über gelabelte WAV-Dateien.")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("--wakeword", default="jarvis")
+    parser.add_argument("--sensitivities", nargs="+", type=float, default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--max-fa-per-hour", type=float, default=0.5,
+                        help="Budget an Fehlauslösungen pro Stunde für die Empfehlung.")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben.")
+    args = parser.parse_args()
+
+    wakeword_dataset = load_dataset(args.dataset_dir, sample_rate=16000)
+    for name, files in wakeword_dataset.items():
+        print(f"📁 {name}: {len(files)} Dateien")
+
+    benchmark_results = [
+        evaluate_sensitivity(sensitivity, wakeword_dataset, args.wakeword)
+        for sensitivity in args.sensitivities
+    ]
+    print()
+    print_results(benchmark_results)
+
+    best = recommend(benchmark_results, args.max_fa_per_hour)
+    if best:
+        print(f"\n✅ Empfehlung: sensitivity={best['sensitivity']} "
+              f"(FRR {best['false_reject_rate']:.1%}, {best['false_accepts_per_hour']:.2f} FA/h)")
+    else:
+        print(f"\n⚠️ Keine Empfindlichkeit bleibt unter {args.max_fa_per_hour} FA/h")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(benchmark_results, f, indent=2)
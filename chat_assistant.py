@@ -1,7 +1,13 @@
+import asyncio
 from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
 import json
+import logging
 import random
+import re
+import threading
+import time
 import traceback
 from openai import OpenAI
 from agents.tools.core.tool_factory import ToolFactory
@@ -10,15 +16,132 @@ from text_to_speech_streamer import TextToSpeechStreamer
 from voice_generator import VoiceGenerator
 
 from agents.tools.core.tool_registry import ToolRegistry
+from agents.tools.core.tool_response import ToolResponse
+from utils.latency_tracer import latency_tracer
+
+
+@dataclass
+class PendingToolCall:
+    """Ein Tool-Aufruf, der aus Stream-Deltas zusammengesetzt wird."""
+    index: int
+    id: str = ""
+    name: str = ""
+    arguments: str = ""
+    dispatched: bool = False
+    future: object = None
+    duration_ms: float = None
+
+    async def result(self):
+        """ToolResponse des gestarteten Tools; None, wenn es nicht gestartet wurde."""
+        if self.future is None:
+            return None
+        return await asyncio.wrap_future(self.future)
+
+
+class StreamingToolCalls:
+    """Setzt Tool-Aufrufe aus den Deltas eines Completion-Streams zusammen.
+
+    Sobald die Argumente eines Aufrufs gültiges JSON ergeben (oder der nächste
+    Aufruf beginnt), wird er über ``dispatch(call, arguments)`` gestartet, noch
+    während der Stream weiterläuft. ``dispatch`` gibt ein concurrent.futures.Future
+    oder None zurück.
+    """
+
+    def __init__(self, dispatch):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._dispatch = dispatch
+        self._calls = {}
+        # Der Stream-Thread startet Tools, der Event-Loop bricht sie ab
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def add(self, deltas):
+        for delta in deltas:
+            call = self._calls.get(delta.index)
+            if call is None:
+                # Ein neuer Aufruf beginnt: die vorherigen sind vollständig
+                for previous in self._calls.values():
+                    self._try_dispatch(previous, final=True)
+                call = self._calls[delta.index] = PendingToolCall(index=delta.index)
+
+            if delta.id:
+                call.id = delta.id
+            function = getattr(delta, "function", None)
+            if function is not None:
+                call.name += function.name or ""
+                call.arguments += function.arguments or ""
+
+            if call.arguments.rstrip().endswith("}"):
+                self._try_dispatch(call)
+
+    def finish(self):
+        """Stream zu Ende: alle noch offenen Aufrufe starten."""
+        for call in self._calls.values():
+            self._try_dispatch(call, final=True)
+
+    def _try_dispatch(self, call, final=False):
+        if call.dispatched:
+            return
+
+        try:
+            arguments = json.loads(call.arguments or "{}")
+        except json.JSONDecodeError:
+            if final:
+                self.logger.error("❌ Ungültige Argumente für %s: %s", call.name, call.arguments)
+                call.dispatched = True
+            return
+
+        with self._lock:
+            call.dispatched = True
+            if not self._cancelled:
+                call.future = self._dispatch(call, arguments)
+
+    def cancel(self):
+        """Bricht gestartete Tools ab und verhindert, dass weitere starten."""
+        with self._lock:
+            self._cancelled = True
+            for call in self._calls.values():
+                if call.future is not None:
+                    call.future.cancel()
+
+    def assistant_message(self, content):
+        """Assistant-Nachricht mit allen Aufrufen für die Folgeanfrage."""
+        return {
+            "role": "assistant",
+            "content": content or None,
+            "tool_calls": [
+                {"id": call.id, "type": "function", "function": {"name": call.name, "arguments": call.arguments}}
+                for call in self
+            ],
+        }
+
+    def __iter__(self):
+        return iter(sorted(self._calls.values(), key=lambda call: call.index))
+
+    def __len__(self):
+        return len(self._calls)
+
 
 class OpenAIChatAssistant:
-    def __init__(self, model="gpt-4o-mini", history_limit=5):
-        """Initialisiert den Chat-Assistenten mit OpenAI API, TTS und Function Calling"""
-        self.openai = OpenAI()
+    def __init__(self, model="gpt-4o-mini", history_limit=5, openai_client=None, voice_generator=None, tools=None,
+                 max_parallel_tools=4):
+        """Initialisiert den Chat-Assistenten mit OpenAI API, TTS und Function Calling.
+
+        :param openai_client: Optionaler OpenAI-kompatibler Client (z. B. für Benchmarks)
+        :param voice_generator: Optionaler VoiceGenerator statt der Standardinstanz
+        :param tools: Optionale Tool-Liste statt ToolFactory.create_all_tools()
+        :param max_parallel_tools: Wie viele Tool-Aufrufe eines Turns gleichzeitig laufen dürfen
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.openai = openai_client or OpenAI()
         self.model = model
-        self.voice_generator = VoiceGenerator()
+        self.voice_generator = voice_generator or VoiceGenerator()
         self.tts_streamer = TextToSpeechStreamer(self.voice_generator)
         self.history = deque(maxlen=history_limit)
+        self._cancel_event = threading.Event()
+        self._active_stream = None
+        self._speculation = None
+        self.max_parallel_tools = max_parallel_tools
         
         self.tool_registry = ToolRegistry()
 
@@ -47,98 +170,309 @@ class OpenAIChatAssistant:
             "aber halte dich flexibel – nicht jede Nacht braucht eine detaillierte Analyse."
         )
 
-        for tool in ToolFactory.create_all_tools():
+        for tool in ToolFactory.create_all_tools() if tools is None else tools:
             self.tool_registry.register_tool(tool)
+
+        # Unveränderlicher Anfang jeder Anfrage (siehe _build_messages)
+        self._system_message = {"role": "system", "content": self.system_prompt}
+        self._tool_definitions = self.tool_registry.get_all_definitions()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._turn_tokens = [0, 0]
         
         
-    def get_system_prompt_with_current_date(self):
+    @staticmethod
+    def get_current_date_note():
         current_date = datetime.now().strftime("%Y-%m-%d")
-        
+
         return (
-            f"{self.system_prompt}\n\n"
             f"Note: The current date is {current_date}. "
             f"Use this as reference for any date-related reasoning."
         )
-    
+
+    def _build_messages(self, user_input):
+        """Baut die Anfrage so, dass ihr Anfang von Turn zu Turn byteidentisch bleibt.
+
+        OpenAI cacht automatisch den längsten gleichen Präfix (Tools, System-Prompt,
+        bisheriger Verlauf). Alles Veränderliche (Datum, Verhaltenshinweise von Tools)
+        steht deshalb ganz am Ende.
+        """
+        messages = [self._system_message]
+
+        for user_msg, ai_msg in self.history:
+            messages.append({"role": "user", "content": user_msg})
+            messages.append({"role": "assistant", "content": ai_msg})
+
+        messages.append({"role": "user", "content": user_input})
+        messages.append({"role": "system", "content": self.get_current_date_note()})
+        return messages
+
+    def _open_stream(self, messages, tool_choice=None):
+        """Startet eine Streaming-Completion; kehrt zurück, sobald die Antwort-Header da sind.
+
+        Die Tool-Definitionen gehen immer mit, da sie den Anfang des gecachten Präfixes
+        bilden; ``tool_choice="none"`` verhindert weitere Tool-Aufrufe, ohne ihn zu ändern.
+        """
+        kwargs = {}
+        if self._tool_definitions:
+            kwargs["tools"] = self._tool_definitions
+            if tool_choice:
+                kwargs["tool_choice"] = tool_choice
+
+        return self.openai.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            # Der letzte Chunk enthält dann die Token-Zahlen inkl. gecachter Prompt-Tokens
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+
+    @staticmethod
+    def _normalize_transcript(text):
+        return " ".join(re.sub(r"[^\w\s]", "", text.lower()).split())
+
+    def speculate(self, user_input):
+        """Öffnet den Antwort-Stream schon auf einem stabilen Zwischenergebnis der STT.
+
+        Muss im Event-Loop aufgerufen werden. Die Anfrage hat keine Seiteneffekte:
+        Der Stream wird erst gelesen (und Tools erst ausgeführt), wenn das finale
+        Transkript passt.
+        """
+        normalized = self._normalize_transcript(user_input)
+        if self._speculation is not None and self._speculation[0] == normalized:
+            return
+
+        self.discard_speculation()
+        messages = self._build_messages(user_input)
+        task = asyncio.create_task(asyncio.to_thread(self._open_stream, messages))
+        self._speculation = (normalized, list(self.history), task)
+        print(f"🔮 Spekulative Anfrage: {user_input}")
+
+    @staticmethod
+    def _close_stream_when_done(task):
+        """Schließt den Stream einer verworfenen Spekulation, sobald er geöffnet ist."""
+        def close(finished):
+            if not finished.cancelled() and finished.exception() is None:
+                finished.result().close()
+
+        task.add_done_callback(close)
+
+    def discard_speculation(self):
+        """Verwirft eine laufende Spekulation; ihr Stream wird ungelesen geschlossen."""
+        if self._speculation is not None:
+            self._close_stream_when_done(self._speculation[2])
+            self._speculation = None
+
+    def _take_speculation(self, user_input):
+        """Liefert den Task der Spekulation, wenn sie zum finalen Transkript passt."""
+        speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return None
+
+        normalized, history, task = speculation
+        if normalized == self._normalize_transcript(user_input) and history == list(self.history):
+            return task
+
+        self._close_stream_when_done(task)
+        return None
+
     async def get_streaming_response(self, user_input: str):
-        """Gets a streaming response from OpenAI for the final response"""
+        """Streamt die Antwort in einer einzigen Anfrage direkt in die Sprachausgabe.
+
+        Tool-Aufrufe werden aus den Deltas zusammengesetzt und starten, sobald ihre
+        Argumente vollständig sind. Nur wenn Tools Ergebnisse liefern, folgt eine
+        zweite (gestreamte) Anfrage für die eigentliche Antwort.
+        """
+        self._cancel_event.clear()
+        self.tts_streamer.reset()
+        self._turn_tokens = [0, 0]
+        tool_calls = None
+
         try:
-            messages = [
-                {"role": "system", "content": self.get_system_prompt_with_current_date()}
-            ]
-            
-            for user_msg, ai_msg in self.history:
-                messages.append({"role": "user", "content": user_msg})
-                messages.append({"role": "assistant", "content": ai_msg})
-
-            messages.append({"role": "user", "content": user_input})
-
-            response = self.openai.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=self.tool_registry.get_all_definitions()
-            )
-
-            assistant_message = response.choices[0].message
-
-            if not assistant_message.tool_calls:
-                return self._stream_response(messages)
-
-            for tool_call in assistant_message.tool_calls:
-                tool = self.tool_registry.get_tool(tool_call.function.name)
-                
-                if not tool:
+            messages = self._build_messages(user_input)
+
+            speculation = self._take_speculation(user_input)
+            latency_tracer.annotate("speculative_hit", speculation is not None)
+
+            with latency_tracer.span("llm_first_request"):
+                if speculation is not None:
+                    stream = await speculation
+                else:
+                    stream = await asyncio.to_thread(self._open_stream, messages)
+
+            tool_slots = asyncio.Semaphore(self.max_parallel_tools)
+            tool_calls = StreamingToolCalls(self._dispatch_tool(asyncio.get_running_loop(), tool_slots))
+            text = await asyncio.to_thread(self._speak_stream, stream, tool_calls)
+
+            if text is None or self._cancel_event.is_set():
+                tool_calls.cancel()
+                return None
+
+            if not tool_calls:
+                self.history.append((user_input, text))
+                return text
+
+            # Die Tools laufen bereits parallel; Ergebnisse in der Reihenfolge der Aufrufe übernehmen
+            with latency_tracer.span("tools_wait"):
+                tool_responses = await asyncio.gather(*(call.result() for call in tool_calls), return_exceptions=True)
+            latency_tracer.annotate("tool_ms", [(call.name, call.duration_ms) for call in tool_calls])
+
+            messages.append(tool_calls.assistant_message(text))
+            for call, tool_response in zip(tool_calls, tool_responses):
+                if tool_response is None or isinstance(tool_response, BaseException):
+                    if tool_response is not None:
+                        self.logger.error("❌ Tool %s fehlgeschlagen: %s", call.name, tool_response)
+                    content = "Tool nicht verfügbar." if tool_response is None else f"Fehler: {tool_response}"
+                    messages.append({"role": "tool", "tool_call_id": call.id, "content": content})
+                    continue
+
+                # Ältere Tools melden Fehler als bloßen String statt als ToolResponse
+                if not isinstance(tool_response, ToolResponse):
+                    messages.append({"role": "tool", "tool_call_id": call.id, "content": str(tool_response)})
                     continue
 
-                tool_response = await tool.execute(json.loads(tool_call.function.arguments))
-                
                 if tool_response.audio_response_handled:
                     return
-                
+
                 if tool_response.standard_response_audio_sub_path:
                     random_index = random.randint(1, 4)
                     audio_path = tool_response.standard_response_audio_sub_path.replace("x", str(random_index))
 
-                    SoundPlayer(audio_path).play_audio()
+                    sound_player = await asyncio.to_thread(SoundPlayer, audio_path)
+                    sound_player.play_audio()
                     return
 
-                if tool_response.behavior_instructions:
-                    messages[0]["content"] = f"{self.system_prompt}\n\n{tool_response.behavior_instructions}"
-
-                messages.append(assistant_message)
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tool_call.id,
+                    "tool_call_id": call.id,
                     "content": tool_response.content
                 })
 
-            # After tool execution, use streaming for the final response
-            return self._stream_response(messages)
+            # Verhaltenshinweise der Tools hinten anhängen statt den System-Prompt (und damit den Cache) zu ändern
+            for tool_response in tool_responses:
+                if isinstance(tool_response, ToolResponse) and tool_response.behavior_instructions:
+                    messages.append({"role": "system", "content": tool_response.behavior_instructions})
+
+            if self._cancel_event.is_set():
+                return None
+
+            # Die Tool-Ergebnisse werden in einer zweiten, ebenfalls gestreamten Anfrage ausformuliert;
+            # gleiche Tools wie in der ersten (Cache-Präfix), aber keine zweite Tool-Runde
+            stream = await asyncio.to_thread(self._open_stream, messages, "none")
+            text = await asyncio.to_thread(self._speak_stream, stream)
+            if text is None or self._cancel_event.is_set():
+                return None
+
+            self.history.append((user_input, text))
+            return text
+
+        except asyncio.CancelledError:
+            # Barge-in: schon gestartete Tools (Notion, Kalender, Spotify) sollen nach der
+            # Unterbrechung nichts mehr bewirken; bereits laufende Threads enden von selbst
+            if tool_calls is not None:
+                tool_calls.cancel()
+            raise
 
         except Exception as e:
             return f"Error processing response: {str(e)}"
-    
-    def _stream_response(self, messages):
+
+    def _record_usage(self, usage):
+        """Zählt Prompt- und gecachte Tokens einer Anfrage (Turn-Metriken und Gesamtbilanz)."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        prompt_tokens = usage.prompt_tokens or 0
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+        self._turn_tokens[0] += prompt_tokens
+        self._turn_tokens[1] += cached_tokens
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+
+        latency_tracer.annotate("llm_prompt_tokens", self._turn_tokens[0])
+        latency_tracer.annotate("llm_cached_tokens", self._turn_tokens[1])
+        self.logger.debug("💾 Prompt-Cache: %d/%d Tokens in dieser Anfrage, gesamt %.0f %%", cached_tokens,
+                          prompt_tokens, 100 * self.cached_tokens / max(self.prompt_tokens, 1))
+
+    def _dispatch_tool(self, loop, tool_slots):
+        """Callback für StreamingToolCalls: startet ein Tool im Event-Loop, sobald es komplett ist.
+
+        :param tool_slots: Semaphore des Turns, begrenzt die gleichzeitig laufenden Tools
+        """
+        def dispatch(call, arguments):
+            tool = self.tool_registry.get_tool(call.name)
+            if not tool or self._cancel_event.is_set():
+                return None
+
+            async def run():
+                async with tool_slots:
+                    started = time.perf_counter()
+                    try:
+                        with latency_tracer.span(f"tool:{call.name}"):
+                            return await tool.run(arguments)
+                    finally:
+                        call.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            print(f"🛠 Starte {call.name}")
+            return asyncio.run_coroutine_threadsafe(run(), loop)
+
+        return dispatch
+
+    def _speak_stream(self, stream, tool_calls=None):
+        """Liest einen Completion-Stream: Text geht sofort an die Sprachausgabe, Tool-Deltas an ``tool_calls``."""
+        self._active_stream = stream
         try:
-            stream = self.openai.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                stream=True
-            )
-            
-            full_response = self.tts_streamer.process_openai_stream(stream)
-            print(full_response)
-            
-            self.history.append((messages[-1]["content"], full_response))
-            
+            if self._cancel_event.is_set():
+                stream.close()
+                return None
+
+            def text_deltas():
+                for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        self._record_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if tool_calls is not None and getattr(delta, "tool_calls", None):
+                        tool_calls.add(delta.tool_calls)
+                    if getattr(delta, "content", None):
+                        latency_tracer.mark("llm_first_token")
+                        yield delta.content
+
+                if tool_calls is not None:
+                    tool_calls.finish()
+
+            full_response = self.tts_streamer.stream_text(text_deltas())
+            if full_response:
+                print(full_response)
+
+            if self._cancel_event.is_set():
+                return None
             return full_response
-            
+
         except Exception as e:
-            error_message = f"❌ Fehler: {str(e)}"
-            detailed_trace = traceback.format_exc()
-            print(error_message)
-            print(detailed_trace)
-            return f"{error_message}\n{detailed_trace}"
+            if self._cancel_event.is_set():
+                # Der Stream wurde beim Barge-in von außen geschlossen
+                return None
+
+            print(f"❌ Fehler: {str(e)}")
+            print(traceback.format_exc())
+            raise
+        finally:
+            self._active_stream = None
+
+    def cancel_response(self):
+        """Bricht die laufende Antwort ab: OpenAI-Stream, Chunking und Sprachausgabe."""
+        self._cancel_event.set()
+        self.tts_streamer.cancel()
+
+        stream = self._active_stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+        self.voice_generator.stop()
         
     async def speak_response(self, user_input):
         """Gets a streaming response and speaks it sentence by sentence"""
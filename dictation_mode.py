@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import re
+import time
+from agents.tools.notion.managers.notion_clipboard_manager import NotionClipboardManager
+from audio.standard_phrase_player import StandardPhrasePlayer
+from utils.latency_tracer import latency_tracer
+
+
+class DictationMode:
+    """Langes Diktat direkt in die Notion-Zwischenablage.
+
+    Google STT läuft über rotierende Streams (SpeechRecognition.dictate), jedes
+    finale Segment landet in einer Queue. Ein Schreib-Task hängt die Segmente
+    gebündelt an die Clipboard-Seite an: der erste Block mit Trenner, alle
+    weiteren als Fortsetzung. Der Text liegt so nie komplett im Speicher.
+
+    Beendet wird mit der Stopp-Phrase am Ende eines Segments oder nach langer Stille.
+    """
+
+    START_PHRASES = ("diktat starten", "diktat")
+    STOP_PHRASES = ("diktat beenden", "diktat ende")
+
+    def __init__(self, speech_recognition, clipboard_manager=None, batch_chars=800, flush_seconds=15,
+                 max_silence_seconds=20, voice_generator=None, final_attempts=3):
+        """
+        :param speech_recognition: SpeechRecognition mit dictate()
+        :param clipboard_manager: NotionClipboardManager; ohne Angabe ein eigener
+        :param batch_chars: Ab so vielen gesammelten Zeichen wird nach Notion geschrieben
+        :param flush_seconds: Spätestens nach dieser Zeit wird Gesammeltes geschrieben
+        :param max_silence_seconds: Stille, nach der das Diktat automatisch endet
+        :param voice_generator: Spricht die Abschlussbestätigung, solange keine Phrasen gerendert sind
+        :param final_attempts: Versuche für den letzten Block, bevor er verloren gibt
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.speech_recognition = speech_recognition
+        self.clipboard_manager = clipboard_manager or NotionClipboardManager()
+        self.batch_chars = batch_chars
+        self.flush_seconds = flush_seconds
+        self.max_silence_seconds = max_silence_seconds
+        self.voice_generator = voice_generator
+        self.final_attempts = final_attempts
+
+    @staticmethod
+    def _normalize(text):
+        return " ".join(re.sub(r"[^\w\s]", "", text.lower()).split())
+
+    @classmethod
+    def is_start_request(cls, text):
+        return cls._normalize(text or "") in cls.START_PHRASES
+
+    def _strip_stop_phrase(self, text):
+        """Entfernt die Stopp-Phrase am Segmentende; gibt (Text, gestoppt) zurück."""
+        words = text.split()
+        for phrase in self.STOP_PHRASES:
+            size = len(phrase.split())
+            if self._normalize(" ".join(words[-size:])) == phrase:
+                return " ".join(words[:-size]), True
+        return text, False
+
+    async def run(self, start_frame=None):
+        """Diktiert bis zur Stopp-Phrase oder Stille.
+
+        :return: Anzahl der gespeicherten Zeichen
+        """
+        loop = asyncio.get_running_loop()
+        segments = asyncio.Queue()
+
+        def on_segment(text):
+            # Läuft im STT-Thread
+            text, stopped = self._strip_stop_phrase(text)
+            if text:
+                print(f"✍️ {text}")
+                loop.call_soon_threadsafe(segments.put_nowait, text)
+            if stopped:
+                self.speech_recognition.cancel()
+
+        # Bewusst ohne gesprochene Bestätigung: sie würde ins Mikrofon und damit ins Diktat laufen
+        print("🎙 Diktat läuft...")
+        writer = asyncio.create_task(self._write_segments(segments))
+
+        try:
+            await asyncio.to_thread(
+                self.speech_recognition.dictate, on_segment, start_frame,
+                max_silence_seconds=self.max_silence_seconds
+            )
+        finally:
+            # Abbruch (z. B. Barge-in) beendet auch die Streams; Gesammeltes wird noch geschrieben
+            self.speech_recognition.cancel()
+            segments.put_nowait(None)
+            saved_chars = await writer
+
+        latency_tracer.annotate("dictation_chars", saved_chars)
+        try:
+            await asyncio.to_thread(StandardPhrasePlayer.play_phrase, "dictation_stop", self.voice_generator)
+        except Exception as e:
+            # Der Text ist gespeichert; eine fehlende Bestätigung ist kein Diktatfehler
+            self.logger.warning("⚠️ Abschlussbestätigung nicht abspielbar: %s", e)
+        return saved_chars
+
+    async def _write_segments(self, segments):
+        """Sammelt Segmente und schreibt sie gebündelt nach Notion."""
+        batch = []
+        saved_chars = 0
+        first_batch = True
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                text = await asyncio.wait_for(segments.get(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                text = ""
+
+            if text is None:
+                break
+            if text:
+                batch.append(text)
+
+            due = time.monotonic() - last_flush >= self.flush_seconds
+            if batch and (sum(len(segment) for segment in batch) >= self.batch_chars or due):
+                if await self._flush(batch, with_divider=first_batch):
+                    saved_chars += sum(len(segment) for segment in batch)
+                    batch, first_batch = [], False
+                last_flush = time.monotonic()
+
+        # Der letzte Block bekommt mehrere Versuche mit wachsendem Abstand (z. B. bei 429)
+        for attempt in range(self.final_attempts if batch else 0):
+            if await self._flush(batch, with_divider=first_batch):
+                saved_chars += sum(len(segment) for segment in batch)
+                break
+            if attempt + 1 < self.final_attempts:
+                await asyncio.sleep(2 ** attempt)
+        else:
+            if batch:
+                self.logger.error("❌ Diktat-Text nicht gespeichert: %s", " ".join(batch))
+
+        return saved_chars
+
+    async def _flush(self, batch, with_divider):
+        """Hängt einen Block an; bei Fehlern (auch von Notion abgelehnt) bleibt der Block für den nächsten Versuch erhalten."""
+        try:
+            result = await self.clipboard_manager.append_to_clipboard(" ".join(batch), with_divider=with_divider)
+            self.logger.info("📝 %d Segmente an die Zwischenablage angehängt: %s", len(batch), result)
+            return True
+        except Exception as e:
+            self.logger.error("❌ Diktat konnte nicht gespeichert werden: %s", e)
+            return False
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+from agents.tools.volume_regulation.volume_control import VolumeControl
+from audio.capture.microphone_bus import MicrophoneBus
+from audio.standard_phrase_player import StandardPhrasePlayer
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+
+class LocalCommandListener:
+    """Erkennt eine feste Menge kurzer Befehle lokal, ohne Google STT und ohne LLM.
+
+    Vosk läuft mit einer Grammatik, die nur die Befehlsphrasen und ``[unk]`` kennt.
+    Sobald die Teilerkennung einen Befehl für ``stable_ms`` unverändert liefert,
+    wird er zurückgegeben; alles andere (``[unk]``) gibt die Anfrage an STT ab.
+    """
+
+    def __init__(self, commands, model_path=None, microphone_bus=None, max_seconds=2.0, stable_ms=150):
+        """
+        :param commands: Dict Phrase -> Callable ohne Argumente
+        :param model_path: Pfad zum Vosk-Modell; Standard ist die Umgebungsvariable VOSK_MODEL_PATH
+        :param microphone_bus: Geteilter MicrophoneBus; ohne Angabe wird ein eigener geöffnet
+        :param max_seconds: Wie lange nach dem Wake-Word höchstens auf einen Befehl gewartet wird
+        :param stable_ms: Wie lange eine Teilerkennung unverändert sein muss, um als Befehl zu gelten
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.commands = commands
+        self._cancelled = threading.Event()
+
+        load_dotenv()
+        model_path = model_path or os.getenv("VOSK_MODEL_PATH")
+        self.enabled = vosk is not None and bool(model_path) and os.path.isdir(model_path)
+        if not self.enabled:
+            self.logger.warning("⚠️ Lokale Befehle deaktiviert (vosk oder VOSK_MODEL_PATH fehlt)")
+            return
+
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+        self.grammar = json.dumps([*commands, "[unk]"], ensure_ascii=False)
+
+        self.microphone_bus = microphone_bus or MicrophoneBus()
+        self.max_frames = int(max_seconds / self.microphone_bus.frame_duration)
+        self.stable_frames = max(1, round(stable_ms / 1000 / self.microphone_bus.frame_duration))
+
+    def listen_for_command(self, start_frame=None):
+        """Hört ab ``start_frame`` auf einen Befehl.
+
+        :return: Die erkannte Befehlsphrase oder None, wenn etwas anderes gesagt wurde
+        """
+        if not self.enabled:
+            return None
+
+        self._cancelled.clear()
+        recognizer = vosk.KaldiRecognizer(self.model, self.microphone_bus.sample_rate, self.grammar)
+        subscription = self.microphone_bus.subscribe("commands", start_frame=start_frame)
+
+        processed = 0
+        candidate, candidate_since = "", 0
+
+        while processed < self.max_frames and not self._cancelled.is_set():
+            for pcm in subscription.read(timeout=0.1):
+                processed += 1
+
+                if recognizer.AcceptWaveform(pcm.tobytes()):
+                    text = json.loads(recognizer.Result()).get("text", "")
+                    # Ein leeres Ergebnis ist nur Stille vor der eigentlichen Anfrage
+                    if text:
+                        return text if text in self.commands else None
+                    continue
+
+                text = json.loads(recognizer.PartialResult()).get("partial", "")
+                if "[unk]" in text:
+                    return None
+
+                if text != candidate:
+                    candidate, candidate_since = text, processed
+                elif text in self.commands and processed - candidate_since >= self.stable_frames:
+                    return text
+
+        return None
+
+    def execute(self, command):
+        """Führt die zur Phrase gehörende Aktion aus."""
+        self.logger.info("⚡ Lokaler Befehl: %s", command)
+        try:
+            self.commands[command]()
+        except Exception as e:
+            self.logger.error("❌ Fehler beim lokalen Befehl '%s': %s", command, e)
+
+    def cancel(self):
+        """Beendet ein laufendes listen_for_command() vorzeitig."""
+        self._cancelled.set()
+
+
+def create_default_commands(chat_assistant, pomodoro_minutes=25, dictation=False):
+    """Befehle für Lautstärke, Wiedergabe-Stopp und Pomodoro.
+
+    Der Pomodoro-Timer wird über dieselbe Tool-Instanz gesteuert wie beim LLM,
+    damit beide Wege denselben Timer sehen. Mit ``dictation`` kommt "diktat starten"
+    hinzu; das Diktat selbst startet die VoicePipeline anhand der erkannten Phrase.
+    """
+
+    def change_volume(change):
+        change()
+        StandardPhrasePlayer.play_volume_audio(VolumeControl.get_volume())
+
+    def pomodoro(action, **kwargs):
+        tool = chat_assistant.tool_registry.get_tool("pomodoro_tool")
+        if tool is None:
+            return
+        print(f"🍅 {tool.commands[action].execute(tool, **kwargs)}")
+        StandardPhrasePlayer.play_phrase(f"pomodoro_{action}", voice_generator=chat_assistant.voice_generator)
+
+    commands = {
+        "stopp": chat_assistant.voice_generator.stop,
+        "lauter": lambda: change_volume(VolumeControl.increase_volume),
+        "leiser": lambda: change_volume(VolumeControl.decrease_volume),
+        "pomodoro starten": lambda: pomodoro("start", duration_minutes=pomodoro_minutes),
+        "pomodoro stoppen": lambda: pomodoro("stop"),
+    }
+    if dictation:
+        commands["diktat starten"] = lambda: print("🎙 Diktat wird gestartet")
+
+    return commands
@@ -1,42 +1,114 @@
 import asyncio
+import os
 from wakeword_listener import WakeWordListener
+from audio_transcriber import AudioTranscriber
 from chat_assistant import OpenAIChatAssistant
+from dictation_mode import DictationMode
 from dotenv import load_dotenv
+from audio.audio_asset_pack import AudioAssetPack
+from audio.audio_io_process import AudioIOProcess
+from audio.capture.microphone_bus import MicrophoneBus
+from audio.latency_masker import LatencyMasker
+from audio.sound_player import SoundPlayer
+from audio.speech_to_text.hedged_speech_recognition import HedgedSpeechRecognition
 from audio.speech_to_text.speech_to_text_recorder import SpeechRecognition
+from audio.voice_activity_detector import VoiceActivityDetector
+from local_command_listener import LocalCommandListener, create_default_commands
+from voice_generator import VoiceGenerator
+from voice_pipeline import VoicePipeline
+from whisper_speech_recognition import WhuisperSpeechRecognition
 
 load_dotenv(override=True)
 
 async def main():
-    wakeword_listener = WakeWordListener(wakeword="jarvis")
-    speech_recognition = SpeechRecognition()
-    chat_assistant = OpenAIChatAssistant()
+    # Sound-Effekte und Standardphrasen einmalig mappen statt pro Wiedergabe zu dekodieren
+    AudioAssetPack.default()
 
-    try:
-        while True:
-            if wakeword_listener.listen_for_wakeword():
-                wakeword_listener.pause_listening()
-                
-                try:
-                    spoken_user_prompt = speech_recognition.record_user_prompt()
-                    print("spoken_user_prompt", spoken_user_prompt)
-
-                    if spoken_user_prompt == "":
-                        continue
-                    
-                    print(f"🗣 Erkannt: {spoken_user_prompt}")
-                    await chat_assistant.speak_response(spoken_user_prompt)
-                        
-                finally:
-                    wakeword_listener.resume_listening()
+    # Empfindlichkeit per benchmarks/wakeword_benchmark.py bestimmen
+    sensitivity = float(os.getenv("PICO_SENSITIVITY", "0.8"))
 
-    except KeyboardInterrupt:
-        print("🛑 Manuelles Beenden.")
+    if os.getenv("AUDIO_PROCESS", "1") == "1":
+        # Mikrofon, Wake-Word und Wiedergabe laufen in einem eigenen Prozess,
+        # damit Tool-Arbeit im Hauptprozess keine Überläufe verursacht
+        audio_process = AudioIOProcess(wakeword="jarvis", sensitivity=sensitivity)
+        await asyncio.to_thread(audio_process.start)
+        microphone_bus = audio_process.microphone_bus
+        wakeword_listener = audio_process.wakeword_listener
+        voice_generator = VoiceGenerator(audio_output=audio_process.audio_output)
+        # Auch Tool-Sounds und Standardphrasen laufen über den Audio-Prozess
+        SoundPlayer.route_to(voice_generator)
+        close_audio = audio_process.close
+    else:
+        # Ein einziger Mikrofon-Stream für Wake-Word und STT
+        microphone_bus = MicrophoneBus()
+        microphone_bus.start()
+        wakeword_listener = WakeWordListener(
+            wakeword="jarvis",
+            sensitivity=sensitivity,
+            microphone_bus=microphone_bus
+        )
+        voice_generator = VoiceGenerator()
+        close_audio = microphone_bus.close
+
+    # Jeder Recorder führt seinen eigenen Rauschboden nach; eine geteilte VAD würde
+    # beim Hedging von zwei Threads zugleich (und damit doppelt pro Frame) angepasst
+    def create_voice_activity_detector():
+        return VoiceActivityDetector(
+            end_silence_ms=int(os.getenv("VAD_END_SILENCE_MS", "600")),
+            noise_floor_dbfs=float(os.getenv("VAD_NOISE_FLOOR_DBFS", "-60"))
+        )
+
+    # Google-STT und Folgefenster laufen nie gleichzeitig und teilen sich eine VAD
+    voice_activity_detector = create_voice_activity_detector()
+
+    # Upload-Kodierung für beide STT-Backends: linear16, flac oder ogg_opus (schwache Uplinks)
+    stt_encoding = os.getenv("STT_ENCODING", "linear16")
+    uplink_kbps = os.getenv("UPLINK_KBPS")
+    speech_recognition = SpeechRecognition(
+        microphone_bus=microphone_bus,
+        voice_activity_detector=voice_activity_detector,
+        encoding=stt_encoding,
+        uplink_kbps=float(uplink_kbps) if uplink_kbps else None
+    )
+    # Diktat läuft immer über Google Streaming, auch wenn STT gehedgt wird
+    dictation_mode = DictationMode(speech_recognition, voice_generator=voice_generator)
+    if os.getenv("HEDGED_STT", "0") == "1":
+        # Google und Whisper parallel; das erste gute Transkript gewinnt
+        speech_recognition = HedgedSpeechRecognition(
+            speech_recognition,
+            WhuisperSpeechRecognition(
+                microphone_bus=microphone_bus,
+                voice_activity_detector=create_voice_activity_detector(),
+                transcriber=AudioTranscriber.for_encoding(stt_encoding)
+            )
+        )
+    await asyncio.to_thread(speech_recognition.warm_up)
+    chat_assistant = OpenAIChatAssistant(voice_generator=voice_generator)
+    command_listener = LocalCommandListener(
+        create_default_commands(chat_assistant, dictation=True),
+        microphone_bus=microphone_bus
+    )
+
+    pipeline = VoicePipeline(
+        wakeword_listener, speech_recognition, chat_assistant, command_listener,
+        follow_up_seconds=float(os.getenv("FOLLOW_UP_SECONDS", "4")),
+        voice_activity_detector=voice_activity_detector,
+        speculative_llm=os.getenv("SPECULATIVE_LLM", "0") == "1",
+        dictation_mode=dictation_mode,
+        latency_masker=LatencyMasker(voice_generator, delay_ms=int(os.getenv("FILLER_DELAY_MS", "800")))
+    )
+
+    try:
+        await pipeline.run()
 
     except Exception as e:
         print(f"❌ Fehler: {e}")
 
     finally:
-        wakeword_listener.cleanup()
+        close_audio()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("🛑 Manuelles Beenden.")
@@ -1,4 +1,6 @@
 import re
+import threading
+from utils.latency_tracer import latency_tracer
 
 class TextToSpeechStreamer:
     def __init__(self, voice_generator, min_chunk_size=80, optimal_chunk_size=150, max_chunk_size=250):
@@ -7,6 +9,7 @@ class TextToSpeechStreamer:
         self.MIN_CHUNK_SIZE = min_chunk_size
         self.OPTIMAL_CHUNK_SIZE = optimal_chunk_size
         self.MAX_CHUNK_SIZE = max_chunk_size
+        self._cancelled = threading.Event()
         
         self.BREAK_PATTERNS = [
             r'(?<=[.!?])\s+(?=[A-Z"„\'])',
@@ -33,6 +36,9 @@ class TextToSpeechStreamer:
         processed_segments = set()
         
         for text_chunk in text_stream:
+            if self._cancelled.is_set():
+                return full_response
+
             buffer += text_chunk
             full_response += text_chunk
             
@@ -41,9 +47,18 @@ class TextToSpeechStreamer:
                 
             buffer = self._process_buffer(buffer, processed_segments)
         
-        self._process_remaining_buffer(buffer, processed_segments)
+        if not self._cancelled.is_set():
+            self._process_remaining_buffer(buffer, processed_segments)
         
         return full_response
+
+    def cancel(self):
+        """Bricht die laufende Verarbeitung ab; noch gepufferter Text wird verworfen."""
+        self._cancelled.set()
+
+    def reset(self):
+        """Gibt den Streamer nach einem Abbruch für die nächste Antwort frei."""
+        self._cancelled.clear()
     
     def _process_buffer(self, buffer, processed_segments):
         if len(buffer) < self.OPTIMAL_CHUNK_SIZE:
@@ -105,6 +120,7 @@ class TextToSpeechStreamer:
         def extract_delta_content(chunk):
             if not hasattr(chunk.choices[0].delta, 'content') or chunk.choices[0].delta.content is None:
                 return ""
+            latency_tracer.mark("llm_first_token")
             return chunk.choices[0].delta.content
         
         text_chunks = (extract_delta_content(chunk) for chunk in openai_stream)
@@ -0,0 +1,92 @@
+import argparse
+import json
+from collections import defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, p):
+    """Berechnet das p-Perzentil mit linearer Interpolation (wie numpy.percentile)."""
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def load_turns(log_file, status=None):
+    """Liest alle Durchläufe aus einer JSONL-Datei, optional gefiltert nach Status."""
+    turns = []
+    with open(log_file, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            turn = json.loads(line)
+            if status is None or turn.get("status") == status:
+                turns.append(turn)
+    return turns
+
+
+def summarize(turns):
+    """Aggregiert pro Stufe die Perzentile von Dauer und Zeitpunkt seit dem Wake-Word.
+
+    :return: Dict ``{stage: {"count": n, "end_ms": {p: ...}, "duration_ms": {p: ...}}}``
+    """
+    end_times = defaultdict(list)
+    durations = defaultdict(list)
+
+    for turn in turns:
+        for span in turn.get("spans", []):
+            end_times[span["name"]].append(span["end_ms"])
+            durations[span["name"]].append(span["duration_ms"])
+        if "total_ms" in turn:
+            end_times["total"].append(turn["total_ms"])
+            durations["total"].append(turn["total_ms"])
+
+    return {
+        stage: {
+            "count": len(end_times[stage]),
+            "end_ms": {p: percentile(end_times[stage], p) for p in PERCENTILES},
+            "duration_ms": {p: percentile(durations[stage], p) for p in PERCENTILES},
+        }
+        for stage in end_times
+    }
+
+
+def format_report(summary):
+    """Formatiert die Zusammenfassung als Tabelle, sortiert nach medianem Zeitpunkt."""
+    header = f"{'Stufe':<28}{'n':>6}" + "".join(
+        f"{f'ab Wake p{p}':>14}" for p in PERCENTILES
+    ) + "".join(f"{f'Dauer p{p}':>12}" for p in PERCENTILES)
+
+    lines = [header, "-" * len(header)]
+    for stage, stats in sorted(summary.items(), key=lambda item: item[1]["end_ms"][50]):
+        row = f"{stage:<28}{stats['count']:>6}"
+        row += "".join(f"{stats['end_ms'][p]:>14.1f}" for p in PERCENTILES)
+        row += "".join(f"{stats['duration_ms'][p]:>12.1f}" for p in PERCENTILES)
+        lines.append(row)
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perzentil-Report über Latenz-Traces (JSONL).")
+    parser.add_argument("log_file", nargs="?", default="latency_trace.jsonl")
+    parser.add_argument("--status", default="completed",
+                        help="Nur Durchläufe mit diesem Status auswerten ('all' für alle).")
+    parser.add_argument("--json", action="store_true", help="Ausgabe als JSON statt Tabelle.")
+    args = parser.parse_args()
+
+    selected_turns = load_turns(args.log_file, None if args.status == "all" else args.status)
+    report = summarize(selected_turns)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"📊 {len(selected_turns)} Durchläufe aus {args.log_file}\n")
+        print(format_report(report))
@@ -0,0 +1,104 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class LatencyTracer:
+    """Erfasst Latenz-Spans pro Gesprächsdurchlauf und schreibt sie als JSONL.
+
+    Alle Zeitpunkte werden mit ``time.perf_counter()`` gemessen und relativ zum
+    Beginn des Durchlaufs (Wake-Word) in Millisekunden gespeichert. Spans und
+    Marker außerhalb eines aktiven Durchlaufs werden ignoriert, z. B. die
+    Sprachausgabe eines abgelaufenen Pomodoro-Timers.
+    """
+
+    def __init__(self, log_file="latency_trace.jsonl", enabled=True):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.log_file = log_file
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._turn = None
+
+    def start_turn(self, start_time=None):
+        """Beginnt einen neuen Durchlauf; ein noch offener wird als abgebrochen verworfen."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._turn is not None:
+                self.logger.warning("⚠️ Durchlauf %s wurde nicht beendet", self._turn["turn_id"])
+
+            self._turn = {
+                "turn_id": uuid.uuid4().hex[:12],
+                "started_at": datetime.now().isoformat(timespec="milliseconds"),
+                "t0": start_time if start_time is not None else time.perf_counter(),
+                "spans": [],
+                "annotations": {},
+            }
+
+    def record_span(self, name, start, end=None):
+        """Speichert einen Span mit absoluten perf_counter-Zeitpunkten."""
+        end = end if end is not None else time.perf_counter()
+
+        with self._lock:
+            if self._turn is None:
+                return
+
+            t0 = self._turn["t0"]
+            self._turn["spans"].append({
+                "name": name,
+                "start_ms": round((start - t0) * 1000, 2),
+                "end_ms": round((end - t0) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+            })
+
+    @contextmanager
+    def span(self, name):
+        """Kontextmanager, der die Laufzeit des Blocks als Span erfasst."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, start)
+
+    def mark(self, name, first_only=True):
+        """Speichert einen Zeitpunkt; mit first_only zählt nur das erste Auftreten."""
+        now = time.perf_counter()
+
+        with self._lock:
+            if self._turn is None:
+                return
+            if first_only and any(span["name"] == name for span in self._turn["spans"]):
+                return
+
+        self.record_span(name, now, now)
+
+    def annotate(self, key, value):
+        """Hängt zusätzliche Metadaten an den aktuellen Durchlauf an."""
+        with self._lock:
+            if self._turn is not None:
+                self._turn["annotations"][key] = value
+
+    def end_turn(self, status="completed"):
+        """Schließt den Durchlauf ab und hängt ihn als eine JSON-Zeile an die Logdatei an."""
+        with self._lock:
+            turn, self._turn = self._turn, None
+
+        if turn is None:
+            return
+
+        total_ms = round((time.perf_counter() - turn.pop("t0")) * 1000, 2)
+        record = {**turn, "status": status, "total_ms": total_ms}
+
+        try:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.error("❌ Latenz-Trace konnte nicht geschrieben werden: %s", e)
+
+
+latency_tracer = LatencyTracer()
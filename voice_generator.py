@@ -8,22 +8,36 @@ import threading
 import queue
 import time
 import uuid
+from utils.latency_tracer import latency_tracer
 
 class VoiceGenerator:
-    def __init__(self, voice="nova", cache_dir="/tmp/tts_cache"):
-        """Initialisiert den TTS Generator mit OpenAI API und Vorausverarbeitung"""
-        self.openai = OpenAI()
+    def __init__(self, voice="nova", cache_dir="/tmp/tts_cache", openai_client=None, audio_output=None):
+        """Initialisiert den TTS Generator mit OpenAI API und Vorausverarbeitung
+
+        :param audio_output: Optionale Ausgabe statt pygame im eigenen Prozess,
+            z. B. RemoteAudioOutput des Audio-Prozesses
+        """
+        self.openai = openai_client or OpenAI()
         self.voice = voice
         self.cache_dir = cache_dir
+        self.audio_output = audio_output
         
         os.makedirs(self.cache_dir, exist_ok=True)
         
+        self._channel = None
         self._setup_ffmpeg()
-        self._setup_pygame()
+        if self.audio_output is None:
+            self._setup_pygame()
         self._audio_lock = threading.Lock()
         
         self.text_queue = queue.Queue()
         self.audio_queue = queue.Queue()  
+        self._playback_listeners = []
+        # Wird bei jedem Abbruch erhöht, damit veraltete Aufträge verworfen werden
+        self._generation = 0
+        # Füller (vorab gerenderte Überbrückungsphrasen) haben kein Text-Element
+        self._filler_lock = threading.Lock()
+        self._playing_filler = False
         
         self.active = True
         self.tts_worker = threading.Thread(target=self._process_tts_queue, daemon=True)
@@ -46,6 +60,10 @@ class VoiceGenerator:
         try:
             pygame.mixer.quit()  
             pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
+            # Kanal 0 ist für die Sprachausgabe reserviert, damit Effekt-Sounds
+            # (z. B. der Wake-Sound) sie nicht verdrängen und stop() nur sie trifft
+            pygame.mixer.set_reserved(1)
+            self._channel = pygame.mixer.Channel(0)
         except Exception as e:
             print(f"❌ Pygame Initialisierungsfehler: {e}")
     
@@ -53,42 +71,44 @@ class VoiceGenerator:
         """Worker-Thread, der Texte in Audio umwandelt und zur Wiedergabe vorbereitet"""
         while self.active:
             try:
-                text = self.text_queue.get(timeout=0.5)
-                
-                if not text.strip():
-                    self.text_queue.task_done()
+                generation, text = self.text_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if not text.strip() or generation != self._generation:
                     continue
                 
                 audio_data = self._generate_speech(text)
                 
-                if audio_data:
-                    self.audio_queue.put((text, audio_data))
+                if audio_data and generation == self._generation:
+                    self.audio_queue.put((generation, text, audio_data))
                 
-                self.text_queue.task_done()
-                
-            except queue.Empty:
-                pass
             except Exception as e:
                 print(f"❌ TTS-Verarbeitungsfehler: {e}")
+            finally:
+                self.text_queue.task_done()
     
     def _process_audio_queue(self):
         """Worker-Thread, der vorbereitete Audiodateien abspielt"""
         while self.active:
             try:
                 # Hole die nächste Audio-Datei aus der Queue
-                text, audio_data = self.audio_queue.get(timeout=0.5)
-                
-                # Spiele die Audio-Datei ab
-                self._play_audio(audio_data)
-                
-                # Markiere Aufgabe als erledigt
-                self.audio_queue.task_done()
-                
+                generation, text, audio_data = self.audio_queue.get(timeout=0.5)
             except queue.Empty:
                 # Queue Timeout, setze Schleife fort
-                pass
+                continue
+
+            try:
+                # Spiele die Audio-Datei ab, sofern sie nicht abgebrochen wurde
+                if generation == self._generation:
+                    self._playing_filler = text is None
+                    self._play_audio(audio_data, generation)
             except Exception as e:
                 print(f"❌ Audio-Wiedergabefehler: {e}")
+            finally:
+                # Markiere Aufgabe als erledigt
+                self.audio_queue.task_done()
     
     def _generate_speech(self, text):
         """Generiert Sprache mit OpenAI TTS und gibt das Audio-Segment zurück"""
@@ -97,66 +117,145 @@ class VoiceGenerator:
             text_hash = str(uuid.uuid4())[:8]
             cache_path = os.path.join(self.cache_dir, f"tts_{text_hash}.mp3")
             
-            # Generiere die Sprachdatei mit OpenAI
-            response = self.openai.audio.speech.create(
+            # Generiere die Sprachdatei mit OpenAI; gestreamt, um das erste Byte zu messen
+            audio_stream = BytesIO()
+            with self.openai.audio.speech.with_streaming_response.create(
                 model="tts-1",
                 voice=self.voice,
                 input=text
-            )
+            ) as response:
+                for chunk in response.iter_bytes():
+                    latency_tracer.mark("tts_first_byte")
+                    audio_stream.write(chunk)
             
             # Speichere die MP3 im Cache
             with open(cache_path, "wb") as f:
-                f.write(response.content)
+                f.write(audio_stream.getvalue())
             
-            # Lade die MP3 direkt aus der API-Antwort
-            audio_stream = BytesIO(response.content)
-            audio = AudioSegment.from_file(audio_stream, format="mp3")
-            
-            return audio
+            return self._decode_speech(audio_stream.getvalue())
             
         except Exception as e:
             print(f"❌ Fehler bei der Sprachgenerierung: {e}")
             return None
     
-    def _play_audio(self, audio_data):
+    def _decode_speech(self, mp3_bytes):
+        """Dekodiert die MP3-Antwort der TTS-API in ein AudioSegment"""
+        return AudioSegment.from_file(BytesIO(mp3_bytes), format="mp3")
+
+    def _play_audio(self, audio_data, generation):
         """Spielt die Audiodaten ab mit Sperrmechanismus zur Vermeidung überlappender Wiedergabe"""
+        if self.audio_output is not None:
+            self._play_audio_output(audio_data, generation)
+            return
+
         with self._audio_lock:
+            audio_io = BytesIO()
             try:
                 if not pygame.mixer.get_init():
                     self._setup_pygame()
                 
-                audio_io = BytesIO()
                 audio_data.export(audio_io, format="wav")
                 audio_io.seek(0)
                 
-                pygame.mixer.music.load(audio_io)
-                pygame.mixer.music.play()
+                sound = pygame.mixer.Sound(file=audio_io)
+                self._channel.play(sound)
+                self._notify_playback_started()
                 
-                while pygame.mixer.music.get_busy():
-                    pygame.time.wait(100)
+                # Kurzes Polling-Intervall, damit ein Abbruch sofort greift
+                while self._channel.get_busy() and generation == self._generation:
+                    pygame.time.wait(20)
                     
             except Exception as e:
                 print(f"❌ Wiedergabefehler: {e}")
             finally:
-                pygame.mixer.music.stop()
+                if self._channel:
+                    self._channel.stop()
                 audio_io.close()
 
+    def _play_audio_output(self, audio_data, generation):
+        """Übergibt das Audio als rohes PCM an die externe Ausgabe und wartet auf das Ende"""
+        with self._audio_lock:
+            pcm = (audio_data
+                   .set_frame_rate(self.audio_output.sample_rate)
+                   .set_channels(self.audio_output.channels)
+                   .set_sample_width(2)
+                   .raw_data)
+            self.audio_output.play(
+                pcm,
+                on_started=self._notify_playback_started,
+                is_current=lambda: generation == self._generation
+            )
+
+    def add_playback_listener(self, callback):
+        """Registriert einen Callback, der bei jedem Wiedergabestart aufgerufen wird."""
+        self._playback_listeners.append(callback)
+
+    def _notify_playback_started(self):
+        latency_tracer.mark("filler_start" if self._playing_filler else "playback_start")
+        for callback in self._playback_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Fehler im Wiedergabe-Listener: {e}")
+
+    def wait_until_idle(self):
+        """Blockiert, bis alle Texte generiert und alle Audios abgespielt wurden."""
+        self.text_queue.join()
+        self.audio_queue.join()
+
     def speak(self, text):
         """Fügt einen Text zur Sprachqueue für die Verarbeitung hinzu.
-        interrupt=True bewirkt, dass vorherige Aufträge abgebrochen werden."""
+        Die Chunks werden in Reihenfolge generiert und nacheinander abgespielt."""
         if not text.strip():
             return
 
-        self._interrupt_playback()  
-        self.text_queue.put(text)
+        self.text_queue.put((self._generation, text))
+
+    def play_filler(self, audio_data):
+        """Spielt eine vorab gerenderte Überbrückungsphrase, solange noch keine Antwort ansteht.
+
+        Die Phrase läuft über dieselbe Queue wie die Sprachausgabe; echte Sprache,
+        die währenddessen fertig wird, schließt also lückenlos an.
+
+        :return: True, wenn die Phrase eingereiht wurde
+        """
+        with self._filler_lock:
+            if self.audio_queue.unfinished_tasks:
+                return False
+            self.audio_queue.put((self._generation, None, audio_data))
+            return True
+
+    def play_clip(self, audio_data):
+        """Reiht einen fertigen Sound (Tool-Antwort, Standardphrase) hinter der Sprachausgabe ein.
+
+        Wie Sprache wird er per stop() verworfen; mit audio_output bleibt der
+        Wiedergabe-Thread so der einzige Schreiber.
+        """
+        self.audio_queue.put((self._generation, "", audio_data))
+
+    def stop(self):
+        """Bricht die laufende Sprachausgabe sofort ab (Barge-in).
+
+        Bereits eingereihte Texte und Audios werden verworfen; TTS-Anfragen, die
+        gerade laufen, werden nach ihrer Rückkehr anhand der Generation ignoriert.
+        """
+        self._generation += 1
+        self._clear_queues()
+        self._interrupt_playback()
             
     def _interrupt_playback(self):
-        with self._audio_lock:
-            if pygame.mixer.get_init():
-                pygame.mixer.music.stop()
+        # Bewusst ohne _audio_lock: der Wiedergabe-Thread hält ihn während der
+        # gesamten Wiedergabe, der Abbruch darf darauf nicht warten
+        if self.audio_output is not None:
+            self.audio_output.stop()
+        elif self._channel and pygame.mixer.get_init():
+            self._channel.stop()
 
     def _clear_queues(self):
-        with self.text_queue.mutex:
-            self.text_queue.queue.clear()
-        with self.audio_queue.mutex:
-            self.audio_queue.queue.clear()
\ No newline at end of file
+        for pending in (self.text_queue, self.audio_queue):
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    break
+                pending.task_done()
\ No newline at end of file
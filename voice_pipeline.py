@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import time
+from enum import Enum
+from audio.voice_activity_detector import VoiceActivityDetector
+from utils.latency_tracer import latency_tracer
+
+
+class PipelineState(Enum):
+    """Zustände eines Gesprächsdurchlaufs."""
+    IDLE = "idle"
+    LISTENING = "listening"
+    THINKING = "thinking"
+    SPEAKING = "speaking"
+
+
+class VoicePipeline:
+    """Ereignisgesteuerte Sprachpipeline: idle → listening → thinking → speaking.
+
+    Jede Stufe läuft als eigener asyncio-Task und übergibt ihr Ergebnis über eine
+    Queue an die nächste Stufe. Blockierende Arbeit (Porcupine, Google STT,
+    Audiowiedergabe) wird in Threads ausgelagert, damit der Event-Loop frei bleibt.
+
+    Die Wake-Word-Erkennung bleibt während thinking/speaking aktiv: wird das
+    Wake-Word erneut erkannt, bricht die Pipeline die laufende Antwort ab
+    (Barge-in) und hört direkt auf die neue Anfrage.
+
+    Mit einem LocalCommandListener laufen lokale Befehlserkennung und STT
+    parallel ab demselben Frame; kurze Befehle wie "lauter" werden direkt
+    ausgeführt, ohne auf Google STT oder das LLM zu warten.
+
+    Nach einer Antwort bleibt die Pipeline ``follow_up_seconds`` lang im
+    Folgefenster: Sobald die VAD Sprache erkennt, startet STT ohne Wake-Word.
+    Stille kostet dabei keine API-Zeit, weil die Google-Session erst mit dem
+    Sprachbeginn geöffnet wird.
+
+    Mit ``speculative_llm`` startet die erste LLM-Anfrage bereits, sobald ein
+    Zwischenergebnis der STT stabil ist. Passt das finale Transkript, spart das
+    einen Roundtrip; sonst wird die Spekulation verworfen.
+
+    Mit einem DictationMode startet "Diktat starten" ein langes Diktat in die
+    Notion-Zwischenablage; das Wake-Word bleibt bis zu dessen Ende pausiert.
+    """
+
+    def __init__(self, wakeword_listener, speech_recognition, chat_assistant, command_listener=None,
+                 follow_up_seconds=0, voice_activity_detector=None, follow_up_preroll_ms=300,
+                 latency_masker=None, speculative_llm=False, dictation_mode=None):
+        """
+        :param command_listener: Optionaler LocalCommandListener für lokale Befehle
+        :param follow_up_seconds: Dauer des Folgefensters nach einer Antwort (0 = aus)
+        :param voice_activity_detector: VAD für das Folgefenster
+        :param follow_up_preroll_ms: Audio vor dem erkannten Sprachbeginn, das mit an STT geht
+        :param latency_masker: Optionaler LatencyMasker, der lange Denkpausen überbrückt
+        :param speculative_llm: LLM-Anfrage auf stabilen STT-Zwischenergebnissen vorziehen
+        :param dictation_mode: Optionaler DictationMode für lange Diktate
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.wakeword_listener = wakeword_listener
+        self.speech_recognition = speech_recognition
+        self.chat_assistant = chat_assistant
+        self.command_listener = command_listener
+        self.follow_up_seconds = follow_up_seconds
+        self.voice_activity_detector = voice_activity_detector or VoiceActivityDetector()
+        self.follow_up_preroll_ms = follow_up_preroll_ms
+        self.latency_masker = latency_masker
+        self.speculative_llm = speculative_llm
+        self.dictation_mode = dictation_mode
+
+        self.state = PipelineState.IDLE
+        self._wakeword_events = asyncio.Queue()
+        self._transcripts = asyncio.Queue()
+        self._loop = None
+        self._tasks = []
+        self._response_task = None
+
+    async def run(self):
+        """Startet alle Stufen und läuft, bis der Wake-Word-Listener beendet wird."""
+        self._loop = asyncio.get_running_loop()
+        self.chat_assistant.voice_generator.add_playback_listener(self._on_playback_started)
+        if self.speculative_llm:
+            self.speech_recognition.on_stable_interim = self._on_stable_interim
+
+        self._tasks = [
+            asyncio.create_task(self._wakeword_stage(), name="wakeword"),
+            asyncio.create_task(self._listening_stage(), name="listening"),
+            asyncio.create_task(self._response_stage(), name="response"),
+        ]
+
+        try:
+            # Die Wake-Word-Stufe endet nur, wenn der Listener gestoppt wurde
+            await self._tasks[0]
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Beendet alle Stufen und gibt die Audio-Ressourcen frei."""
+        self.wakeword_listener.cleanup()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _set_state(self, state: PipelineState):
+        if state is self.state:
+            return
+        self.logger.info("🔄 %s → %s", self.state.value, state.value)
+        self.state = state
+
+    async def _wakeword_stage(self):
+        """Wartet im Hintergrund-Thread auf das Wake-Word und meldet es weiter."""
+        while True:
+            detected = await asyncio.to_thread(self.wakeword_listener.listen_for_wakeword)
+            if not detected:
+                return
+
+            if self.state is PipelineState.LISTENING:
+                continue
+
+            if self.state in (PipelineState.THINKING, PipelineState.SPEAKING):
+                self._barge_in()
+
+            latency_tracer.start_turn(self.wakeword_listener.last_detection_started)
+            latency_tracer.record_span("wake_word", self.wakeword_listener.last_detection_started)
+
+            self.wakeword_listener.pause_listening()
+            self._set_state(PipelineState.LISTENING)
+
+            # STT-Stream sofort öffnen, damit der Verbindungsaufbau nicht in der Anfrage liegt
+            detection_frame = self.wakeword_listener.last_detection_frame
+            self.speech_recognition.arm(detection_frame + 1 if detection_frame is not None else None)
+            await self._wakeword_events.put(False)
+
+    async def _listening_stage(self):
+        """Nimmt nach dem Wake-Word oder im Folgefenster die Nutzeranfrage auf."""
+        while True:
+            follow_up = await self._wakeword_events.get()
+
+            if follow_up:
+                start_frame = await self._wait_for_follow_up()
+                if start_frame is None:
+                    self._set_state(PipelineState.IDLE)
+                    self.wakeword_listener.resume_listening()
+                    continue
+            else:
+                # Ab dem Frame nach dem Wake-Word aufnehmen, damit "Jarvis, wie wird ..."
+                # ohne Pause funktioniert
+                detection_frame = self.wakeword_listener.last_detection_frame
+                start_frame = detection_frame + 1 if detection_frame is not None else None
+
+            try:
+                with latency_tracer.span("stt"):
+                    transcript, command = await self._recognize(start_frame)
+            except Exception as e:
+                self.logger.error("❌ Fehler bei der Spracherkennung: %s", e)
+                transcript, command = "", None
+
+            if command or not transcript or self._is_dictation_request(transcript, command):
+                self.chat_assistant.discard_speculation()
+
+            if self._is_dictation_request(transcript, command):
+                await self._dictate()
+                continue
+
+            if command:
+                self._finish_turn(status="local_command")
+                continue
+
+            if not transcript:
+                self._finish_turn(status="no_speech")
+                continue
+
+            latency_tracer.annotate("transcript_chars", len(transcript))
+
+            print(f"🗣 Erkannt: {transcript}")
+            self._set_state(PipelineState.THINKING)
+            # Ab hier darf das Wake-Word die Antwort wieder unterbrechen
+            self.wakeword_listener.resume_listening()
+            await self._transcripts.put(transcript)
+
+    def _is_dictation_request(self, transcript, command):
+        if self.dictation_mode is None:
+            return False
+        return self.dictation_mode.is_start_request(command) or self.dictation_mode.is_start_request(transcript)
+
+    async def _dictate(self):
+        """Führt ein Diktat aus; der Durchlauf endet erst mit dem Diktat."""
+        latency_tracer.annotate("dictation", True)
+        try:
+            await self.dictation_mode.run()
+        except Exception as e:
+            self.logger.error("❌ Fehler im Diktat: %s", e)
+        self._finish_turn(status="dictation")
+
+    async def _wait_for_follow_up(self):
+        """Wartet im Folgefenster per VAD auf Sprache.
+
+        :return: Startframe für STT oder None, wenn das Fenster ohne Sprache abläuft
+        """
+        microphone_bus = self.speech_recognition.microphone_bus
+        subscription = microphone_bus.subscribe("follow_up")
+        speech_frame = await asyncio.to_thread(
+            self.voice_activity_detector.wait_for_speech, subscription, self.follow_up_seconds
+        )
+        if speech_frame is None:
+            self.logger.info("⌛ Folgefenster ohne Sprache beendet")
+            return None
+
+        # Der Durchlauf beginnt mit dem Sprachbeginn statt mit dem Wake-Word
+        speech_started = time.perf_counter() - (subscription.cursor - speech_frame) * microphone_bus.frame_duration
+        latency_tracer.start_turn(speech_started)
+        latency_tracer.annotate("follow_up", True)
+
+        preroll_frames = round(self.follow_up_preroll_ms / 1000 / microphone_bus.frame_duration)
+        return max(0, speech_frame - preroll_frames)
+
+    async def _recognize(self, start_frame):
+        """Lässt lokale Befehlserkennung und STT gegeneinander laufen.
+
+        :return: (Transkript, None) oder ("", Befehl), wenn ein lokaler Befehl ausgeführt wurde
+        """
+        stt_task = asyncio.create_task(
+            asyncio.to_thread(self.speech_recognition.record_user_prompt, start_frame)
+        )
+        if self.command_listener is None:
+            return await stt_task, None
+
+        command_started = time.perf_counter()
+        command_task = asyncio.create_task(
+            asyncio.to_thread(self.command_listener.listen_for_command, start_frame)
+        )
+        await asyncio.wait({stt_task, command_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if command_task.done() and command_task.result():
+            command = command_task.result()
+            self.speech_recognition.cancel()
+            await asyncio.to_thread(self.command_listener.execute, command)
+            latency_tracer.record_span("local_command", command_started)
+            latency_tracer.annotate("local_command", command)
+            # Den abgebrochenen STT-Stream auslaufen lassen, bevor der nächste beginnt
+            await asyncio.wait({stt_task})
+            return "", command
+
+        # STT war schneller oder es wurde kein Befehl gesagt
+        self.command_listener.cancel()
+        await asyncio.wait({command_task})
+        return await stt_task, None
+
+    async def _response_stage(self):
+        """Führt je Transkript einen abbrechbaren Antwort-Task aus."""
+        while True:
+            transcript = await self._transcripts.get()
+
+            self._response_task = asyncio.create_task(self._respond(transcript), name="respond")
+            # asyncio.wait statt await: ein Barge-in bricht nur die Antwort ab, nicht die Stufe
+            await asyncio.wait({self._response_task})
+
+            if self._response_task.cancelled():
+                continue
+
+            if self._response_task.exception():
+                self.logger.error("❌ Fehler bei der Antwortgenerierung: %s", self._response_task.exception())
+
+            # Ein Barge-in kann bereits den nächsten Durchlauf gestartet haben
+            if self.state in (PipelineState.THINKING, PipelineState.SPEAKING):
+                self._finish_turn()
+                if self.follow_up_seconds and not self._response_task.exception():
+                    await self._start_follow_up()
+
+    async def _start_follow_up(self):
+        """Hält STT nach der Antwort für das Folgefenster bereit, ohne Wake-Word."""
+        self.logger.info("👂 Folgefenster offen (%.1f s)", self.follow_up_seconds)
+        self.wakeword_listener.pause_listening()
+        self._set_state(PipelineState.LISTENING)
+        await self._wakeword_events.put(True)
+
+    async def _respond(self, transcript):
+        """Erzeugt die Antwort und wartet, bis die Sprachausgabe beendet ist."""
+        masking = None
+        if self.latency_masker is not None:
+            masking = asyncio.create_task(
+                self.latency_masker.mask(lambda: self.state is PipelineState.THINKING)
+            )
+
+        try:
+            await self.chat_assistant.speak_response(transcript)
+            await asyncio.to_thread(self.chat_assistant.voice_generator.wait_until_idle)
+        finally:
+            if masking is not None:
+                masking.cancel()
+
+    def _barge_in(self):
+        """Bricht OpenAI-Stream, TTS-Queues und Wiedergabe der laufenden Antwort ab."""
+        self.logger.info("✋ Barge-in: laufende Antwort wird abgebrochen")
+        self.chat_assistant.cancel_response()
+        latency_tracer.end_turn(status="barge_in")
+
+        if self._response_task and not self._response_task.done():
+            self._response_task.cancel()
+
+    def _on_stable_interim(self, transcript):
+        """Wird vom STT-Timer-Thread mit einem stabilen Zwischenergebnis aufgerufen."""
+        self._loop.call_soon_threadsafe(self._speculate, transcript)
+
+    def _speculate(self, transcript):
+        if self.state is PipelineState.LISTENING:
+            latency_tracer.mark("llm_speculation")
+            self.chat_assistant.speculate(transcript)
+
+    def _on_playback_started(self):
+        """Wird vom Wiedergabe-Thread des VoiceGenerators aufgerufen."""
+        self._loop.call_soon_threadsafe(self._enter_speaking)
+
+    def _enter_speaking(self):
+        if self.state is PipelineState.THINKING:
+            self._set_state(PipelineState.SPEAKING)
+
+    def _finish_turn(self, status="completed"):
+        latency_tracer.end_turn(status=status)
+        self._set_state(PipelineState.IDLE)
+        self.wakeword_listener.resume_listening()
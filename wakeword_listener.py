@@ -1,88 +1,168 @@
 import os
+from collections import deque
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import pvporcupine
-import pyaudio
-import numpy as np
+from audio.capture.microphone_bus import MicrophoneBus
 from audio.sound_player import SoundPlayer
+import queue
 import threading
 import time
 import logging
 
+
+@dataclass
+class WakeWordStats:
+    """Laufzeitzähler des Detektions-Workers."""
+    frames_processed: int = 0
+    detections: int = 0
+    max_queue_depth: int = 0
+    max_processing_ms: float = 0.0
+    total_processing_ms: float = 0.0
+    recent_processing_ms: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record_frame(self, processing_ms):
+        self.frames_processed += 1
+        self.total_processing_ms += processing_ms
+        self.max_processing_ms = max(self.max_processing_ms, processing_ms)
+        self.recent_processing_ms.append(processing_ms)
+
+    @property
+    def avg_processing_ms(self):
+        return self.total_processing_ms / self.frames_processed if self.frames_processed else 0.0
+
+    @property
+    def p95_processing_ms(self):
+        if not self.recent_processing_ms:
+            return 0.0
+        ordered = sorted(self.recent_processing_ms)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
 class WakeWordListener:
     """Erkennt das Wake-Word und gibt ein Signal aus."""
 
-    def __init__(self, wakeword="jarvis"):
-        """Initialisiert die Wake-Word-Erkennung."""
+    def __init__(self, wakeword="jarvis", sensitivity=0.8, porcupine_handle=None, microphone_bus=None):
+        """Initialisiert die Wake-Word-Erkennung.
+
+        :param sensitivity: Porcupine-Empfindlichkeit zwischen 0 und 1
+        :param porcupine_handle: Optionaler Porcupine-kompatibler Detektor (z. B. für Benchmarks)
+        :param microphone_bus: Geteilter MicrophoneBus; ohne Angabe wird ein eigener geöffnet
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.info("🔧 Initialisiere Wake-Word Listener mit Wort: %s", wakeword)
         
         self.wakeword = wakeword
-        self.handle = pvporcupine.create(
+        self.handle = porcupine_handle or pvporcupine.create(
             access_key=self.load_access_key(),
             keywords=[wakeword],
-            sensitivities=[0.8]
+            sensitivities=[sensitivity]
         )
 
-        # Separate PyAudio-Instanz für Input
-        self.pa_input = pyaudio.PyAudio()
-        self.stream = self.pa_input.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            frames_per_buffer=self.handle.frame_length,
-            stream_callback=self._audio_callback
-        )
+        self._owns_microphone_bus = microphone_bus is None
+        self.microphone_bus = microphone_bus or MicrophoneBus(frame_length=self.handle.frame_length)
+        if self.microphone_bus.frame_length != self.handle.frame_length:
+            raise ValueError(
+                f"Frame-Länge des Mikrofon-Bus ({self.microphone_bus.frame_length}) "
+                f"passt nicht zu Porcupine ({self.handle.frame_length})"
+            )
+        self.subscription = self.microphone_bus.subscribe("wakeword")
         
         # Flags für Status
         self.is_listening = False
         self.should_stop = False
-        self._detection_event = threading.Event()
+        self._paused = False
+        self.last_detection_started = None
+        self.last_detection_frame = None
         
         # Separate Instanz für Sound-Player
         self.sound_player = SoundPlayer("./wakesound.mp3")
 
-    def _audio_callback(self, in_data, frame_count, time_info, status):
-        """Callback für Audio-Processing"""
-        if self.is_listening and not self.should_stop:
-            pcm = np.frombuffer(in_data, dtype=np.int16)
-            keyword_index = self.handle.process(pcm)
-            
-            if keyword_index >= 0:
-                self.logger.info("🚀 Wake-Word erkannt!")
-                self._detection_event.set()
-                self.sound_player.play_audio()
-        
-        return (in_data, pyaudio.paContinue)
+        # Porcupine läuft in einem eigenen Worker, unabhängig davon, ob gerade
+        # jemand auf das Wake-Word wartet; Erkennungen werden gepuffert
+        self.stats = WakeWordStats()
+        self._detections = queue.Queue()
+        self._reported_drops = 0
+        self._worker = threading.Thread(target=self._detection_loop, name="wakeword-detection", daemon=True)
+        self._worker.start()
+
+    def _process_frame(self, pcm):
+        """Führt Porcupine auf einem Frame aus und gibt True bei Erkennung zurück."""
+        return self.handle.process(pcm) >= 0
+
+    def _detection_loop(self):
+        """Worker-Thread: liest Frames vom Bus und führt Porcupine darauf aus."""
+        while not self.should_stop:
+            # Frames, die während einer Pause eintreffen, werden gelesen und verworfen
+            frames = self.subscription.read(timeout=0.1)
+            first_index = self.subscription.cursor - len(frames)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, len(frames))
+            self._report_dropped_frames()
+
+            for offset, pcm in enumerate(frames):
+                if not self.is_listening or self.should_stop:
+                    continue
+
+                frame_started = time.perf_counter()
+                detected = self._process_frame(pcm)
+                self.stats.record_frame((time.perf_counter() - frame_started) * 1000)
+
+                if detected:
+                    self.stats.detections += 1
+                    self._detections.put((frame_started, first_index + offset))
+
+    def _report_dropped_frames(self):
+        if self.subscription.dropped_frames > self._reported_drops:
+            self.logger.warning("⚠️ Wake-Word-Worker zu langsam: %d Frames verworfen",
+                                self.subscription.dropped_frames - self._reported_drops)
+            self._reported_drops = self.subscription.dropped_frames
 
     def listen_for_wakeword(self):
         """Hört auf das Wake-Word und gibt True zurück, wenn erkannt."""
         self.logger.info("🎤 Warte auf Wake-Word...")
-        self.is_listening = True
-        self.stream.start_stream()
+        self.is_listening = not self._paused
         
-        # Warten auf Erkennung mit Timeout
         while not self.should_stop:
-            if self._detection_event.wait(timeout=0.1):  # 100ms Timeout
-                self._detection_event.clear()
-                return True
+            try:
+                frame_started, frame_index = self._detections.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            self.logger.info("🚀 Wake-Word erkannt!")
+            self.last_detection_started = frame_started
+            self.last_detection_frame = frame_index
+            # Abspielen erst hier, nicht im Detektionspfad
+            self.sound_player.play_audio()
+            return True
         
         return False
 
+    def get_stats(self):
+        """Zähler für Überläufe, Rückstau und Verarbeitungszeit pro Frame."""
+        return {
+            "input_overflows": self.microphone_bus.overflow_count,
+            "dropped_frames": self.subscription.dropped_frames,
+            "queue_depth": self.subscription.pending_frames,
+            "max_queue_depth": self.stats.max_queue_depth,
+            "frames_processed": self.stats.frames_processed,
+            "detections": self.stats.detections,
+            "avg_processing_ms": round(self.stats.avg_processing_ms, 3),
+            "p95_processing_ms": round(self.stats.p95_processing_ms, 3),
+            "max_processing_ms": round(self.stats.max_processing_ms, 3),
+        }
+
     def cleanup(self):
         """Ressourcen aufräumen."""
         self.logger.info("🧹 Räume Wake-Word-Listener auf...")
         self.should_stop = True
         self.is_listening = False
         
-        # Warte kurz, damit laufende Operationen beendet werden können
-        time.sleep(0.2)
+        # Warte, bis der Worker den aktuellen Frame abgeschlossen hat
+        self._worker.join(timeout=1)
+        self.logger.info("📊 Wake-Word-Statistik: %s", self.get_stats())
         
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        if self.pa_input:
-            self.pa_input.terminate()
+        if self._owns_microphone_bus:
+            self.microphone_bus.close()
         if self.handle:
             self.handle.delete()
         
@@ -95,8 +175,10 @@ class WakeWordListener:
 
     def pause_listening(self):
         """Pausiert die Wake-Word-Erkennung temporär"""
+        self._paused = True
         self.is_listening = False
         
     def resume_listening(self):
         """Setzt die Wake-Word-Erkennung fort"""
+        self._paused = False
         self.is_listening = True
\ No newline at end of file
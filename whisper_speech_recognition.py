@@ -1,76 +1,192 @@
-import queue
 import wave
 import os
-import time
-import sounddevice as sd
 import numpy as np
 from openai import OpenAI
 from dotenv import load_dotenv
+from audio.capture.microphone_bus import MicrophoneBus
+from audio_transcriber import AudioTranscriber, IncrementalTranscription
+from utils.latency_tracer import latency_tracer
 
 
 class WhuisperSpeechRecognition:
-    def __init__(self, samplerate=16000):
-        """Initialisiert die OpenAI Whisper API-Anbindung"""
+    def __init__(self, microphone_bus=None, max_utterance_seconds=30, energy_window_seconds=0.5, transcriber=None,
+                 voice_activity_detector=None):
+        """Initialisiert die OpenAI Whisper API-Anbindung
+
+        :param microphone_bus: Geteilter MicrophoneBus; ohne Angabe wird ein eigener geöffnet
+        :param max_utterance_seconds: Obergrenze einer Aufnahme; bestimmt die Größe des Aufnahmepuffers
+        :param energy_window_seconds: Fenster für Pegel und Spitzenwert bei der Stilleerkennung
+        :param transcriber: AudioTranscriber für transcribe_utterance; ohne Angabe ein eigener
+        :param voice_activity_detector: Optionale VAD; bestimmt dann Sprachbeginn und -ende
+            statt der Spitzenwert-Schwelle
+        """
         self.openai = OpenAI()
         self.set_open_ai_key()
-        self.samplerate = samplerate
-        self.audio_queue = queue.Queue()
+        self.microphone_bus = microphone_bus or MicrophoneBus()
+        self.transcriber = transcriber or AudioTranscriber()
+        self.samplerate = self.microphone_bus.sample_rate
+        self.frames_per_block = max(1, round(0.1 / self.microphone_bus.frame_duration))
+        self.voice_activity_detector = voice_activity_detector
         self.is_recording = False
+        self.stop_recording = False
+        self.speech_detected = False
+        self.last_audio_seconds = 0.0
 
-    def audio_callback(self, indata, frames, time, status):
-        """Fügt Audiodaten zum Queue hinzu"""
-        if self.is_recording:
-            self.audio_queue.put(indata.copy())
+        # Einmal allokiert und für jede Aufnahme wiederverwendet
+        self.max_samples = int(max_utterance_seconds * self.samplerate)
+        self.audio_buffer = np.empty(self.max_samples, dtype=np.int16)
 
-    def record_audio(self, filename="./temp/recorded_audio.mp3", silence_threshold=0.1, silence_duration=1.5):
-        """Nimmt Sprache auf und speichert sie als WAV-Datei."""
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
+        # Pegel und Spitzenwert je Bus-Frame in einem kleinen Ring, gleitend über das Fenster
+        self.window_frames = max(1, round(energy_window_seconds / self.microphone_bus.frame_duration))
+        self._frame_peaks = np.zeros(self.window_frames, dtype=np.float32)
+        self._frame_energies = np.zeros(self.window_frames, dtype=np.float64)
+        self._window_position = 0
+        self._window_energy = 0.0
+
+        self.rms = 0.0
+        self.peak = 0.0
+
+    def _reset_energy(self):
+        self._frame_peaks.fill(0)
+        self._frame_energies.fill(0)
+        self._window_position = 0
+        self._window_energy = 0.0
+        self.rms = 0.0
+        self.peak = 0.0
+
+    def _update_energy(self, frame):
+        """Schiebt einen Frame ins Energiefenster und aktualisiert RMS und Spitzenwert (0..1)."""
+        samples = frame.astype(np.float32)
+        energy = float(np.dot(samples, samples))
+        position = self._window_position % self.window_frames
+
+        self._window_energy += energy - self._frame_energies[position]
+        self._frame_energies[position] = energy
+        self._frame_peaks[position] = np.max(np.abs(samples)) / 32767.0
+        self._window_position += 1
+
+        window_samples = min(self._window_position, self.window_frames) * len(frame)
+        self.rms = float(np.sqrt(max(self._window_energy, 0.0) / window_samples)) / 32767.0
+        self.peak = float(self._frame_peaks.max())
+
+    def cancel(self):
+        """Beendet eine laufende Aufnahme; eine noch nicht gesendete Transkription entfällt."""
+        self.stop_recording = True
+
+    def _record(self, silence_threshold, silence_duration, on_progress=None, start_frame=None):
+        """Nimmt bis zur Stille in ``audio_buffer`` auf und gibt die Länge in Samples zurück.
+
+        Blockiert auf dem Mikrofon-Bus, bis neue Frames da sind, und kopiert sie direkt
+        in den vorab allokierten Puffer. Die Aufnahme endet nach ``silence_duration``
+        Sekunden Stille (bzw. am Sprachende laut VAD) oder wenn der Puffer
+        (``max_utterance_seconds``) voll ist.
+
+        :param on_progress: Wird nach jedem Block mit der aktuellen Länge aufgerufen
+        :param start_frame: Bus-Frame, ab dem aufgenommen wird (Standard: ab jetzt)
+        """
         self.is_recording = True
-        buffer = []
-        start_time = time.time()
+        self._reset_energy()
+        length = 0
+        silent_samples = 0
+        silence_samples = int(silence_duration * self.samplerate)
+        silence_frames = silence_samples // self.microphone_bus.frame_length
+        endpointer = None
+        if self.voice_activity_detector is not None:
+            endpointer = self.voice_activity_detector.endpointer(self.microphone_bus.frame_duration)
+        self.speech_detected = endpointer is None
         print("🎙 Aufnahme gestartet...")
 
-        with sd.InputStream(samplerate=self.samplerate, channels=1,
-                            dtype=np.int16,
-                            blocksize=int(self.samplerate * 0.1),  # 100ms Blocks
-                            callback=self.audio_callback):
-            while True:
-                if not self.audio_queue.empty():
-                    current_audio = self.audio_queue.get()
-                    buffer.append(current_audio)
-                        
-                    # Nur die letzten 0.5 Sekunden analysieren
-                    window_size = int(self.samplerate * 0.5)  # halbe Sekunde
-                    recent_samples = np.concatenate(buffer[-5:]) if len(buffer) > 5 else np.concatenate(buffer)
-                    if len(recent_samples) > window_size:
-                        recent_samples = recent_samples[-window_size:]
-                        
-                    volume = np.max(np.abs(recent_samples)) / 32767.0
-
-                    if volume < silence_threshold:
-                        if time.time() - start_time > silence_duration:
-                            print("⏸ Stille erkannt, Aufnahme stoppt.")
-                            break
-                    else:
-                        start_time = time.time()
+        subscription = self.microphone_bus.subscribe("whisper", start_frame=start_frame)
+        while length < self.max_samples and not self.stop_recording:
+            # ~100ms Blocks vom Mikrofon-Bus (zero-copy Views auf den Ringpuffer)
+            frames = subscription.read(timeout=0.5, min_frames=self.frames_per_block)
+
+            for frame in frames:
+                count = min(len(frame), self.max_samples - length)
+                self.audio_buffer[length:length + count] = frame[:count]
+                length += count
+                self._update_energy(frame)
+
+                # Stille wird in Samples gezählt, nicht per Wanduhr
+                silent_samples = silent_samples + len(frame) if self.peak < silence_threshold else 0
+
+            if on_progress and frames:
+                on_progress(length)
 
+            if endpointer is not None:
+                if frames and endpointer.process(np.stack(frames)):
+                    print("⏸ Sprachende erkannt, Aufnahme stoppt.")
+                    break
+                self.speech_detected = endpointer.speech_started
+                if not endpointer.speech_started and endpointer.frames_seen >= silence_frames:
+                    print("⏸ Keine Sprache erkannt, Aufnahme stoppt.")
+                    break
+            elif silent_samples >= silence_samples:
+                print("⏸ Stille erkannt, Aufnahme stoppt.")
+                break
+
+        if length >= self.max_samples:
+            print("⏹ Maximale Aufnahmedauer erreicht, Aufnahme stoppt.")
 
         self.is_recording = False
+        self.last_audio_seconds = length / self.samplerate
+        return length
+
+    def record_audio(self, filename="./temp/recorded_audio.wav", silence_threshold=0.1, silence_duration=1.5,
+                     min_duration=2.0):
+        """Nimmt Sprache auf und speichert sie als WAV-Datei.
+
+        :return: Dateiname oder None, wenn die Aufnahme kürzer als ``min_duration`` ist
+        """
+        self.stop_recording = False
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        length = self._record(silence_threshold, silence_duration)
 
-        if len(buffer) < 20:
+        if length < min_duration * self.samplerate:
             return None
 
-        audio_data = np.concatenate(buffer, axis=0)
-        
         with wave.open(filename, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)
             wf.setframerate(self.samplerate)
-            wf.writeframes(audio_data.tobytes())
+            wf.writeframes(self.audio_buffer[:length].tobytes())
 
         return filename
-        
+
+    def transcribe_utterance(self, silence_threshold=0.1, silence_duration=1.5, min_duration=2.0,
+                             incremental=True, start_frame=None):
+        """Nimmt eine Äußerung auf und transkribiert sie ohne Umweg über eine Datei.
+
+        Mit ``incremental`` laufen lange Aufnahmen bereits während des Sprechens
+        segmentweise durch Whisper; nach der Stille fehlt nur noch das letzte Segment.
+
+        :param start_frame: Bus-Frame, ab dem aufgenommen wird (z. B. direkt nach dem Wake-Word)
+        :return: Erkannter Text oder None (auch wenn abgebrochen oder keine Sprache erkannt)
+        """
+        self.stop_recording = False
+        # Stand vorher, damit auch schon während der Aufnahme gesendete Segmente mitzählen
+        bytes_raw, bytes_sent = self.transcriber.bytes_raw, self.transcriber.bytes_sent
+        progress = None
+        if incremental:
+            progress = IncrementalTranscription(self.transcriber, self.audio_buffer, self.samplerate)
+
+        length = self._record(silence_threshold, silence_duration,
+                              on_progress=progress.update if progress else None, start_frame=start_frame)
+
+        if self.stop_recording or not self.speech_detected or length < min_duration * self.samplerate:
+            if progress:
+                progress.cancel()
+            return None
+
+        if progress:
+            transcript = progress.finish(length)
+        else:
+            transcript = self.transcriber.transcribe_pcm(self.audio_buffer[:length], self.samplerate)
+
+        latency_tracer.annotate("whisper_bytes_raw", self.transcriber.bytes_raw - bytes_raw)
+        latency_tracer.annotate("whisper_bytes_sent", self.transcriber.bytes_sent - bytes_sent)
+        return transcript
+
     def set_open_ai_key(self):
         """Gibt den OpenAI API Key aus der Umgebungsvariable zurück."""
         load_dotenv()  